@@ -1,186 +1,121 @@
 import pytesseract
 from PIL import Image
-import re
 import json
-import pandas as pd
-from datetime import datetime
-import schedule
-import time
+import logging
 import os
-from pdf2image import convert_from_path
+import time
+from backend.pdf_text import extract_pdf_pages
+from backend.invoice_source import is_path, open_binary, source_kind
+from backend.parser_registry import parser_registry
+from backend.ocr_cache import ocr_cache, hash_image, hash_source
+from backend.image_preprocess import preprocess_image, preprocessing_enabled, TARGET_DPI
+from backend.roi_ocr import ocr_regions, missing_fields
+from backend.ocr_backends import get_ocr_backend
 from backend.deduction_identifier import identify_deductions
 from backend.tax_calculator import calculate_tax_liability
 from backend.error_validator import validate_invoice_data
-from backend.filing_reminder import setup_enhanced_reminders
-from backend.user_interaction import interact_with_user, append_to_enhanced_excel
+from backend.filing_reminder import setup_enhanced_reminders, reminder_service
+from backend.user_interaction import (prompt_user_inputs, resolve_user_inputs, apply_user_inputs,
+                                      generate_report, flatten_invoice_row)
+from backend.ledger import get_ledger
+from backend.gstr1_journal import get_journal
 from backend.gst_portal_simulator import simulate_gst_upload
+from backend.metrics import timed_stage, INVOICES, configure_logging
+
+logger = logging.getLogger(__name__)
 
 # Specify Tesseract executable path
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
-# Extract text from image
-def extract_text_from_image(image):
+# "full" OCRs whole pages; "roi" OCRs only the header and tax summary of image invoices
+OCR_MODE = os.environ.get("OCR_MODE", "full").lower()
+
+# Downscale/binarize/deskew/crop the image for OCR, or just normalise its mode
+def _prepare_image(image, preprocess):
+    if preprocess:
+        image, info = preprocess_image(image)
+        logger.debug("Preprocessing: %s -> %s, skew %.2f deg, timings (ms) %s",
+                     info['original_size'], info['size'], info['skew_angle'], info['timings_ms'])
+        return image
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+# Extract text from image (results are cached by content hash). With preprocess=True or
+# OCR_PREPROCESS=1, the image is downscaled, binarized, deskewed and cropped to its text
+# region before OCR (see backend.image_preprocess); by default it is OCR'd as uploaded.
+# content_hash is the hash of the encoded file (ocr_cache.hash_source); without it an image
+# not opened from disk is hashed by its pixels, which decodes it at full size
+def extract_text_from_image(image, use_cache=True, preprocess=None, content_hash=None):
     try:
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        text = pytesseract.image_to_string(image, config='--psm 6')
-        print("Raw Extracted Text:\n", text)
+        preprocess = preprocessing_enabled() if preprocess is None else preprocess
+        variant = f"preprocess-{TARGET_DPI}" if preprocess else None
+        backend = get_ocr_backend()
+        cache_key = ocr_cache.make_key(content_hash or hash_image(image), psm=6, variant=variant,
+                                       backend=backend) if use_cache else None
+        if cache_key:
+            cached_text = ocr_cache.get(cache_key)
+            if cached_text is not None:
+                logger.debug("OCR cache hit for image.")
+                return cached_text
+        image = _prepare_image(image, preprocess)
+        start = time.perf_counter()
+        text = backend.image_to_string(image, psm=6)
+        logger.debug("OCR took %.0f ms (%s)", (time.perf_counter() - start) * 1000, backend.name)
         if not text.strip():
-            print("Warning: No text extracted from image. Check image quality or content.")
+            logger.warning("No text extracted from image. Check image quality or content.")
+        elif cache_key:
+            ocr_cache.put(cache_key, text)
         return text
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.error("Error processing image: %s", e)
         return ""
 
-# Extract text from PDF
-def extract_text_from_pdf(pdf_path):
+# Extract text from the header and tax summary regions only (see backend.roi_ocr).
+# Returns "" when no region is found; callers then fall back to extract_text_from_image
+def extract_text_from_image_roi(image, use_cache=True, preprocess=None, content_hash=None):
     try:
-        images = convert_from_path(pdf_path, dpi=200)
-        all_text = ""
-        for i, image in enumerate(images):
-            print(f"Processing PDF page {i + 1}...")
-            text = extract_text_from_image(image)
-            all_text += text + "\n"
-        print("Combined Raw Extracted Text from PDF:\n", all_text)
-        if not text.strip():
-            print("Warning: No text extracted from PDF. Check PDF content or quality.")
+        preprocess = preprocessing_enabled() if preprocess is None else preprocess
+        variant = f"roi-preprocess-{TARGET_DPI}" if preprocess else "roi"
+        cache_key = ocr_cache.make_key(content_hash or hash_image(image), psm=6, variant=variant) if use_cache else None
+        if cache_key:
+            cached_text = ocr_cache.get(cache_key)
+            if cached_text is not None:
+                logger.debug("OCR cache hit for image regions.")
+                return cached_text
+        text, info = ocr_regions(_prepare_image(image, preprocess))
+        logger.debug("ROI OCR: %d region(s) covering %.0f%% of the page, layout %.0f ms, OCR %.0f ms",
+                     len(info['regions']), info['area_fraction'] * 100, info['layout_ms'], info.get('ocr_ms', 0))
+        if text.strip() and cache_key:
+            ocr_cache.put(cache_key, text)
+        return text
+    except Exception as e:
+        logger.error("Error processing image regions: %s", e)
+        return ""
+
+# Extract text from PDF (a path, bytes or file object). Pages with a usable text layer
+# (machine-generated invoices) are read directly; the rest are rendered and OCR'd in parallel
+# worker processes, with OCR results cached per page (see backend.pdf_text). page_log, if
+# given, receives one {"page", "source", "ms"} record per page
+def extract_text_from_pdf(pdf_path, workers=None, use_cache=True, page_log=None):
+    try:
+        pages = extract_pdf_pages(pdf_path, dpi=200, psm=6, workers=workers, backend=get_ocr_backend().name,
+                                  cache=ocr_cache if use_cache else None)
+        for page in pages:
+            logger.debug("PDF page %d: %s (%.0f ms)", page['page'], page['source'], page['ms'])
+        if page_log is not None:
+            page_log.extend({"page": page["page"], "source": page["source"], "ms": round(page["ms"], 1)} for page in pages)
+        all_text = "".join(page["text"] + "\n" for page in pages)
+        if not all_text.strip():
+            logger.warning("No text extracted from PDF. Check PDF content or quality.")
         return all_text
     except Exception as e:
-        print(f"Error processing PDF: {e}")
+        logger.error("Error processing PDF: %s", e)
         return ""
 
-# Parse GST-relevant fields
+# Parse GST-relevant fields with the vendor template matching the invoice header,
+# or the generic extractor (backend.invoice_extractor) when no template matches
 def parse_invoice_data(text):
-    data = {}
-    
-    invoice_no_pattern = r"\b([A-Z0-9]{8,12}-[A-Z0-9]{6}|\d{4}-\d{2})\b"
-    date_pattern = r"(\d{1,2}-(?:\d{2}|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{2,4})"
-    taxable_amount_pattern = r"Taxable\s*(?:Value)?\s*[:\-]?\s*(\d+(?:,\d+)?(?:\.\d+)?)|Taxable\s*Value\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    igst_rate_pattern = r"IGST\s*(\d+)%"
-    cgst_rate_pattern = r"CGST\s*(\d+)%|\b\d+\s*(?:%|%)\s*Amt\s*\d+\b"
-    sgst_rate_pattern = r"SGST\s*(\d+)%|\b\d+\s*(?:%|%)\s*Amt\s*\d+\b"
-    igst_amount_pattern = r"(?:IGST|iesr|YsiT)\s*[^\d]*(\d+(?:,\d+)?(?:\.\d+)?)|IGST\s*Amt\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    cgst_amount_pattern = r"CGST\s*[^\d]*(\d+(?:,\d+)?(?:\.\d+)?)|CGST\s*Amt\s*(\d+(?:,\d+)?(?:\.\d+)?)|\b\d+\s*(?:%|%)\s*Amt\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    sgst_amount_pattern = r"SGST\s*[^\d]*(\d+(?:,\d+)?(?:\.\d+)?)|SGST\s*Amt\s*(\d+(?:,\d+)?(?:\.\d+)?)|\b\d+\\s*(?:%|%)\s*Amt\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    total_amount_pattern = r"(?:YsiT\s*Exe\s*Tie|\bTotal\b|\|=)\s*(\d+(?:,\d+)?(?:\.\d+)?)|Total\s*Payable\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    
-    date_pattern_alt = r"(\d{1,2}\s*(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s*\d{2,4})"
-    total_amount_pattern_alt = r"Grand\s*Total\s*[:\-]?\s*Rs\.\s*(\d+(?:,\d+)?(?:\.\d+)?)|Total\s*Rs\.\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    cgst_rate_pattern_alt = r"CGST@(\d+(?:\.\d+)?)%"
-    sgst_rate_pattern_alt = r"[SC]GST@(\d+(?:\.\d+)?)%"
-    cgst_amount_pattern_alt = r"CGST@(\d+(?:\.\d+)?)%\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    sgst_amount_pattern_alt = r"[SC]GST@(\d+(?:\.\d+)?)%\s*(\d+(?:,\d+)?(?:\.\d+)?)"  # Matches SCST or SGST
-    taxable_amount_pattern_alt = r"Sub\s*Total\s*(\d+(?:,\d+)?(?:\.\d+)?)"
-    
-    print("Searching for patterns in text...")
-    invoice_no = re.search(invoice_no_pattern, text, re.IGNORECASE)
-    if invoice_no:
-        print(f"Found invoice_no: {invoice_no.group(1)}")
-    date = re.search(date_pattern, text, re.IGNORECASE) or re.search(date_pattern_alt, text, re.IGNORECASE)
-    if date:
-        print(f"Found date: {date.group(1)}")
-    taxable_amount = re.search(taxable_amount_pattern, text, re.IGNORECASE) or re.search(taxable_amount_pattern_alt, text, re.IGNORECASE)
-    if taxable_amount:
-        print(f"Found taxable_amount: {taxable_amount.group(1) or taxable_amount.group(2)}")
-    igst_rate = re.search(igst_rate_pattern, text, re.IGNORECASE)
-    if igst_rate:
-        print(f"Found igst_rate: {igst_rate.group(1)}")
-    cgst_rate = re.search(cgst_rate_pattern, text, re.IGNORECASE) or re.search(cgst_rate_pattern_alt, text, re.IGNORECASE)
-    if cgst_rate:
-        print(f"Found cgst_rate: {cgst_rate.group(1)}")
-    else:
-        print("cgst_rate not found in text.")
-    sgst_rate = re.search(sgst_rate_pattern, text, re.IGNORECASE) or re.search(sgst_rate_pattern_alt, text, re.IGNORECASE)
-    if sgst_rate:
-        print(f"Found sgst_rate: {sgst_rate.group(1)}")
-    else:
-        print("sgst_rate not found in text.")
-    igst_amount = re.search(igst_amount_pattern, text, re.IGNORECASE)
-    if igst_amount:
-        print(f"Found igst_amount: {igst_amount.group(1) or igst_amount.group(2)}")
-    else:
-        print("igst_amount not found in text.")
-    cgst_amount = re.search(cgst_amount_pattern, text, re.IGNORECASE)
-    if cgst_amount:
-        print(f"Found cgst_amount (original): {cgst_amount.group(1) or cgst_amount.group(2) or cgst_amount.group(3)}")
-    sgst_amount = re.search(sgst_amount_pattern, text, re.IGNORECASE)
-    if sgst_amount:
-        print(f"Found sgst_amount (original): {sgst_amount.group(1) or sgst_amount.group(2) or sgst_amount.group(3)}")
-    total_amount = re.search(total_amount_pattern_alt, text, re.IGNORECASE) or re.search(total_amount_pattern, text, re.IGNORECASE)
-    if total_amount:
-        print(f"Found total_amount: {total_amount.group(1) or total_amount.group(2)}")
-    
-    if invoice_no:
-        data["invoice_no"] = invoice_no.group(1)
-    if date:
-        raw_date = date.group(1).replace("Doc", "Dec").replace(" ", "")
-        try:
-            data["date"] = datetime.strptime(raw_date, "%d-%m-%y").strftime("%d-%m-%Y")
-        except ValueError:
-            data["date"] = datetime.strptime(raw_date, "%d%b%Y").strftime("%d-%m-%Y")
-    if total_amount:
-        data["total_amount"] = float((total_amount.group(1) or total_amount.group(2)).replace(",", ""))
-    if taxable_amount:
-        value = taxable_amount.group(1) or taxable_amount.group(2)
-        data["taxable_value"] = float(value.replace(",", ""))
-    
-    if igst_amount:
-        data["igst_amount"] = float((igst_amount.group(1) or igst_amount.group(2)).replace(",", ""))
-    
-    # Enhanced tax handling: Store multiple rates and amounts
-    data["tax_details"] = {"cgst": [], "sgst": [], "igst": []}
-    cgst_matches = re.findall(cgst_amount_pattern_alt, text, re.IGNORECASE)
-    for rate, amount in cgst_matches:
-        data["tax_details"]["cgst"].append({"rate": float(rate), "amount": float(amount.replace(",", ""))})
-        print(f"Found CGST: rate={rate}%, amount={amount}")
-    sgst_matches = re.findall(sgst_amount_pattern_alt, text, re.IGNORECASE)
-    for rate, amount in sgst_matches:
-        # Avoid duplicating CGST matches by checking context
-        if "CGST" not in text[text.index(f"@{rate}% {amount}"):text.index(f"@{rate}% {amount}")] or "SCST" in text:
-            data["tax_details"]["sgst"].append({"rate": float(rate), "amount": float(amount.replace(",", ""))})
-            print(f"Found SGST: rate={rate}%, amount={amount}")
-    
-    if data["tax_details"]["cgst"]:
-        data["cgst_amount"] = sum(item["amount"] for item in data["tax_details"]["cgst"])
-        data["cgst_rate"] = data["tax_details"]["cgst"][0]["rate"]
-    if data["tax_details"]["sgst"]:
-        data["sgst_amount"] = sum(item["amount"] for item in data["tax_details"]["sgst"])
-        data["sgst_rate"] = data["tax_details"]["sgst"][0]["rate"]
-    
-    if "total_amount" in data:
-        if "igst_amount" in data and "taxable_value" not in data:
-            data["taxable_value"] = data["total_amount"] - data["igst_amount"]
-        elif "cgst_amount" in data and "sgst_amount" in data and "taxable_value" not in data:
-            data["taxable_value"] = data["total_amount"] - (data["cgst_amount"] + data["sgst_amount"])
-    
-    if "igst_amount" in data and "taxable_value" in data:
-        data["igst_rate"] = int(igst_rate.group(1)) if igst_rate else int((data["igst_amount"] / data["taxable_value"]) * 100 + 0.5)
-    elif "cgst_amount" in data and "sgst_amount" in data and "taxable_value" in data:
-        data["cgst_rate"] = int(cgst_rate.group(1)) if cgst_rate else int((data["cgst_amount"] / data["taxable_value"]) * 100 + 0.5)
-        data["sgst_rate"] = int(sgst_rate.group(1)) if sgst_rate else data["cgst_rate"]
-    
-    if "total_amount" in data and "taxable_value" in data and not any(k in data for k in ["igst_amount", "cgst_amount", "sgst_amount"]):
-        tax_amount = data["total_amount"] - data["taxable_value"]
-        if "IGST" in text.upper():
-            data["igst_amount"] = tax_amount
-            data["igst_rate"] = int((tax_amount / data["taxable_value"]) * 100 + 0.5)
-        elif "CGST" in text.upper() and "SGST" in text.upper():
-            half_tax = tax_amount / 2
-            data["cgst_amount"] = half_tax
-            data["sgst_amount"] = half_tax
-            data["cgst_rate"] = int((half_tax / data["taxable_value"]) * 100 + 0.5)
-            data["sgst_rate"] = data["cgst_rate"]
-    
-    if "cgst_rate" not in data:
-        data["cgst_rate"] = 0
-    if "sgst_rate" not in data:
-        data["sgst_rate"] = 0
-    if "cgst_amount" not in data:
-        data["cgst_amount"] = 0.0
-    if "sgst_amount" not in data:
-        data["sgst_amount"] = 0.0
-    
-    print("Parsed Data:", data)
+    data, parser_name = parser_registry.parse(text)
+    logger.debug("Parsed Data (%s parser): %s", parser_name, data)
     return data
 
 # Convert to GSTR-1 JSON format
@@ -254,143 +189,199 @@ def to_gst_json(invoice_data):
     }
     return gst_data
 
-# Modified Excel function with deduplication
-def append_to_excel(invoice_data, filename="gst_data.xlsx", retries=3, delay=2):
-    # Flatten tax_details into separate columns
-    flattened_data = {
-        "invoice_no": invoice_data.get("invoice_no", ""),
-        "date": invoice_data.get("date", ""),
-        "total_amount": invoice_data.get("total_amount", 0.0),
-        "taxable_value": invoice_data.get("taxable_value", 0.0),
-        "cgst_amount": invoice_data.get("cgst_amount", 0.0),
-        "sgst_amount": invoice_data.get("sgst_amount", 0.0),
-        "igst_amount": invoice_data.get("igst_amount", 0.0),
-        "cgst_rate": invoice_data.get("cgst_rate", 0),
-        "sgst_rate": invoice_data.get("sgst_rate", 0),
-        "igst_rate": invoice_data.get("igst_rate", 0)
-    }
-    
-    # Extract CGST details
-    cgst_details = invoice_data.get("tax_details", {}).get("cgst", [])
-    if cgst_details:
-        flattened_data["cgst_rates"] = ", ".join(f"{d['rate']}" for d in cgst_details)
-        flattened_data["cgst_amounts"] = ", ".join(f"{d['amount']:.2f}" for d in cgst_details)
-    
-    # Extract SGST details
-    sgst_details = invoice_data.get("tax_details", {}).get("sgst", [])
-    if sgst_details:
-        flattened_data["sgst_rates"] = ", ".join(f"{d['rate']}" for d in sgst_details)
-        flattened_data["sgst_amounts"] = ", ".join(f"{d['amount']:.2f}" for d in sgst_details)
-    
-    # Extract IGST details (if any)
-    igst_details = invoice_data.get("tax_details", {}).get("igst", [])
-    if igst_details:
-        flattened_data["igst_rates"] = ", ".join(f"{d['rate']}" for d in igst_details)
-        flattened_data["igst_amounts"] = ", ".join(f"{d['amount']:.2f}" for d in igst_details)
-    
-    df_new = pd.DataFrame([flattened_data])
-    
-    if os.path.exists(filename):
-        try:
-            df_existing = pd.read_excel(filename)
-            # Check for duplicates based on invoice_no and date
-            df_existing = df_existing.drop_duplicates(subset=["invoice_no", "date"], keep="first")
-            if not df_existing[
-                (df_existing["invoice_no"] == flattened_data["invoice_no"]) & 
-                (df_existing["date"] == flattened_data["date"])
-            ].empty:
-                print(f"Duplicate entry for invoice {flattened_data['invoice_no']} on {flattened_data['date']} skipped.")
-                return
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        except Exception as e:
-            print(f"Error reading existing Excel file: {e}")
-            df_combined = df_new
-    else:
-        df_combined = df_new
-    
-    for attempt in range(retries):
-        try:
-            df_combined.to_excel(filename, index=False)
-            print(f"GST data appended to {filename}")
-            break
-        except PermissionError:
-            print(f"Permission denied for {filename}. Retrying in {delay} seconds... (Attempt {attempt + 1}/{retries})")
-            time.sleep(delay)
-    else:
-        print(f"Failed to write to {filename} after {retries} attempts. Please close the file if it’s open.")
+# Record the invoice in the append-only ledger; duplicates on (invoice_no, date) are ignored.
+# gst_data.xlsx is produced on demand with export_excel() instead of being rewritten per invoice.
+def append_to_excel(invoice_data, ledger=None):
+    ledger = ledger or get_ledger()
+    row = flatten_invoice_row(invoice_data)
+    if ledger.append(row):
+        logger.info("GST data recorded in ledger %s", ledger.db_path)
+        return True
+    logger.info("Duplicate entry for invoice %s on %s skipped.", row['invoice_no'], row['date'])
+    return False
 
-# Modified JSON function to append data
-def append_to_json(invoice_data, filename="gst_data.json"):
-    new_gst_data = to_gst_json(invoice_data)
-    
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            existing_data = json.load(f)
-        if "b2b" in existing_data and existing_data["b2b"]:
-            existing_data["b2b"][0]["inv"].append(new_gst_data["b2b"][0]["inv"][0])
-        else:
-            existing_data["b2b"] = new_gst_data["b2b"]
-        with open(filename, "w") as f:
-            json.dump(existing_data, f, indent=2)
-    else:
-        with open(filename, "w") as f:
-            json.dump(new_gst_data, f, indent=2)
-    
-    print(f"GST data appended to {filename}")
+# Export the ledger to Excel
+def export_excel(filename="gst_data.xlsx", ledger=None):
+    return (ledger or get_ledger()).export_excel(filename)
 
-# Main function to process invoice with new features
-def process_invoice(file_path):
-    if file_path.lower().endswith('.pdf'):
-        text = extract_text_from_pdf(file_path)
-    else:
-        image = Image.open(file_path)
-        text = extract_text_from_image(image)
-    
-    if not text.strip():
-        print("Warning: No text extracted from file. Check file quality, content, or path.")
-        return {}, {}
-    print("Raw Extracted Text:\n", text)
-    invoice_data = parse_invoice_data(text)
-    invoice_data["raw_text"] = text  # Add raw text for deduction identification
-    print("Extracted Data:", invoice_data)
-    
-    if invoice_data and any(invoice_data.values()):
-        # Add new features
-        deductions = identify_deductions(invoice_data)
-        invoice_data.update(deductions)
+# Journal the invoice for GSTR-1; gst_data.json is materialised on demand with export_json()
+def append_to_json(invoice_data, journal=None):
+    journal = journal or get_journal()
+    journal.append(to_gst_json(invoice_data))
+    logger.info("GST data journalled to %s", journal.path)
+
+# Export the journal as a portal-format GSTR-1 JSON document
+def export_json(filename="gst_data.json", gstin=None, fp=None, journal=None):
+    return (journal or get_journal()).export(filename, gstin=gstin, fp=fp)
+
+# Batched ledger write: all rows are inserted in a single transaction
+def append_many_to_ledger(invoices, ledger=None):
+    ledger = ledger or get_ledger()
+    written = ledger.append_many(flatten_invoice_row(invoice_data) for invoice_data in invoices)
+    skipped = len(invoices) - written
+    if skipped:
+        logger.info("Skipped %d duplicate invoice(s) already present in the ledger.", skipped)
+    logger.info("%d invoice(s) recorded in ledger %s", written, ledger.db_path)
+    return written
+
+# Batched journal write: all invoices are appended in one write
+def append_many_to_journal(invoices, journal=None):
+    journal = journal or get_journal()
+    written = journal.append_many(to_gst_json(invoice_data) for invoice_data in invoices)
+    logger.info("%d invoice(s) journalled to %s", written, journal.path)
+    return written
+
+# Pipeline stages in execution order. "ocr" and "parse" always run; the rest can be
+# selected per call. In headless mode "interaction" takes the additional ITC/expenses
+# from user_inputs or a defaults profile instead of prompting on stdin.
+PIPELINE_STAGES = ("ocr", "parse", "deductions", "tax", "validation", "interaction", "report", "outputs", "reminders", "portal")
+REQUIRED_STAGES = ("ocr", "parse")
+# Bulk callers commit outputs themselves and skip the slow per-invoice stages
+BATCH_STAGES = ("ocr", "parse", "deductions", "tax", "validation", "interaction")
+
+def resolve_stages(stages=None):
+    """
+    Normalise a stage list (iterable or comma-separated string) into pipeline order.
+    """
+    if stages is None:
+        return PIPELINE_STAGES
+    if isinstance(stages, str):
+        stages = [stage.strip() for stage in stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s): {', '.join(unknown)}")
+    selected = set(stages) | set(REQUIRED_STAGES)
+    return tuple(stage for stage in PIPELINE_STAGES if stage in selected)
 
-        tax_calcs = calculate_tax_liability(invoice_data)
-        invoice_data.update(tax_calcs)
+def _stage_deductions(invoice_data, options):
+    invoice_data.update(identify_deductions(invoice_data))
 
-        validation_report = validate_invoice_data(invoice_data)
-        if validation_report["errors"] or validation_report["warnings"]:
-            print("Validation Report:", validation_report)
+def _stage_tax(invoice_data, options):
+    invoice_data.update(calculate_tax_liability(invoice_data))
 
-        interact_with_user(invoice_data)
+def _stage_validation(invoice_data, options):
+    validation_report = validate_invoice_data(invoice_data)
+    invoice_data["validation_report"] = validation_report
+    if validation_report["errors"] or validation_report["warnings"]:
+        logger.info("Validation Report for invoice %s: %s", invoice_data.get("invoice_no", ""), validation_report)
 
+def _stage_interaction(invoice_data, options):
+    if options["headless"]:
+        apply_user_inputs(invoice_data, resolve_user_inputs(options["user_inputs"], options["profile"]))
+    else:
+        apply_user_inputs(invoice_data, prompt_user_inputs(invoice_data))
+
+def _stage_report(invoice_data, options):
+    generate_report(invoice_data)
+
+def _stage_outputs(invoice_data, options):
+    with timed_stage("json_write"):
         append_to_json(invoice_data)
+    with timed_stage("excel_write"):
         append_to_excel(invoice_data)
 
-        setup_enhanced_reminders(invoice_data)
+def _stage_reminders(invoice_data, options):
+    setup_enhanced_reminders(invoice_data)
+
+def _stage_portal(invoice_data, options):
+    portal_response = simulate_gst_upload(to_gst_json(invoice_data))
+    logger.info("GST Portal Simulation: %s", portal_response)
+
+STAGE_HANDLERS = {
+    "deductions": _stage_deductions,
+    "tax": _stage_tax,
+    "validation": _stage_validation,
+    "interaction": _stage_interaction,
+    "report": _stage_report,
+    "outputs": _stage_outputs,
+    "reminders": _stage_reminders,
+    "portal": _stage_portal
+}
+
+# Open an image invoice from a path, bytes or (rewound) file object
+def _open_image(source):
+    return Image.open(source if is_path(source) else open_binary(source))
+
+# Main function to process invoice with new features.
+# file_path is a path, or the file's bytes or a seekable binary file object (e.g. a spooled
+# upload); in-memory invoices are told apart by their content instead of an extension.
+# stages selects the pipeline stages to run (default: all); headless=True never reads stdin.
+# progress, if given, is called with each stage name as the pipeline reaches it.
+# ocr_mode "roi" (default: OCR_MODE) OCRs only the regions holding the parsed fields and
+# re-runs full-page OCR when any of them is missing.
+def process_invoice(file_path, stages=None, headless=False, user_inputs=None, profile=None, progress=None, ocr_mode=None):
+    try:
+        invoice_data, gst_json = _run_pipeline(file_path, stages, headless, user_inputs, profile, progress, ocr_mode)
+    except Exception:
+        INVOICES.inc(outcome="error")
+        raise
+    INVOICES.inc(outcome="processed" if invoice_data else "no_text")
+    return invoice_data, gst_json
 
-        gst_json = to_gst_json(invoice_data)
-        portal_response = simulate_gst_upload(gst_json)
-        print("GST Portal Simulation:", portal_response)
+# Every stage is timed into the invoice_stage_seconds histogram (see backend.metrics)
+def _run_pipeline(file_path, stages, headless, user_inputs, profile, progress, ocr_mode):
+    stages = resolve_stages(stages)
+    options = {"headless": headless, "user_inputs": user_inputs, "profile": profile}
+    report_stage = progress or (lambda stage: None)
+    is_pdf = source_kind(file_path) == "pdf"
+    use_roi = (ocr_mode or OCR_MODE) == "roi" and not is_pdf
+
+    report_stage("ocr")
+    pdf_pages = []
+    with timed_stage("ocr"):
+        # Image cache keys hash the uploaded bytes, before anything decodes the image
+        image_hash = None if is_pdf else hash_source(file_path)
+        if is_pdf:
+            text = extract_text_from_pdf(file_path, page_log=pdf_pages)
+        elif use_roi:
+            text = extract_text_from_image_roi(_open_image(file_path), content_hash=image_hash)
+            if not text.strip():
+                logger.info("ROI OCR found no usable regions; falling back to full-page OCR.")
+                use_roi = False
+                text = extract_text_from_image(_open_image(file_path), content_hash=image_hash)
+        else:
+            image = _open_image(file_path)
+            text = extract_text_from_image(image, content_hash=image_hash)
+    
+    if not text.strip():
+        logger.warning("No text extracted from file. Check file quality, content, or path.")
+        return {}, {}
+    logger.debug("Raw Extracted Text:\n%s", text)
+    report_stage("parse")
+    with timed_stage("parse"):
+        invoice_data = parse_invoice_data(text)
+    if use_roi and missing_fields(invoice_data):
+        logger.info("ROI OCR missed %s; falling back to full-page OCR.", ", ".join(missing_fields(invoice_data)))
+        with timed_stage("ocr"):
+            text = extract_text_from_image(_open_image(file_path), content_hash=image_hash)
+        with timed_stage("parse"):
+            invoice_data = parse_invoice_data(text)
+    invoice_data["raw_text"] = text  # Add raw text for deduction identification
+    if pdf_pages:
+        invoice_data["pdf_pages"] = pdf_pages  # Text layer or OCR, per page
+    logger.debug("Extracted Data: %s", invoice_data)
+    
+    if invoice_data and any(invoice_data.values()):
+        for stage in stages:
+            if stage in REQUIRED_STAGES:
+                continue
+            report_stage(stage)
+            with timed_stage(stage):
+                STAGE_HANDLERS[stage](invoice_data, options)
     else:
-        print("No valid data extracted. Skipping file updates.")
+        logger.warning("No valid data extracted. Skipping file updates.")
     
     gst_json = to_gst_json(invoice_data)
-    print("GST JSON (latest entry):", json.dumps(gst_json, indent=2))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("GST JSON (latest entry): %s", json.dumps(gst_json, indent=2))
     
     return invoice_data, gst_json
 
 # Test it
 if __name__ == "__main__":
+    configure_logging()
     file_path = "invoice.pdf"
     extracted_data, gst_json = process_invoice(file_path)
     
-    print("\nRunning scheduler for 10 seconds...")
-    end_time = time.time() + 10
-    while time.time() < end_time:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+    # Reminders run on a background thread; print the current ones once for the demo
+    reminder_service.send_due_reminders()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from backend.app import process_invoice, BATCH_STAGES, append_many_to_ledger, append_many_to_journal, export_excel, export_json
+from backend.ocr_engine import default_worker_count
+from backend.gst_portal_simulator import get_portal_client
+from backend.metrics import configure_logging
+from backend.error_validator import validate_invoices_bulk
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.jpg', '.png')
+
+def is_supported_invoice(filename):
+    return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+def extract_invoice_archive(zip_path, target_dir):
+    """
+    Extract the supported invoice files from a zip archive into target_dir.
+    Entries that would escape target_dir (absolute paths, '..') are ignored.
+    """
+    extracted = []
+    target_root = os.path.realpath(target_dir)
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in archive.infolist():
+            if member.is_dir() or not is_supported_invoice(member.filename):
+                continue
+            destination = os.path.realpath(os.path.join(target_root, member.filename))
+            if not destination.startswith(target_root + os.sep):
+                logger.warning("Skipping unsafe archive entry: %s", member.filename)
+                continue
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            with archive.open(member) as src, open(destination, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            extracted.append(destination)
+    return sorted(extracted)
+
+def collect_invoice_files(source, work_dir):
+    """
+    Resolve a directory, zip archive or single invoice file into a sorted list of invoice paths.
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                path = os.path.join(root, name)
+                if is_supported_invoice(name):
+                    paths.append(path)
+                elif name.lower().endswith('.zip'):
+                    paths.extend(extract_invoice_archive(path, os.path.join(work_dir, os.path.splitext(name)[0])))
+        return sorted(paths)
+    if zipfile.is_zipfile(source):
+        return extract_invoice_archive(source, work_dir)
+    if is_supported_invoice(source):
+        return [source]
+    raise ValueError(f"Unsupported bulk source: {source}")
+
+def _process_one(file_path, stages=BATCH_STAGES, user_inputs=None, profile=None):
+    try:
+        invoice_data, gst_json = process_invoice(file_path, stages=stages, headless=True, user_inputs=user_inputs, profile=profile)
+    except Exception as e:
+        return {"file": file_path, "error": f"Processing error: {str(e)}"}
+    if not invoice_data:
+        return {"file": file_path, "error": "No text extracted from file"}
+    return {"file": file_path, "invoice_data": invoice_data, "gst_json": gst_json}
+
+def process_batch(file_paths, workers=None, json_filename=None, excel_filename=None, profile=None, upload=False):
+    """
+    Run the invoice pipeline over many files with a worker pool and commit the
+    ledger rows and GSTR-1 journal entries once, after every invoice has been processed.
+    If json_filename/excel_filename are given the exports are written at the end.
+    Invoices run headless; additional ITC/expenses come from the named defaults profile.
+    With upload=True the invoices are submitted to the GST portal as coalesced GSTR-1 batches.
+    """
+    workers = workers or default_worker_count()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(partial(_process_one, profile=profile), file_paths))
+
+    succeeded = [result["invoice_data"] for result in results if "invoice_data" in result]
+    gst_jsons = [result["gst_json"] for result in results if "invoice_data" in result]
+    failed = [result for result in results if "error" in result]
+
+    written_ledger = append_many_to_ledger(succeeded) if succeeded else 0
+    written_journal = append_many_to_journal(succeeded) if succeeded else 0
+    if json_filename:
+        export_json(json_filename)
+    if excel_filename:
+        export_excel(excel_filename)
+    portal_responses = get_portal_client().submit_batch(gst_jsons) if upload and gst_jsons else []
+    # Batch-level checks (e.g. duplicate invoice numbers across files) on top of the per-invoice ones
+    validation = validate_invoices_bulk(succeeded)[1]["failures"] if succeeded else {}
+
+    return {
+        "total": len(file_paths),
+        "processed": len(succeeded),
+        "failed": len(failed),
+        "ledger_rows_written": written_ledger,
+        "journal_invoices_written": written_journal,
+        "portal_responses": portal_responses,
+        "validation_failures": validation,
+        "results": results
+    }
+
+def process_bulk_source(source, workers=None, json_filename=None, excel_filename=None, profile=None, upload=False):
+    """
+    Process every invoice in a directory or zip archive; extracted archives are cleaned up afterwards.
+    """
+    work_dir = tempfile.mkdtemp(prefix="gst_bulk_")
+    try:
+        file_paths = collect_invoice_files(source, work_dir)
+        logger.info("Found %d invoice file(s) in %s", len(file_paths), source)
+        return process_batch(file_paths, workers=workers, json_filename=json_filename, excel_filename=excel_filename, profile=profile, upload=upload)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-process a directory or zip archive of invoices.")
+    parser.add_argument("source", help="Directory, zip archive or single invoice file")
+    parser.add_argument("--workers", type=int, default=None, help="Number of invoices processed concurrently")
+    parser.add_argument("--excel", default=None, help="Export the invoice ledger to this Excel file when done")
+    parser.add_argument("--json", default=None, help="Export the GSTR-1 JSON to this file when done")
+    parser.add_argument("--profile", default=None, help="Defaults profile for additional ITC/expenses")
+    parser.add_argument("--upload", action="store_true", help="Submit the batch to the GST portal")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    summary = process_bulk_source(args.source, workers=args.workers, json_filename=args.json, excel_filename=args.excel, profile=args.profile, upload=args.upload)
+    print(json.dumps({key: value for key, value in summary.items() if key != "results"}, indent=2))
+    for result in summary["results"]:
+        if "error" in result:
+            print(f"Failed: {result['file']} - {result['error']}")
+    return 0 if summary["failed"] == 0 else 1
+
+# Example usage: python -m backend.batch invoices/ --workers 8
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,18 @@
-import re
-from datetime import datetime
+from backend.deduction_rules import get_rule_engine
 
 def identify_deductions(invoice_data):
     """
     Identify potential tax deductions (e.g., Input Tax Credit, business expenses) from invoice data.
     Returns a dictionary with deductible amounts and descriptions.
+    SAC/HSN and keyword rules come from the deduction rule config (see backend.deduction_rules).
     """
-    deductions = {
-        "input_tax_credit": 0.0,
-        "business_expenses": 0.0,
-        "deduction_notes": []
-    }
-
-    # Example: Check SAC codes or descriptions for common deductible items
-    sac_codes = re.findall(r"SAC\s*(\d+)", invoice_data.get("raw_text", ""))
-    descriptions = re.findall(r"Description\s*([a-zA-Z\s]+)", invoice_data.get("raw_text", ""))
-    
-    if sac_codes:
-        for sac in sac_codes:
-            if sac in ["121", "222"]:  # Example SAC codes for deductible services (adjust based on GST rules)
-                deductions["input_tax_credit"] += invoice_data.get("taxable_value", 0.0) * 0.18  # Assume 18% ITC for simplicity
-                deductions["deduction_notes"].append(f"ITC eligible for SAC {sac}: {invoice_data.get('taxable_value', 0.0)}")
-    
-    if descriptions:
-        for desc in descriptions:
-            if "ac" in desc.lower() or "heat" in desc.lower():  # Example for AC/Heating as business expenses
-                deductions["business_expenses"] += invoice_data.get("taxable_value", 0.0) * 0.1  # Assume 10% deductible
-                deductions["deduction_notes"].append(f"Business expense deduction for {desc}: {invoice_data.get('taxable_value', 0.0) * 0.1}")
+    return get_rule_engine().evaluate(invoice_data)
 
-    return deductions
+def identify_deductions_batch(invoices):
+    """
+    identify_deductions for many invoices with one compiled rule set.
+    """
+    return get_rule_engine().evaluate_many(invoices)
 
 # Example usage (can be integrated with your app.py)
 if __name__ == "__main__":
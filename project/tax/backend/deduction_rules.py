@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import threading
+from backend.hsn_master import get_hsn_master
+
+# Rules are loaded from DEDUCTION_RULES (default backend/deduction_rules.json):
+#   code_rules:    {"name", "scheme": "SAC"|"HSN", "codes": [...], "category", "rate", "note"}
+#                  A code ending in "*" matches every code with that prefix.
+#   keyword_rules: {"name", "keywords": [...], "category", "rate", "note"}
+#                  Keywords match case-insensitively anywhere inside an invoice description.
+#   master_rules:  {"name", "category", "note"}
+#                  Applied once per distinct code no code rule covers when the HSN/SAC master
+#                  (backend.hsn_master) lists it as ITC eligible. Each distinct code quoted on
+#                  the invoice stands for an equal share of it: an eligible code is credited its
+#                  share of the extracted CGST+SGST+IGST, or, when no tax was extracted, its
+#                  share of the taxable value at the code's GST rate from the master.
+# category is the deductions key the amount is added to (e.g. input_tax_credit); the amount
+# is taxable_value * rate. note is formatted with code, description, taxable_value and amount.
+RULES_FILE = os.environ.get("DEDUCTION_RULES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "deduction_rules.json"))
+CATEGORIES = ("input_tax_credit", "business_expenses")
+
+# One scan over the raw text finds every SAC/HSN code and every description. Both are
+# zero-width lookaheads, so a description that runs over a "SAC 121" still lets the code
+# be found at its own position, exactly as separate findall passes would.
+TEXT_SCANNER = re.compile(
+    r"(?=(?P<code_match>(?P<scheme>SAC|HSN)\s*(?P<code>\d+))"
+    r"|(?P<desc_match>Description\s*(?P<description>[a-zA-Z\s]+)))"
+)
+
+class DeductionRule:
+    def __init__(self, name, category, rate, note):
+        self.name = name
+        self.category = category
+        self.rate = float(rate)
+        self.note = note
+
+    def apply(self, deductions, taxable_value, code="", description="", rate=None, amount=None):
+        if amount is None:
+            amount = taxable_value * (self.rate if rate is None else rate)
+        deductions[self.category] = deductions.get(self.category, 0.0) + amount
+        deductions["deduction_notes"].append(
+            self.note.format(code=code, description=description, taxable_value=taxable_value, amount=amount)
+        )
+
+class DeductionRuleEngine:
+    """
+    Compiled deduction rules: exact codes in a dict, code prefixes in per-length dicts, and
+    every keyword in one alternation regex scanned with a lookahead so overlapping keywords
+    are all seen (keywords contained in a matched keyword are added from a precomputed map).
+    """
+
+    def __init__(self, code_rules=(), keyword_rules=(), master_rules=(), master=None):
+        self.exact_codes = {}
+        self.prefix_codes = {}
+        for spec in code_rules:
+            rule = DeductionRule(spec.get("name", ""), spec["category"], spec["rate"], spec.get("note", "{code}"))
+            scheme = spec.get("scheme", "SAC").upper()
+            for code in spec["codes"]:
+                code = str(code)
+                if code.endswith("*"):
+                    prefix = code[:-1]
+                    self.prefix_codes.setdefault(len(prefix), {}).setdefault((scheme, prefix), []).append(rule)
+                else:
+                    self.exact_codes.setdefault((scheme, code), []).append(rule)
+        self.prefix_lengths = sorted(self.prefix_codes, reverse=True)
+        self.master = master
+        self.master_rules = [DeductionRule(spec.get("name", ""), spec["category"], 0.0, spec.get("note", "{code}"))
+                             for spec in master_rules]
+
+        self.keyword_rules = {}
+        # Rules fire in configuration order, independent of where their keywords occur
+        self.rule_order = {}
+        for spec in keyword_rules:
+            rule = DeductionRule(spec.get("name", ""), spec["category"], spec["rate"], spec.get("note", "{description}"))
+            self.rule_order[rule] = len(self.rule_order)
+            for keyword in spec["keywords"]:
+                self.keyword_rules.setdefault(keyword.lower(), []).append(rule)
+        keywords = sorted(self.keyword_rules, key=len, reverse=True)
+        self.keyword_pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))") if keywords else None
+        # A longer keyword hides shorter ones starting at the same position; they are implied by it
+        self.implied_keywords = {keyword: [other for other in keywords if other in keyword] for keyword in keywords}
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE, master=None):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config.get("code_rules", ()), config.get("keyword_rules", ()), config.get("master_rules", ()), master)
+
+    def rules_for_code(self, scheme, code):
+        rules = self.exact_codes.get((scheme, code))
+        if rules:
+            return rules
+        # Longest matching prefix wins
+        for length in self.prefix_lengths:
+            if len(code) >= length:
+                rules = self.prefix_codes[length].get((scheme, code[:length]))
+                if rules:
+                    return rules
+        return ()
+
+    def rules_for_description(self, description):
+        if self.keyword_pattern is None:
+            return []
+        found = set()
+        for match in self.keyword_pattern.finditer(description.lower()):
+            found.update(self.implied_keywords[match.group(1)])
+        rules = {rule for keyword in found for rule in self.keyword_rules[keyword]}
+        return sorted(rules, key=self.rule_order.__getitem__)
+
+    def scan(self, text):
+        """
+        Codes and descriptions in text, in the order of separate non-overlapping findall passes.
+        Returns ([(scheme, code)], [description]).
+        """
+        codes, descriptions = [], []
+        code_end = desc_end = 0
+        for match in TEXT_SCANNER.finditer(text):
+            position = match.start()
+            if match.group("code_match") is not None and position >= code_end:
+                codes.append((match.group("scheme"), match.group("code")))
+                code_end = match.end("code_match")
+            elif match.group("desc_match") is not None and position >= desc_end:
+                descriptions.append(match.group("description"))
+                desc_end = match.end("desc_match")
+        return codes, descriptions
+
+    def evaluate(self, invoice_data):
+        """
+        Deductions for one invoice: {"input_tax_credit", "business_expenses", "deduction_notes"}.
+        """
+        deductions = {category: 0.0 for category in CATEGORIES}
+        deductions["deduction_notes"] = []
+        taxable_value = invoice_data.get("taxable_value", 0.0)
+        codes, descriptions = self.scan(invoice_data.get("raw_text", ""))
+        uncovered = {}
+        for scheme, code in codes:
+            rules = self.rules_for_code(scheme, code)
+            for rule in rules:
+                rule.apply(deductions, taxable_value, code=code)
+            if not rules:
+                uncovered[code] = None
+        if uncovered and self.master_rules and self.master is not None:
+            self._apply_master_rules(deductions, invoice_data, taxable_value, uncovered, len({code for _, code in codes}))
+        for description in descriptions:
+            for rule in self.rules_for_description(description):
+                rule.apply(deductions, taxable_value, description=description)
+        return deductions
+
+    def _apply_master_rules(self, deductions, invoice_data, taxable_value, codes, line_count):
+        # The whole invoice's tax/value is split over its distinct codes, so repeated codes
+        # and multi-line invoices are never credited more than the invoice carries
+        eligible = [(code, entry) for code, entry in ((code, self.master.lookup(code)) for code in codes)
+                    if entry and entry["itc_eligible"]]
+        if not eligible:
+            return
+        invoice_tax = sum(invoice_data.get(f"{head}_amount", 0.0) or 0.0 for head in ("cgst", "sgst", "igst"))
+        line_value = taxable_value / line_count
+        for code, entry in eligible:
+            for rule in self.master_rules:
+                if invoice_tax > 0:
+                    rule.apply(deductions, line_value, code=code, amount=invoice_tax / line_count)
+                else:
+                    rule.apply(deductions, line_value, code=code, rate=entry["rate"] / 100)
+
+    def evaluate_many(self, invoices):
+        return [self.evaluate(invoice_data) for invoice_data in invoices]
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_rule_engine():
+    """
+    Engine compiled from RULES_FILE on first use, backed by the HSN/SAC master when one exists.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeductionRuleEngine.from_file(RULES_FILE, master=get_hsn_master())
+        return _engine
@@ -1,4 +1,18 @@
 import re
+import numpy as np
+import pandas as pd
+from backend.hsn_master import get_hsn_master, codes_in_text
+
+REQUIRED_FIELDS = ["invoice_no", "date", "total_amount", "taxable_value"]
+# GSTIN format (e.g., 22AAAAA0000A1Z5): state code, PAN, entity number, "Z", check
+# character. Compiled once; the bulk validator applies the same rules per character position.
+GSTIN_PATTERN = re.compile(r"^\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]$")
+TOTAL_TOLERANCE = 0.01
+RATE_TOLERANCE = 0.01
+
+# Columns of the bulk error matrix; the first group are errors, the rest warnings
+ERROR_CHECKS = [f"missing_{field}" for field in REQUIRED_FIELDS] + ["duplicate_invoice_no"]
+WARNING_CHECKS = ["invalid_gstin_format", "invalid_gstin_checksum", "total_mismatch"]
 
 def validate_invoice_data(invoice_data):
     """
@@ -10,15 +24,14 @@ def validate_invoice_data(invoice_data):
     }
 
     # Check for required fields
-    required_fields = ["invoice_no", "date", "total_amount", "taxable_value"]
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in invoice_data or not invoice_data[field]:
             validation_report["errors"].append(f"Missing or empty field: {field}")
 
     # Validate GSTIN format (e.g., 22AAAAA0000A1Z5)
     if "customer_gstin" in invoice_data and invoice_data["customer_gstin"]:
         gstin = invoice_data["customer_gstin"]
-        if not re.match(r"^\d{2}[A-Z]{5}\d{4}[A-Z]{1}\d{1}[Z]{1}\d{1}$", gstin):
+        if not GSTIN_PATTERN.match(gstin):
             validation_report["warnings"].append(f"Invalid GSTIN format: {gstin}")
 
     # Check if total_amount = taxable_value + taxes
@@ -26,11 +39,152 @@ def validate_invoice_data(invoice_data):
                  invoice_data.get("sgst_amount", 0.0) + 
                  invoice_data.get("igst_amount", 0.0))
     expected_total = invoice_data.get("taxable_value", 0.0) + total_tax
-    if abs(invoice_data.get("total_amount", 0.0) - expected_total) > 0.01:
+    if abs(invoice_data.get("total_amount", 0.0) - expected_total) > TOTAL_TOLERANCE:
         validation_report["warnings"].append(f"Mismatch: Total amount ({invoice_data.get('total_amount', 0.0)}) does not match taxable value + taxes ({expected_total})")
 
+    # Check extracted rates against the HSN/SAC master
+    validation_report["warnings"].extend(check_hsn_rates(invoice_data))
+
     return validation_report
 
+def _invoice_rates(invoice_data):
+    # Total GST rates on the invoice: IGST rates, and CGST + SGST (two equal halves)
+    tax_details = invoice_data.get("tax_details") or {}
+    rates = {float(item["rate"]) for item in tax_details.get("igst", [])}
+    rates.update(float(item["rate"]) * 2 for item in tax_details.get("cgst", []))
+    if invoice_data.get("igst_rate"):
+        rates.add(float(invoice_data["igst_rate"]))
+    if invoice_data.get("cgst_rate") or invoice_data.get("sgst_rate"):
+        rates.add(float(invoice_data.get("cgst_rate") or 0) + float(invoice_data.get("sgst_rate") or 0))
+    return rates
+
+def check_hsn_rates(invoice_data, master=None):
+    """
+    Warnings for HSN/SAC codes in the invoice text whose master rate matches none of the
+    extracted GST rates. Empty when no master table is available or no rate was extracted.
+    """
+    master = get_hsn_master() if master is None else master
+    rates = _invoice_rates(invoice_data)
+    if master is None or not rates:
+        return []
+    warnings = []
+    for code in dict.fromkeys(codes_in_text(invoice_data.get("raw_text", ""))):
+        entry = master.lookup(code)
+        if entry and not any(abs(entry["rate"] - rate) <= RATE_TOLERANCE for rate in rates):
+            shown = ", ".join(f"{rate:g}%" for rate in sorted(rates))
+            warnings.append(f"Rate mismatch: HSN/SAC {code} is taxed at {entry['rate']:g}% but the invoice shows {shown}")
+    return warnings
+
+def _gstin_codes(gstins):
+    # (rows, 15) matrix of code points, read straight from the fixed-width UCS-4 buffer;
+    # shorter strings are zero-padded
+    return np.asarray(gstins, dtype="U15").view(np.uint32).reshape(-1, 15).astype(np.int64)
+
+def gstin_format_valid(gstins):
+    """
+    GSTIN_PATTERN evaluated column-wise on the character matrix. Returns a boolean array.
+    """
+    if not len(gstins):
+        return np.zeros(0, dtype=bool)
+    lengths = np.fromiter(map(len, gstins), dtype=np.int64, count=len(gstins))
+    codes = _gstin_codes(gstins)
+    digit = (codes >= ord("0")) & (codes <= ord("9"))
+    upper = (codes >= ord("A")) & (codes <= ord("Z"))
+    return ((lengths == 15)
+            & digit[:, 0:2].all(axis=1) & upper[:, 2:7].all(axis=1) & digit[:, 7:11].all(axis=1) & upper[:, 11]
+            & ((digit[:, 12] & (codes[:, 12] != ord("0"))) | upper[:, 12])
+            & (codes[:, 13] == ord("Z")) & (digit[:, 14] | upper[:, 14]))
+
+def gstin_checksum_valid(gstins):
+    """
+    Check the 15th character of each GSTIN against the GST check character (weights
+    1,2,1,2... over base-36 code points, each product's base-36 digits summed). gstins must
+    be well-formed (see gstin_format_valid); returns a boolean array.
+    """
+    if not len(gstins):
+        return np.zeros(0, dtype=bool)
+    codes = _gstin_codes(gstins)
+    values = np.where(codes <= ord("9"), codes - ord("0"), codes - ord("A") + 10)
+    products = values[:, :14] * np.tile([1, 2], 7)
+    total = (products // 36 + products % 36).sum(axis=1)
+    return (36 - total % 36) % 36 == values[:, 14]
+
+def _columns(invoices):
+    # Accept a DataFrame, a dict of equal-length columns, or a list of invoice dicts
+    if hasattr(invoices, "columns"):
+        return {column: invoices[column].reset_index(drop=True) for column in invoices.columns}, len(invoices)
+    if isinstance(invoices, dict):
+        columns = {name: np.asarray(values, dtype=object) for name, values in invoices.items()}
+        return columns, len(next(iter(columns.values()))) if columns else 0
+    invoices = list(invoices)
+    names = {name for invoice in invoices for name in invoice}
+    return {name: np.array([invoice.get(name) for invoice in invoices], dtype=object) for name in names}, len(invoices)
+
+def _text(column, size):
+    # Stripped strings as a Series; None, NaN and pd.NA become ""
+    if column is None:
+        return pd.Series([""] * size, dtype=object)
+    values = pd.Series(column, dtype=object).reset_index(drop=True)
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+def _amount(column, size):
+    # Float array with missing or unparseable values as 0; "1,180" reads as 1180
+    if column is None:
+        return np.zeros(size)
+    values = pd.Series(column).reset_index(drop=True)
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values.astype("string").str.replace(",", "", regex=False).str.strip(), errors="coerce")
+    return np.nan_to_num(values.to_numpy(dtype=np.float64, na_value=np.nan), nan=0.0)
+
+def validate_invoices_bulk(invoices, gstin_column="customer_gstin"):
+    """
+    Validate a whole batch at once. invoices is a DataFrame, a dict of columns or a list of
+    invoice dicts. Returns (matrix, summary): matrix is a boolean array of shape
+    (rows, len(ERROR_CHECKS + WARNING_CHECKS)) where True marks a failed check, and summary
+    holds the failure count per check plus the rows with any error/warning.
+    Checks are the ones validate_invoice_data applies, plus the GSTIN check digit and
+    duplicate invoice numbers (per GSTIN when a GSTIN column is present) across the batch.
+    """
+    columns, size = _columns(invoices)
+    checks = {}
+
+    invoice_no = _text(columns.get("invoice_no"), size)
+    gstin = _text(columns.get(gstin_column), size)
+    amounts = {field: _amount(columns.get(field), size)
+               for field in ("total_amount", "taxable_value", "cgst_amount", "sgst_amount", "igst_amount")}
+
+    checks["missing_invoice_no"] = invoice_no == ""
+    checks["missing_date"] = _text(columns.get("date"), size) == ""
+    checks["missing_total_amount"] = amounts["total_amount"] == 0
+    checks["missing_taxable_value"] = amounts["taxable_value"] == 0
+
+    keys = gstin + "|" + invoice_no.str.upper()
+    checks["duplicate_invoice_no"] = keys.duplicated(keep=False) & ~checks["missing_invoice_no"]
+
+    gstin = gstin.to_numpy(dtype=object)
+    has_gstin = gstin != ""
+    well_formed = gstin_format_valid(gstin)
+    checks["invalid_gstin_format"] = has_gstin & ~well_formed
+    checksum_ok = np.ones(size, dtype=bool)
+    checksum_ok[well_formed] = gstin_checksum_valid(gstin[well_formed])
+    checks["invalid_gstin_checksum"] = well_formed & ~checksum_ok
+
+    expected_total = amounts["taxable_value"] + amounts["cgst_amount"] + amounts["sgst_amount"] + amounts["igst_amount"]
+    checks["total_mismatch"] = np.abs(amounts["total_amount"] - expected_total) > TOTAL_TOLERANCE
+
+    names = ERROR_CHECKS + WARNING_CHECKS
+    matrix = np.column_stack([checks[name] for name in names]) if size else np.zeros((0, len(names)), dtype=bool)
+    errors = matrix[:, :len(ERROR_CHECKS)].any(axis=1)
+    warnings = matrix[:, len(ERROR_CHECKS):].any(axis=1)
+    summary = {
+        "rows": size,
+        "checks": names,
+        "failures": dict(zip(names, matrix.sum(axis=0).tolist())),
+        "rows_with_errors": np.flatnonzero(errors).tolist(),
+        "rows_with_warnings": np.flatnonzero(warnings & ~errors).tolist()
+    }
+    return matrix, summary
+
 # Example usage
 if __name__ == "__main__":
     # Mock invoice data (replace with actual invoice_data from app.py)
@@ -45,4 +199,7 @@ if __name__ == "__main__":
         "customer_gstin": "22AAAAA0000A1Z5"
     }
     report = validate_invoice_data(sample_invoice)
-    print("Validation Report:", report)
\ No newline at end of file
+    print("Validation Report:", report)
+
+    matrix, summary = validate_invoices_bulk([sample_invoice, dict(sample_invoice, customer_gstin="22AAAAA0000A1Z6"), {"invoice_no": "80XBoEZ0-8BP000"}])
+    print("Bulk Validation:", summary)
\ No newline at end of file
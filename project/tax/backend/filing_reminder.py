@@ -1,49 +1,124 @@
 from datetime import datetime, timedelta
+import logging
+import threading
 import schedule
-import time
 
-def setup_enhanced_reminders(invoice_data):
+# Returns tracked per filing period: due day of the month after the period
+RETURN_DUE_DAYS = {"GSTR-1": 11, "GSTR-3B": 20}
+# Deadlines this far in the past are dropped from the index
+OVERDUE_RETENTION = timedelta(days=90)
+
+FILING_CHECKLIST = [
+    "Verify extracted invoice data",
+    "Generate JSON/Excel files",
+    "Calculate deductions and tax liability",
+    "Validate data for errors",
+    "Upload to GST portal",
+    "Confirm filing deadlines"
+]
+FILING_CHECKLIST_TEXT = "\n".join(f"- {item}" for item in FILING_CHECKLIST)
+
+logger = logging.getLogger(__name__)
+
+def filing_deadlines(invoice_date):
+    """
+    Due dates of each tracked return for the filing period (month) containing invoice_date.
+    """
+    next_month = (invoice_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return {return_type: next_month.replace(day=due_day) for return_type, due_day in RETURN_DUE_DAYS.items()}
+
+class ReminderService:
     """
-    Set up reminders for GSTR-1, GSTR-3B, and other deadlines based on invoice date and GSTIN state.
+    Background reminder scheduler with a deduplicated deadline index.
+    Invoices only add (gstin, period, return) entries to the index; a single daily job on a
+    private scheduler, run by a daemon thread, logs the reminders. Registering an invoice
+    therefore never blocks, and the number of scheduled jobs stays at one.
     """
-    invoice_date = datetime.strptime(invoice_data.get("date", ""), "%d-%m-%Y")
-    gstin_state = invoice_data.get("customer_gstin", "")[:2] if invoice_data.get("customer_gstin") else "01"  # Default to state 01 (J&K)
-
-    def remind_gstr1():
-        gstr1_deadline = invoice_date.replace(day=11, month=invoice_date.month + 1) if invoice_date.day <= 10 else invoice_date.replace(day=11, month=invoice_date.month + 2)
-        if gstr1_deadline < datetime.now():
-            gstr1_deadline = gstr1_deadline.replace(year=gstr1_deadline.year + 1)
-        print(f"Reminder: File GSTR-1 by {gstr1_deadline.strftime('%d-%m-%Y')} for invoice {invoice_data.get('invoice_no', '')}!")
-
-    def remind_gstr3b():
-        gstr3b_deadline = invoice_date.replace(day=20, month=invoice_date.month + 1) if invoice_date.day <= 20 else invoice_date.replace(day=20, month=invoice_date.month + 2)
-        if gstr3b_deadline < datetime.now():
-            gstr3b_deadline = gstr3b_deadline.replace(year=gstr3b_deadline.year + 1)
-        print(f"Reminder: File GSTR-3B by {gstr3b_deadline.strftime('%d-%m-%Y')} for invoice {invoice_data.get('invoice_no', '')}!")
-
-    # Schedule daily reminders at 9:00 AM
-    schedule.every().day.at("09:00").do(remind_gstr1)
-    schedule.every().day.at("09:00").do(remind_gstr3b)
-
-    # Filing checklist
-    checklist = [
-        "Verify extracted invoice data",
-        "Generate JSON/Excel files",
-        "Calculate deductions and tax liability",
-        "Validate data for errors",
-        "Upload to GST portal",
-        "Confirm filing deadlines"
-    ]
-    print("Filing Checklist:")
-    for item in checklist:
-        print(f"- {item}")
-
-    # Run scheduler for 10 seconds to demonstrate
-    print("\nRunning scheduler for 10 seconds...")
-    end_time = time.time() + 10
-    while time.time() < end_time:
-        schedule.run_pending()
-        time.sleep(1)
+
+    def __init__(self, reminder_time="09:00", poll_interval=30):
+        self.scheduler = schedule.Scheduler()
+        self.poll_interval = poll_interval
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.scheduler.every().day.at(reminder_time).do(self.send_due_reminders)
+
+    def register(self, invoice_data):
+        """
+        Add the filing deadlines for this invoice's GSTIN and period. Returns the deadline entries.
+        """
+        invoice_date = datetime.strptime(invoice_data.get("date", ""), "%d-%m-%Y")
+        gstin = invoice_data.get("customer_gstin") or ""
+        period = invoice_date.strftime("%m%Y")
+        entries = []
+        with self._lock:
+            for return_type, deadline in filing_deadlines(invoice_date).items():
+                key = (gstin, period, return_type)
+                entry = self._deadlines.get(key)
+                if entry is None:
+                    entry = {"gstin": gstin, "period": period, "return_type": return_type, "deadline": deadline, "invoices": set()}
+                    self._deadlines[key] = entry
+                entry["invoices"].add(invoice_data.get("invoice_no", ""))
+                entries.append(entry)
+        return [self._public(entry) for entry in entries]
+
+    @staticmethod
+    def _public(entry):
+        return dict(entry, deadline=entry["deadline"].strftime("%d-%m-%Y"), invoices=sorted(entry["invoices"]))
+
+    def deadlines(self):
+        with self._lock:
+            entries = sorted(self._deadlines.values(), key=lambda entry: (entry["deadline"], entry["gstin"], entry["return_type"]))
+            return [self._public(entry) for entry in entries]
+
+    def send_due_reminders(self, now=None):
+        now = now or datetime.now()
+        with self._lock:
+            for key in [key for key, entry in self._deadlines.items() if entry["deadline"] < now - OVERDUE_RETENTION]:
+                del self._deadlines[key]
+            entries = sorted(self._deadlines.values(), key=lambda entry: entry["deadline"])
+            for entry in entries:
+                status = "OVERDUE" if entry["deadline"].date() < now.date() else "due"
+                logger.info("Reminder: %s for period %s (GSTIN %s) %s by %s covering %d invoice(s)!",
+                            entry['return_type'], entry['period'], entry['gstin'] or 'n/a', status,
+                            entry['deadline'].strftime('%d-%m-%Y'), len(entry['invoices']))
+        return len(entries)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.scheduler.run_pending()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="filing-reminders", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+reminder_service = ReminderService()
+
+def setup_enhanced_reminders(invoice_data, service=None):
+    """
+    Register GSTR-1 and GSTR-3B deadlines for the invoice's filing period with the reminder service.
+    Returns immediately; reminders are delivered by the service's background thread.
+    """
+    service = service or reminder_service
+    try:
+        deadlines = service.register(invoice_data)
+    except ValueError:
+        logger.info("Skipping reminders for invoice %s: missing or invalid date.", invoice_data.get('invoice_no', ''))
+        return []
+    service.start()
+
+    logger.debug("Filing Checklist:\n%s", FILING_CHECKLIST_TEXT)
+    return deadlines
 
 # Example usage
 if __name__ == "__main__":
@@ -53,4 +128,5 @@ if __name__ == "__main__":
         "date": "26-02-2025",
         "customer_gstin": "22AAAAA0000A1Z5"
     }
-    setup_enhanced_reminders(sample_invoice)
\ No newline at end of file
+    print("Deadlines:", setup_enhanced_reminders(sample_invoice))
+    reminder_service.send_due_reminders()
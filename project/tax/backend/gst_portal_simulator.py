@@ -1,30 +1,168 @@
 import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 
-def simulate_gst_upload(gst_json, api_endpoint="http://mock-gst-portal.com/api/gstr1"):
+# Defaults to the bundled mock portal (python mock_portal.py) so offline runs fail fast
+DEFAULT_ENDPOINT = os.environ.get("GST_PORTAL_URL", "http://127.0.0.1:5001/api/gstr1")
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Payload field naming the upload; a payload carrying it is sent with an Idempotency-Key
+# header, so the portal can drop a repeat and a read timeout is safe to retry
+IDEMPOTENCY_FIELD = "idempotency_key"
+
+class UploadOutcomeUnknown(requests.ReadTimeout):
     """
-    Simulate uploading GSTR-1 JSON to a mock GST portal or validate it.
-    Returns a response indicating success or validation errors.
+    The request reached the portal but no response came back, so the upload may or may not
+    have been filed. Check the portal before uploading the same invoices again.
+    """
+
+def validate_gstr1(gst_json):
+    """
+    Mock validation of GSTR-1 JSON (simplified). Returns an error message or None.
     """
-    try:
-        # Mock validation of GSTR-1 JSON (simplified)
-        required_fields = ["gstin", "fp", "b2b"]
-        for field in required_fields:
-            if field not in gst_json:
-                return {"status": "error", "message": f"Missing required field: {field}"}
+    required_fields = ["gstin", "fp", "b2b"]
+    for field in required_fields:
+        if field not in gst_json:
+            return f"Missing required field: {field}"
+    if not gst_json["b2b"] or not gst_json["b2b"][0]["inv"]:
+        return "No invoices in b2b data"
+    return None
+
+class GSTPortalClient:
+    """
+    GSTR-1 upload client with a keep-alive connection pool, bounded concurrency and
+    exponential backoff with full jitter on connection failures, 429 and 5xx responses.
+    A read timeout is retried only for payloads with an idempotency key; otherwise the
+    request may already have been filed, and it raises UploadOutcomeUnknown instead.
+    submit_batch() coalesces many invoices into one payload per GSTIN and filing period,
+    so bulk uploads cost a few round-trips in total.
+    """
+
+    def __init__(self, api_endpoint=DEFAULT_ENDPOINT, pool_size=10, max_concurrency=4, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, timeout=10):
+        self.api_endpoint = api_endpoint
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post(self, payload):
+        idempotency_key = payload.get(IDEMPOTENCY_FIELD)
+        headers = {"Idempotency-Key": str(idempotency_key)} if idempotency_key else None
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self.session.post(self.api_endpoint, json=payload, headers=headers, timeout=self.timeout)
+                except requests.ReadTimeout as e:
+                    if not idempotency_key:
+                        raise UploadOutcomeUnknown(f"No response from the GST portal; the upload may have been filed: {e}") from e
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(self._backoff(attempt))
+                    continue
+                except requests.ConnectionError:
+                    # Refused connections, DNS failures and connect timeouts never reached the
+                    # portal, so sending again cannot file the upload twice
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(self._backoff(attempt))
+                    continue
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                    continue
+                response.raise_for_status()
+                return response.json()
 
-        if not gst_json["b2b"] or not gst_json["b2b"][0]["inv"]:
-            return {"status": "error", "message": "No invoices in b2b data"}
+    def upload(self, gst_json):
+        """
+        Upload one GSTR-1 document. Returns a response indicating success or validation errors.
+        """
+        try:
+            error = validate_gstr1(gst_json)
+            if error:
+                return {"status": "error", "message": error}
+            data = self._post(gst_json)
+            return {"status": "success", "message": "GSTR-1 uploaded successfully (mock)", "data": data}
+        except UploadOutcomeUnknown as e:
+            return {"status": "unknown", "message": str(e)}
+        except requests.RequestException as e:
+            return {"status": "error", "message": f"API error: {str(e)}"}
+        except Exception as e:
+            return {"status": "error", "message": f"Validation error: {str(e)}"}
 
-        # Mock API call (replace with actual GST portal API if available)
-        response = requests.post(api_endpoint, json=gst_json, timeout=10)
-        response.raise_for_status()
-        return {"status": "success", "message": "GSTR-1 uploaded successfully (mock)", "data": response.json()}
-    
-    except requests.RequestException as e:
-        return {"status": "error", "message": f"API error: {str(e)}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Validation error: {str(e)}"}
+    @staticmethod
+    def coalesce(gst_jsons):
+        """
+        Merge to_gst_json documents into one document per (gstin, fp), preserving invoice order.
+        """
+        merged = {}
+        for gst_json in gst_jsons:
+            key = (gst_json.get("gstin", ""), gst_json.get("fp", ""))
+            document = merged.setdefault(key, {"gstin": key[0], "fp": key[1], "b2b": [{"inv": []}]})
+            for b2b in gst_json.get("b2b", []):
+                document["b2b"][0]["inv"].extend(b2b.get("inv", []))
+        return list(merged.values())
+
+    def submit_batch(self, gst_jsons, batch_size=500):
+        """
+        Coalesce invoices per GSTIN/period and upload them in payloads of at most batch_size
+        invoices, up to max_concurrency at a time. Returns one result per payload.
+        """
+        payloads = []
+        for document in self.coalesce(gst_jsons):
+            invoices = document["b2b"][0]["inv"]
+            for start in range(0, len(invoices), batch_size):
+                payloads.append(dict(document, b2b=[{"inv": invoices[start:start + batch_size]}]))
+        if not payloads:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(payloads))) as pool:
+            responses = list(pool.map(self.upload, payloads))
+        return [
+            dict(response, gstin=payload["gstin"], fp=payload["fp"], invoices=len(payload["b2b"][0]["inv"]))
+            for payload, response in zip(payloads, responses)
+        ]
+
+    def close(self):
+        self.session.close()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_portal_client(api_endpoint=None):
+    """
+    Shared client per endpoint, so uploads reuse pooled keep-alive connections.
+    """
+    api_endpoint = api_endpoint or DEFAULT_ENDPOINT
+    with _clients_lock:
+        if api_endpoint not in _clients:
+            _clients[api_endpoint] = GSTPortalClient(api_endpoint)
+        return _clients[api_endpoint]
+
+def simulate_gst_upload(gst_json, api_endpoint=None, client=None):
+    """
+    Simulate uploading GSTR-1 JSON to a mock GST portal or validate it.
+    Returns a response indicating success or validation errors.
+    """
+    return (client or get_portal_client(api_endpoint)).upload(gst_json)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import sys
+import threading
+
+JOURNAL_FILE = os.environ.get("GSTR1_JOURNAL", "gst_data.jsonl")
+
+logger = logging.getLogger(__name__)
+
+class GSTR1Journal:
+    """
+    Append-only JSONL journal of GSTR-1 B2B invoices.
+    Each line holds one invoice entry together with its gstin and filing period, so
+    adding an invoice is a single appended line. The portal-format document is only
+    materialised by export(), which streams the journal in one pass.
+    Like the ledger, an invoice is journalled once per (invoice number, date): append
+    skips invoices already in the journal, and reading skips any repeat that another
+    process wrote, so the first entry wins.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        # Keys of the invoices in the journal, read up to _keys_offset bytes
+        self._keys = set()
+        self._keys_offset = 0
+
+    @staticmethod
+    def _entries_from(gst_json):
+        for b2b in gst_json.get("b2b", []):
+            for inv in b2b.get("inv", []):
+                yield {"gstin": gst_json.get("gstin", ""), "fp": gst_json.get("fp", ""), "inv": inv}
+
+    @staticmethod
+    def _key(entry):
+        # Invoices without a number are never treated as duplicates, as in the ledger
+        inv = entry["inv"]
+        return (inv.get("inum"), inv.get("idt")) if inv.get("inum") else None
+
+    def _sync_keys(self):
+        # Read only what was appended since the last call, including other processes' writes
+        if not os.path.exists(self.path):
+            self._keys, self._keys_offset = set(), 0
+            return
+        if os.path.getsize(self.path) < self._keys_offset:
+            self._keys, self._keys_offset = set(), 0
+        with open(self.path, "rb") as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._keys_offset += len(line)
+                key = self._key(json.loads(line)) if line.strip() else None
+                if key is not None:
+                    self._keys.add(key)
+
+    def append(self, gst_json):
+        return self.append_many([gst_json])
+
+    def append_many(self, gst_jsons):
+        """
+        Journal every invoice in the given to_gst_json documents. Returns the number of invoices written.
+        """
+        entries = [entry for gst_json in gst_jsons for entry in self._entries_from(gst_json)]
+        if not entries:
+            return 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._sync_keys()
+            lines = []
+            for entry in entries:
+                key = self._key(entry)
+                if key is not None:
+                    if key in self._keys:
+                        continue
+                    self._keys.add(key)
+                lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+            if lines:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    f.flush()
+        return len(lines)
+
+    def iter_entries(self, gstin=None, fp=None):
+        if not os.path.exists(self.path):
+            return
+        seen = set()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                key = self._key(entry)
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                if gstin is not None and entry["gstin"] != gstin:
+                    continue
+                if fp is not None and entry["fp"] != fp:
+                    continue
+                yield entry
+
+    def count(self, gstin=None, fp=None):
+        return sum(1 for _ in self.iter_entries(gstin, fp))
+
+    def export(self, filename="gst_data.json", gstin=None, fp=None):
+        """
+        Write the GSTR-1 JSON for one gstin/period. Without filters the gstin and period
+        of the first journalled invoice are used. Returns the number of invoices exported.
+        """
+        tmp_path = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for entry in self.iter_entries(gstin, fp):
+                if count and (entry["gstin"] != gstin or entry["fp"] != fp):
+                    continue
+                if count == 0:
+                    gstin, fp = entry["gstin"], entry["fp"]
+                    out.write(f'{{"gstin": {json.dumps(gstin)}, "fp": {json.dumps(fp)}, "b2b": [{{"inv": [\n')
+                else:
+                    out.write(",\n")
+                out.write("  " + json.dumps(entry["inv"]))
+                count += 1
+            if count == 0:
+                out.write(json.dumps({"gstin": gstin or "", "fp": fp or "", "b2b": []}))
+            else:
+                out.write("\n]}]}\n")
+        os.replace(tmp_path, filename)
+        logger.info("Exported %d invoice(s) to %s", count, filename)
+        return count
+
+    def import_json(self, filename="gst_data.json"):
+        """
+        Journal the invoices of an existing gst_data.json document.
+        """
+        with open(filename, "r", encoding="utf-8") as f:
+            return self.append(json.load(f))
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+def get_journal(path=None):
+    path = path or JOURNAL_FILE
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = GSTR1Journal(path)
+        return _journals[path]
+
+# Example usage:
+#   python -m backend.gstr1_journal export gst_data.json [gstin] [fp]
+#   python -m backend.gstr1_journal import gst_data.json
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "import"):
+        print("Usage: python -m backend.gstr1_journal export|import [gst_data.json] [gstin] [fp]")
+        sys.exit(1)
+    json_file = sys.argv[2] if len(sys.argv) > 2 else "gst_data.json"
+    journal = get_journal()
+    if sys.argv[1] == "export":
+        journal.export(json_file, gstin=sys.argv[3] if len(sys.argv) > 3 else None, fp=sys.argv[4] if len(sys.argv) > 4 else None)
+    else:
+        print(f"Imported {journal.import_json(json_file)} invoice(s) from {json_file}")
@@ -0,0 +1,229 @@
+import bisect
+import csv
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+
+# Offline HSN/SAC master table, e.g. exported from the CBIC rate schedule. Columns (any case,
+# spaces and "/" read as "_"):
+#   code (or hsn, sac, hsn_code, sac_code), rate (or gst_rate, igst_rate) in percent,
+#   description (optional), itc_eligible (optional yes/no, default yes)
+MASTER_CSV = os.environ.get("HSN_MASTER_CSV", os.path.join("TaxAssistant", "hsn_master.csv"))
+# Compiled index, rebuilt from MASTER_CSV whenever the CSV is newer
+MASTER_INDEX = os.environ.get("HSN_MASTER_INDEX", os.path.join("TaxAssistant", "hsn_master.idx"))
+
+CODE_ALIASES = ("code", "hsn", "sac", "hsn_code", "sac_code", "hsn_sac", "hsn_sac_code")
+RATE_ALIASES = ("rate", "gst_rate", "igst_rate", "rate_%", "gst_rate_%")
+DESCRIPTION_ALIASES = ("description", "desc", "item", "service")
+ITC_ALIASES = ("itc_eligible", "itc")
+
+# Index layout: header, fixed-width records sorted by code, then the description bytes.
+# Codes are ASCII digits, NUL-padded to 8 bytes, so byte order is string order and a
+# bisect over the mapped records finds a code in O(log n) without reading the rest.
+MAGIC = b"HSNIDX01"
+HEADER = struct.Struct("<8sI")  # magic, record count
+# code, rate in basis points, flags, unused, description offset, description length
+RECORD = struct.Struct("<8sHBxIH")
+FLAG_ITC_ELIGIBLE = 1
+CODE_WIDTH = 8
+MIN_PREFIX = 2  # HSN chapter
+
+logger = logging.getLogger(__name__)
+
+HSN_CODE = re.compile(r"\b(?:HSN|SAC)(?:\s*/\s*SAC)?(?:\s*Code)?\s*[:\-]?\s*(\d{4,8})\b", re.IGNORECASE)
+
+def normalise_code(code):
+    """
+    Digits of an HSN/SAC code ("9401.30" -> "940130"), or "" if it is not 2-8 digits long.
+    """
+    digits = re.sub(r"\D", "", str(code))
+    return digits if MIN_PREFIX <= len(digits) <= CODE_WIDTH else ""
+
+def codes_in_text(text):
+    """
+    HSN/SAC codes quoted in invoice text, normalised, in order of appearance.
+    """
+    return [normalise_code(code) for code in HSN_CODE.findall(text or "")]
+
+def _column(header, aliases):
+    lookup = {re.sub(r"[\s/]+", "_", name.strip().lower()): index for index, name in enumerate(header)}
+    return next((lookup[alias] for alias in aliases if alias in lookup), None)
+
+def _yes(value):
+    return str(value).strip().lower() not in ("no", "n", "false", "0", "blocked")
+
+def read_master_csv(csv_path):
+    """
+    Rows of the master CSV as {code: (rate, itc_eligible, description)}. Later rows for the
+    same code replace earlier ones; rows without a usable code or rate are skipped.
+    """
+    entries = {}
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        code_col = _column(header, CODE_ALIASES)
+        rate_col = _column(header, RATE_ALIASES)
+        if code_col is None or rate_col is None:
+            raise ValueError(f"{csv_path}: HSN master needs a code and a rate column")
+        desc_col = _column(header, DESCRIPTION_ALIASES)
+        itc_col = _column(header, ITC_ALIASES)
+        for row in reader:
+            if len(row) <= max(code_col, rate_col):
+                continue
+            code = normalise_code(row[code_col])
+            try:
+                rate = float(row[rate_col].strip().rstrip("%"))
+            except ValueError:
+                continue
+            if not code:
+                continue
+            description = row[desc_col].strip() if desc_col is not None and desc_col < len(row) else ""
+            itc_eligible = _yes(row[itc_col]) if itc_col is not None and itc_col < len(row) else True
+            entries[code] = (rate, itc_eligible, description)
+    return entries
+
+def build_index(csv_path=MASTER_CSV, index_path=MASTER_INDEX):
+    """
+    Compile the master CSV into the binary index. Returns the number of codes written.
+    The file is written next to its destination and renamed into place, so processes
+    that already mapped the old index keep a consistent view.
+    """
+    entries = read_master_csv(csv_path)
+    records, descriptions, offset = [], [], 0
+    for code in sorted(entries):
+        rate, itc_eligible, description = entries[code]
+        text = description.encode("utf-8")[:0xFFFF]
+        records.append(RECORD.pack(code.encode("ascii"), int(round(rate * 100)),
+                                   FLAG_ITC_ELIGIBLE if itc_eligible else 0, offset, len(text)))
+        descriptions.append(text)
+        offset += len(text)
+
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records)))
+        f.writelines(records)
+        f.writelines(descriptions)
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+class _Codes:
+    # Read-only sequence of the record codes, so bisect can search the mapped file directly
+    def __init__(self, buffer, count):
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start = HEADER.size + index * RECORD.size
+        return self.buffer[start:start + CODE_WIDTH]
+
+class HSNMaster:
+    """
+    Read-only view of a compiled HSN/SAC index. The file is memory-mapped, so lookups only
+    touch the pages bisect visits, and every worker process mapping the same index shares
+    one copy in the OS page cache.
+    """
+
+    def __init__(self, index_path=MASTER_INDEX):
+        self.index_path = index_path
+        with open(index_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{index_path} is not an HSN master index")
+        self._codes = _Codes(self._map, self.count)
+        self._descriptions = HEADER.size + self.count * RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, index):
+        code, rate, flags, offset, length = RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+        start = self._descriptions + offset
+        return {
+            "code": code.rstrip(b"\0").decode("ascii"),
+            "rate": rate / 100,
+            "itc_eligible": bool(flags & FLAG_ITC_ELIGIBLE),
+            "description": self._map[start:start + length].decode("utf-8")
+        }
+
+    def _find(self, code):
+        key = code.encode("ascii").ljust(CODE_WIDTH, b"\0")
+        index = bisect.bisect_left(self._codes, key)
+        return index if index < self.count and self._codes[index] == key else None
+
+    def lookup(self, code):
+        """
+        Entry for the longest listed prefix of code (an 8-digit HSN falls back to its
+        6-digit subheading, 4-digit heading, then chapter), or None.
+        Entries are {"code", "rate", "itc_eligible", "description"}.
+        """
+        code = normalise_code(code)
+        for length in range(len(code), MIN_PREFIX - 1, -1):
+            index = self._find(code[:length])
+            if index is not None:
+                return self._entry(index)
+        return None
+
+    def rate_for(self, code):
+        entry = self.lookup(code)
+        return entry["rate"] if entry else None
+
+    def close(self):
+        self._map.close()
+
+def _index_is_stale(csv_path, index_path):
+    if not os.path.exists(index_path):
+        return True
+    return os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(index_path)
+
+_master = None
+_master_loaded = False
+_master_lock = threading.Lock()
+
+def get_hsn_master():
+    """
+    The process-wide HSNMaster, opened on first use (compiling MASTER_CSV first when the
+    index is missing or out of date). None when no master table is available.
+    """
+    global _master, _master_loaded
+    with _master_lock:
+        if not _master_loaded:
+            _master_loaded = True
+            try:
+                if _index_is_stale(MASTER_CSV, MASTER_INDEX) and os.path.exists(MASTER_CSV):
+                    logger.info("Compiled %d HSN/SAC codes into %s", build_index(MASTER_CSV, MASTER_INDEX), MASTER_INDEX)
+                if os.path.exists(MASTER_INDEX):
+                    _master = HSNMaster(MASTER_INDEX)
+            except (OSError, ValueError) as e:
+                logger.warning("HSN master unavailable: %s", e)
+        return _master
+
+# Example usage:
+#   python -m backend.hsn_master build [hsn_master.csv] [hsn_master.idx]
+#   python -m backend.hsn_master lookup 940130 998314
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        csv_path = sys.argv[2] if len(sys.argv) > 2 else MASTER_CSV
+        index_path = sys.argv[3] if len(sys.argv) > 3 else MASTER_INDEX
+        print(f"Compiled {build_index(csv_path, index_path)} HSN/SAC codes into {index_path}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "lookup":
+        master = get_hsn_master()
+        if master is None:
+            print(f"No HSN master index at {MASTER_INDEX}; build it from {MASTER_CSV} first.")
+            sys.exit(1)
+        for code in sys.argv[2:]:
+            print(code, master.lookup(code))
+    else:
+        print("Usage: python -m backend.hsn_master build [csv] [index] | lookup <code> [<code> ...]")
+        sys.exit(1)
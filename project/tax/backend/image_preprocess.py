@@ -0,0 +1,142 @@
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# Tesseract is most accurate around 300 DPI; larger images only cost time
+TARGET_DPI = int(os.environ.get("OCR_TARGET_DPI", "300"))
+# Longest side allowed when the image carries no DPI metadata (A4 at 300 DPI)
+MAX_SIDE = int(os.environ.get("OCR_MAX_SIDE", "3508"))
+# Deskew search range and step, in degrees
+MAX_SKEW = 5.0
+SKEW_STEP = 0.25
+# Skew is estimated on at most this many pixels along the longest side
+SKEW_SAMPLE_SIDE = 1000
+# Rows/columns with less ink than this fraction of the page are treated as noise when cropping
+CROP_INK_FRACTION = 0.002
+CROP_MARGIN = 20
+
+def preprocessing_enabled():
+    # Off unless OCR_PREPROCESS=1: binarizing and cropping have not been shown to keep field
+    # accuracy on the benchmark corpus, so OCR sees the image as uploaded by default
+    return os.environ.get("OCR_PREPROCESS", "0").lower() in ("1", "true", "yes", "on")
+
+def _timed(timings, stage, start):
+    timings[stage] = round((time.perf_counter() - start) * 1000, 2)
+    return time.perf_counter()
+
+def downscale(image, target_dpi=TARGET_DPI, max_side=MAX_SIDE):
+    """
+    Shrink the image to target_dpi (from its DPI metadata) or to max_side pixels, and convert
+    it to grayscale. JPEGs are decoded straight to a reduced grayscale size via draft().
+    Returns (image, scale).
+    """
+    width, height = image.size
+    dpi = image.info.get("dpi", (0, 0))[0]
+    scale = target_dpi / dpi if dpi and dpi > target_dpi else 1.0
+    scale = min(scale, max_side / max(width, height))
+    if scale >= 1.0:
+        return (image if image.mode == "L" else image.convert("L")), 1.0
+
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    if image.format == "JPEG" and hasattr(image, "draft"):
+        image.draft("L", size)
+    if image.mode != "L":
+        image = image.convert("L")
+    if image.size != size:
+        image = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return image, scale
+
+def otsu_threshold(gray):
+    """
+    Otsu's threshold for a uint8 array, computed from its 256-bin histogram.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_bg[-1] - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    if not np.isfinite(variance).any():
+        return 128  # Single-colour image
+    return int(np.nanargmax(variance)) + 1
+
+def estimate_skew(ink, max_angle=MAX_SKEW, step=SKEW_STEP):
+    """
+    Rotation (degrees, counter-clockwise as in PIL's rotate) that levels the text rows: the
+    angle whose row projection of the ink pixels has the highest energy. Runs on a strided
+    view of the ink mask.
+    """
+    stride = max(1, max(ink.shape) // SKEW_SAMPLE_SIDE)
+    ys, xs = np.nonzero(ink[::stride, ::stride])
+    if len(ys) < 50:
+        return 0.0
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        theta = np.deg2rad(angle)
+        rows = np.rint(ys * np.cos(theta) - xs * np.sin(theta)).astype(np.int64)
+        profile = np.bincount(rows - rows.min())
+        score = float(np.dot(profile, profile))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def text_bounds(ink, margin=CROP_MARGIN, ink_fraction=CROP_INK_FRACTION):
+    """
+    (left, top, right, bottom) box around the rows and columns that carry ink, or None if blank.
+    """
+    height, width = ink.shape
+    rows = np.flatnonzero(np.count_nonzero(ink, axis=1) > max(1, width * ink_fraction))
+    cols = np.flatnonzero(np.count_nonzero(ink, axis=0) > max(1, height * ink_fraction))
+    if not len(rows) or not len(cols):
+        return None
+    return (max(0, int(cols[0]) - margin), max(0, int(rows[0]) - margin),
+            min(width, int(cols[-1]) + 1 + margin), min(height, int(rows[-1]) + 1 + margin))
+
+def preprocess_image(image, target_dpi=TARGET_DPI, binarize=True, deskew=True, crop=True):
+    """
+    Prepare a PIL image for Tesseract: downscale, grayscale, Otsu binarization, deskew and
+    crop to the text region. Analysis runs on a NumPy view of the grayscale pixels; the
+    output is produced with PIL point/crop/rotate so the full image is only copied once per stage.
+    Returns (image, info) where info holds the per-stage timings in milliseconds.
+    """
+    timings = {}
+    info = {"original_size": image.size, "timings_ms": timings}
+    start = time.perf_counter()
+
+    image, info["scale"] = downscale(image, target_dpi)
+    start = _timed(timings, "downscale", start)
+
+    gray = np.asarray(image)
+    threshold = otsu_threshold(gray)
+    ink = gray < threshold
+    info["threshold"] = threshold
+    start = _timed(timings, "threshold", start)
+
+    box = text_bounds(ink) if crop else None
+    if box is None:
+        box = (0, 0, image.width, image.height)
+    angle = estimate_skew(ink[box[1]:box[3], box[0]:box[2]]) if deskew else 0.0
+    info["skew_angle"] = angle
+    start = _timed(timings, "analyse", start)
+
+    if box != (0, 0, image.width, image.height):
+        image = image.crop(box)
+    info["crop_box"] = box
+    if binarize:
+        image = image.point(lambda value: 0 if value < threshold else 255)
+    start = _timed(timings, "binarize_crop", start)
+
+    if abs(angle) >= SKEW_STEP:
+        image = image.rotate(angle, resample=Image.BILINEAR if not binarize else Image.NEAREST,
+                             expand=True, fillcolor=255)
+    _timed(timings, "deskew", start)
+
+    info["size"] = image.size
+    timings["total"] = round(sum(timings.values()), 2)
+    return image, info
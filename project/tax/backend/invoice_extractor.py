@@ -0,0 +1,138 @@
+import re
+from datetime import datetime
+
+# All field patterns are compiled once at import. They are the patterns parse_invoice_data
+# has always used, so the extracted fields are unchanged.
+_AMOUNT = r"(\d+(?:,\d+)?(?:\.\d+)?)"
+_I = re.IGNORECASE
+
+INVOICE_NO = re.compile(r"\b([A-Z0-9]{8,12}-[A-Z0-9]{6}|\d{4}-\d{2})\b", _I)
+DATE = re.compile(r"(\d{1,2}-(?:\d{2}|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{2,4})", _I)
+DATE_ALT = re.compile(r"(\d{1,2}\s*(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s*\d{2,4})", _I)
+TAXABLE = re.compile(rf"Taxable\s*(?:Value)?\s*[:\-]?\s*{_AMOUNT}|Taxable\s*Value\s*{_AMOUNT}", _I)
+TAXABLE_ALT = re.compile(rf"Sub\s*Total\s*{_AMOUNT}", _I)
+IGST_RATE = re.compile(r"IGST\s*(\d+)%", _I)
+CGST_RATE = re.compile(r"CGST\s*(\d+)%|\b\d+\s*(?:%|%)\s*Amt\s*\d+\b", _I)
+CGST_RATE_ALT = re.compile(r"CGST@(\d+(?:\.\d+)?)%", _I)
+SGST_RATE = re.compile(r"SGST\s*(\d+)%|\b\d+\s*(?:%|%)\s*Amt\s*\d+\b", _I)
+SGST_RATE_ALT = re.compile(r"[SC]GST@(\d+(?:\.\d+)?)%", _I)
+IGST_AMOUNT = re.compile(rf"(?:IGST|iesr|YsiT)\s*[^\d]*{_AMOUNT}|IGST\s*Amt\s*{_AMOUNT}", _I)
+TOTAL = re.compile(rf"(?:YsiT\s*Exe\s*Tie|\bTotal\b|\|=)\s*{_AMOUNT}|Total\s*Payable\s*{_AMOUNT}", _I)
+TOTAL_ALT = re.compile(rf"Grand\s*Total\s*[:\-]?\s*Rs\.\s*{_AMOUNT}|Total\s*Rs\.\s*{_AMOUNT}", _I)
+# "[SC]GST@rate% amount": one scan yields both the CGST lines (leading C) and the SGST
+# lines (leading S)
+GST_LINE = re.compile(rf"([SC])GST@(\d+(?:\.\d+)?)%\s*{_AMOUNT}", _I)
+
+# Date formats tried in order; the first two are the historical ones
+DATE_FORMATS = ("%d-%m-%y", "%d%b%Y", "%d-%m-%Y", "%d-%b-%Y", "%d-%b-%y", "%d%b%y")
+
+def _search_if(pattern, text, present):
+    # Skip the regex entirely when none of its literal keywords occur in the text
+    return pattern.search(text) if present else None
+
+def _first_group(match):
+    return next((group for group in match.groups() if group), None)
+
+def _to_float(value):
+    return float(value.replace(",", ""))
+
+def _parse_date(raw_date):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw_date, fmt).strftime("%d-%m-%Y")
+        except ValueError:
+            continue
+    return None
+
+def _rate(match, fallback):
+    # Rate captured by the pattern, else the lazily computed fallback (also used when
+    # the match came from an alternative without a rate group)
+    value = match.group(1) if match else None
+    return int(float(value)) if value else fallback()
+
+def extract_invoice_fields(text):
+    """
+    Extract GST fields from OCR text and return the same field dict as parse_invoice_data.
+    The text is upper-cased once to decide which patterns can match at all, and every
+    pattern runs from its precompiled form.
+    """
+    data = {}
+    upper = text.upper()
+    has_cgst = "CGST" in upper
+    has_sgst = "SGST" in upper
+    has_igst = "IGST" in upper
+    has_amt = "AMT" in upper
+    has_total = "TOTAL" in upper
+    has_gst_at = "GST@" in upper
+
+    invoice_no = INVOICE_NO.search(text)
+    date = DATE.search(text) or DATE_ALT.search(text)
+    taxable_amount = None
+    if "TAXABLE" in upper:
+        taxable_amount = TAXABLE.search(text)
+    if not taxable_amount and has_total and "SUB" in upper:
+        taxable_amount = TAXABLE_ALT.search(text)
+    igst_rate = _search_if(IGST_RATE, text, has_igst)
+    cgst_rate = _search_if(CGST_RATE, text, has_cgst or has_amt) or _search_if(CGST_RATE_ALT, text, has_cgst)
+    sgst_rate = _search_if(SGST_RATE, text, has_sgst or has_amt) or _search_if(SGST_RATE_ALT, text, has_gst_at)
+    igst_amount = _search_if(IGST_AMOUNT, text, has_igst or "IESR" in upper or "YSIT" in upper)
+    total_amount = _search_if(TOTAL_ALT, text, has_total and "RS." in upper) \
+        or _search_if(TOTAL, text, has_total or "|=" in text or "YSIT" in upper)
+
+    if invoice_no:
+        data["invoice_no"] = invoice_no.group(1)
+    if date:
+        raw_date = date.group(1).replace("Doc", "Dec").replace(" ", "")
+        parsed_date = _parse_date(raw_date)
+        if parsed_date:
+            data["date"] = parsed_date
+    if total_amount:
+        data["total_amount"] = _to_float(_first_group(total_amount))
+    if taxable_amount:
+        data["taxable_value"] = _to_float(_first_group(taxable_amount))
+
+    if igst_amount:
+        data["igst_amount"] = _to_float(_first_group(igst_amount))
+
+    # Multiple rates and amounts, collected from a single scan over the GST lines
+    data["tax_details"] = {"cgst": [], "sgst": [], "igst": []}
+    if has_gst_at:
+        for head, rate, amount in GST_LINE.findall(text):
+            item = {"rate": float(rate), "amount": _to_float(amount)}
+            data["tax_details"]["cgst" if head in "Cc" else "sgst"].append(item)
+    if data["tax_details"]["cgst"]:
+        data["cgst_amount"] = sum(item["amount"] for item in data["tax_details"]["cgst"])
+        data["cgst_rate"] = data["tax_details"]["cgst"][0]["rate"]
+    if data["tax_details"]["sgst"]:
+        data["sgst_amount"] = sum(item["amount"] for item in data["tax_details"]["sgst"])
+        data["sgst_rate"] = data["tax_details"]["sgst"][0]["rate"]
+
+    if "total_amount" in data:
+        if "igst_amount" in data and "taxable_value" not in data:
+            data["taxable_value"] = data["total_amount"] - data["igst_amount"]
+        elif "cgst_amount" in data and "sgst_amount" in data and "taxable_value" not in data:
+            data["taxable_value"] = data["total_amount"] - (data["cgst_amount"] + data["sgst_amount"])
+
+    if "igst_amount" in data and "taxable_value" in data:
+        data["igst_rate"] = _rate(igst_rate, lambda: int((data["igst_amount"] / data["taxable_value"]) * 100 + 0.5))
+    elif "cgst_amount" in data and "sgst_amount" in data and "taxable_value" in data:
+        data["cgst_rate"] = _rate(cgst_rate, lambda: int((data["cgst_amount"] / data["taxable_value"]) * 100 + 0.5))
+        data["sgst_rate"] = _rate(sgst_rate, lambda: data["cgst_rate"])
+
+    if "total_amount" in data and "taxable_value" in data and not any(k in data for k in ["igst_amount", "cgst_amount", "sgst_amount"]):
+        tax_amount = data["total_amount"] - data["taxable_value"]
+        if has_igst:
+            data["igst_amount"] = tax_amount
+            data["igst_rate"] = int((tax_amount / data["taxable_value"]) * 100 + 0.5)
+        elif has_cgst and has_sgst:
+            half_tax = tax_amount / 2
+            data["cgst_amount"] = half_tax
+            data["sgst_amount"] = half_tax
+            data["cgst_rate"] = int((half_tax / data["taxable_value"]) * 100 + 0.5)
+            data["sgst_rate"] = data["cgst_rate"]
+
+    data.setdefault("cgst_rate", 0)
+    data.setdefault("sgst_rate", 0)
+    data.setdefault("cgst_amount", 0.0)
+    data.setdefault("sgst_amount", 0.0)
+    return data
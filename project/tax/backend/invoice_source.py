@@ -0,0 +1,84 @@
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+# Uploads stay in memory up to this size, then roll over to an anonymous temporary file
+SPOOL_MAX_BYTES = int(os.environ.get("UPLOAD_SPOOL_MAX_BYTES", 16 * 1024 * 1024))
+# Where spilled uploads and PDFs handed to poppler are written
+TEMP_DIR = os.environ.get("UPLOAD_TMP_DIR") or None
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+def spool_upload(stream, max_size=SPOOL_MAX_BYTES):
+    """
+    Copy an upload stream into a SpooledTemporaryFile owned by the caller, rewound to the
+    start. Small files never touch the disk; larger ones spill to a uniquely named temporary
+    file that disappears when the spool is closed.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size, dir=TEMP_DIR, prefix="upload_")
+    shutil.copyfileobj(stream, spool, 1024 * 1024)
+    spool.seek(0)
+    return spool
+
+def persist_upload(source, directory, suffix=""):
+    """
+    Write an in-memory or spooled upload to a uniquely named file in directory and return its
+    path. Unlike a spool, the file outlives the process, so the upload can be read after a restart.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload_", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            shutil.copyfileobj(open_binary(source), handle, 1024 * 1024)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+def open_binary(source):
+    """
+    Seekable binary file object for a path, bytes or file-like invoice, positioned at the start.
+    Paths are opened (the caller closes them); file-like sources are rewound and returned as is.
+    """
+    if is_path(source):
+        return open(source, "rb")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+def source_kind(source):
+    """
+    "pdf" or "image": by extension for paths, by the %PDF header for bytes and file objects.
+    """
+    if is_path(source):
+        return "pdf" if os.fspath(source).lower().endswith('.pdf') else "image"
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        head = bytes(source[:1024])
+    else:
+        source.seek(0)
+        head = source.read(1024)
+        source.seek(0)
+    # The header may follow a few bytes of junk, which readers tolerate
+    return "pdf" if b"%PDF" in head else "image"
+
+@contextmanager
+def source_on_disk(source, suffix=".pdf"):
+    """
+    Path for tools that only read files (poppler). A path is used as is; other sources are
+    written once to a uniquely named temporary file, removed on exit.
+    """
+    if is_path(source):
+        yield os.fspath(source)
+        return
+    handle = tempfile.NamedTemporaryFile(suffix=suffix, dir=TEMP_DIR, delete=False)
+    try:
+        with handle:
+            data = open_binary(source)
+            shutil.copyfileobj(data, handle, 1024 * 1024)
+        yield handle.name
+    finally:
+        os.remove(handle.name)
@@ -0,0 +1,218 @@
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Amounts agree when they differ by at most max(ABS_TOLERANCE, REL_TOLERANCE * amount)
+ABS_TOLERANCE = 1.0
+REL_TOLERANCE = 0.001
+
+STATUSES = ("matched", "amount_mismatch", "date_mismatch", "probable_match", "missing_in_2b", "missing_in_register")
+KEY = ["gstin_key", "invoice_key", "date_key"]
+AMOUNT_COLUMNS = ["taxable_value", "igst", "cgst", "sgst"]
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%m-%y", "%d/%m/%y", "%d-%b-%Y")
+
+# Purchase register columns are looked up under any of these names (case-insensitive)
+REGISTER_ALIASES = {
+    "supplier_gstin": ("supplier_gstin", "gstin", "ctin", "supplier gstin", "gstin of supplier"),
+    "supplier_name": ("supplier_name", "supplier", "trade_name", "trdnm", "supplier name"),
+    "invoice_no": ("invoice_no", "invoice number", "inum", "invoice_number", "bill_no"),
+    "date": ("date", "invoice_date", "idt", "dt", "invoice date"),
+    "taxable_value": ("taxable_value", "txval", "taxable value"),
+    "igst": ("igst", "igst_amount", "iamt"),
+    "cgst": ("cgst", "cgst_amount", "camt"),
+    "sgst": ("sgst", "sgst_amount", "samt")
+}
+
+def _pick_columns(frame):
+    lookup = {str(column).strip().lower(): column for column in frame.columns}
+    picked = {}
+    for name, aliases in REGISTER_ALIASES.items():
+        source = next((lookup[alias] for alias in aliases if alias in lookup), None)
+        if source is not None:
+            picked[name] = frame[source]
+        elif name in AMOUNT_COLUMNS:
+            picked[name] = 0.0
+        elif name == "supplier_name":
+            picked[name] = ""
+        else:
+            raise ValueError(f"Purchase register has no {name} column")
+    return pd.DataFrame(picked, index=frame.index)
+
+def load_purchase_register(source):
+    """
+    Purchase register as a DataFrame with the REGISTER_ALIASES columns, from a DataFrame,
+    a list of dicts, or an .xlsx/.csv/.json file.
+    """
+    if isinstance(source, pd.DataFrame):
+        frame = source
+    elif isinstance(source, (list, tuple)):
+        frame = pd.DataFrame.from_records(source)
+    elif str(source).lower().endswith((".xlsx", ".xls")):
+        frame = pd.read_excel(source)
+    elif str(source).lower().endswith(".json"):
+        with open(source, "r", encoding="utf-8") as f:
+            frame = pd.DataFrame.from_records(json.load(f))
+    else:
+        frame = pd.read_csv(source)
+    return _pick_columns(frame).reset_index(drop=True)
+
+def load_gstr2b(source):
+    """
+    Flatten a GSTR-2B JSON dump (data.docdata.b2b[].inv[]) into one row per invoice.
+    GSTR-1 style documents (b2b[].inv[].itms[].itm_det) are accepted as well.
+    source is a parsed dict or a path to the JSON file.
+    """
+    if not isinstance(source, dict):
+        with open(source, "r", encoding="utf-8") as f:
+            source = json.load(f)
+    data = source.get("data", source)
+    b2b = data.get("docdata", data).get("b2b", [])
+
+    columns = {name: [] for name in ("supplier_gstin", "supplier_name", "invoice_no", "date", "invoice_value", *AMOUNT_COLUMNS)}
+    for supplier in b2b:
+        gstin = supplier.get("ctin", source.get("gstin", ""))
+        name = supplier.get("trdnm", "")
+        for inv in supplier.get("inv", []):
+            if "itms" in inv:
+                details = [item.get("itm_det", item) for item in inv["itms"]]
+                amounts = [sum(d.get(field, 0.0) or 0.0 for d in details) for field in ("txval", "iamt", "camt", "samt")]
+            else:
+                amounts = [inv.get(field, 0.0) or 0.0 for field in ("txval", "igst", "cgst", "sgst")]
+            columns["supplier_gstin"].append(gstin)
+            columns["supplier_name"].append(name)
+            columns["invoice_no"].append(inv.get("inum", ""))
+            columns["date"].append(inv.get("dt", inv.get("idt", "")))
+            columns["invoice_value"].append(inv.get("val", 0.0))
+            for field, amount in zip(AMOUNT_COLUMNS, amounts):
+                columns[field].append(amount)
+    return pd.DataFrame(columns)
+
+def _parse_dates(values):
+    # Each format is tried over the whole column at once; dateutil's per-value guessing is
+    # far too slow at 100k rows
+    values = values.astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    return parsed
+
+def _normalise(frame):
+    # Join keys, computed column-wise: upper-case GSTIN, the invoice number reduced to its
+    # upper-case alphanumerics without leading zeros (so "inv/012" matches "INV-012" and
+    # "0012" matches "12"), and the date as a datetime64
+    frame = frame.copy()
+    frame["gstin_key"] = frame["supplier_gstin"].fillna("").astype(str).str.strip().str.upper()
+    frame["invoice_key"] = (frame["invoice_no"].fillna("").astype(str).str.upper()
+                            .str.replace(r"[^A-Z0-9]", "", regex=True).str.lstrip("0"))
+    dates = frame["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = _parse_dates(dates)
+    frame["date_key"] = dates.dt.normalize()
+    for column in AMOUNT_COLUMNS:
+        # Whole-number columns would stay int64, which merge_asof refuses to join with float64
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0.0).astype(float)
+    frame["tax_amount"] = frame["igst"] + frame["cgst"] + frame["sgst"]
+    return frame
+
+def _within_tolerance(left, right):
+    return np.abs(left - right) <= np.maximum(ABS_TOLERANCE, REL_TOLERANCE * np.abs(right))
+
+def _one_to_one_join(register, portal, keys):
+    # Hash join on keys; duplicate keys are paired by their occurrence order so each row is used once
+    left = register.assign(_n=register.groupby(keys, dropna=False).cumcount())
+    right = portal.assign(_n=portal.groupby(keys, dropna=False).cumcount())
+    return left[keys + ["_n", "reg_id"]].merge(right[keys + ["_n", "portal_id"]], on=keys + ["_n"], how="inner")
+
+def reconcile_itc(purchase_register, gstr2b):
+    """
+    Match the purchase register against supplier-filed GSTR-2B data.
+    Passes, each on rows left unmatched by the previous one:
+      1. hash join on (GSTIN, normalised invoice no, date), then amount check
+         -> matched / amount_mismatch
+      2. hash join on (GSTIN, normalised invoice no) -> date_mismatch
+      3. nearest-amount join per (GSTIN, date) within tolerance -> probable_match
+         (invoice number keyed differently on the two sides)
+    Leftovers are missing_in_2b (ITC at risk) or missing_in_register (not booked).
+    Returns (results DataFrame, summary dict).
+    """
+    register = _normalise(load_purchase_register(purchase_register))
+    portal = _normalise(gstr2b if isinstance(gstr2b, pd.DataFrame) else load_gstr2b(gstr2b))
+    register["reg_id"] = np.arange(len(register))
+    portal["portal_id"] = np.arange(len(portal))
+
+    # Blank invoice numbers carry no identity; such rows can only pair up by amount (pass 3)
+    numbered_reg = register[register["invoice_key"] != ""]
+    numbered_portal = portal[portal["invoice_key"] != ""]
+    pairs = []
+    exact = _one_to_one_join(numbered_reg, numbered_portal, KEY)
+    exact["status"] = "matched"
+    pairs.append(exact[["reg_id", "portal_id", "status"]])
+
+    unmatched_reg = register[~register["reg_id"].isin(exact["reg_id"])]
+    unmatched_portal = portal[~portal["portal_id"].isin(exact["portal_id"])]
+    by_number = _one_to_one_join(unmatched_reg[unmatched_reg["invoice_key"] != ""],
+                                 unmatched_portal[unmatched_portal["invoice_key"] != ""], ["gstin_key", "invoice_key"])
+    by_number["status"] = "date_mismatch"
+    pairs.append(by_number[["reg_id", "portal_id", "status"]])
+
+    unmatched_reg = unmatched_reg[~unmatched_reg["reg_id"].isin(by_number["reg_id"])]
+    unmatched_portal = unmatched_portal[~unmatched_portal["portal_id"].isin(by_number["portal_id"])]
+    if len(unmatched_reg) and len(unmatched_portal):
+        left = unmatched_reg[["gstin_key", "date_key", "taxable_value", "reg_id"]].dropna(subset=["date_key"]).sort_values("taxable_value")
+        right = unmatched_portal[["gstin_key", "date_key", "taxable_value", "portal_id"]].dropna(subset=["date_key"]) \
+            .rename(columns={"taxable_value": "portal_taxable"}).sort_values("portal_taxable")
+        nearest = pd.merge_asof(left, right, left_on="taxable_value", right_on="portal_taxable",
+                                by=["gstin_key", "date_key"], direction="nearest").dropna(subset=["portal_id"])
+        nearest = nearest[_within_tolerance(nearest["taxable_value"], nearest["portal_taxable"])]
+        # Several purchases may pick the same portal invoice; keep the closest one
+        nearest = nearest.assign(_diff=(nearest["taxable_value"] - nearest["portal_taxable"]).abs()) \
+            .sort_values("_diff").drop_duplicates("portal_id")
+        nearest["portal_id"] = nearest["portal_id"].astype(np.int64)
+        nearest["status"] = "probable_match"
+        pairs.append(nearest[["reg_id", "portal_id", "status"]])
+
+    pairs = pd.concat(pairs, ignore_index=True)
+    reg_cols = ["reg_id", "supplier_gstin", "supplier_name", "invoice_no", "date_key", "taxable_value", "tax_amount"]
+    portal_cols = ["portal_id", "supplier_gstin", "supplier_name", "invoice_no", "date_key", "taxable_value", "tax_amount"]
+    left = register[reg_cols].rename(columns=lambda c: c if c == "reg_id" else f"register_{c}")
+    right = portal[portal_cols].rename(columns=lambda c: c if c == "portal_id" else f"gstr2b_{c}")
+
+    results = pairs.merge(left, on="reg_id", how="left").merge(right, on="portal_id", how="left")
+    amounts_agree = _within_tolerance(results["register_taxable_value"], results["gstr2b_taxable_value"]) \
+        & _within_tolerance(results["register_tax_amount"], results["gstr2b_tax_amount"])
+    results.loc[(results["status"] == "matched") & ~amounts_agree, "status"] = "amount_mismatch"
+
+    missing_2b = left[~left["reg_id"].isin(pairs["reg_id"])].assign(status="missing_in_2b")
+    missing_register = right[~right["portal_id"].isin(pairs["portal_id"])].assign(status="missing_in_register")
+    results = pd.concat([results, missing_2b, missing_register], ignore_index=True)
+    results["tax_difference"] = results["register_tax_amount"].fillna(0.0) - results["gstr2b_tax_amount"].fillna(0.0)
+    for column in ("register_date_key", "gstr2b_date_key"):
+        results[column.replace("_key", "")] = results.pop(column).dt.strftime("%d-%m-%Y")
+    results = results.drop(columns=["reg_id", "portal_id"])
+
+    counts = results["status"].value_counts()
+    matched = results["status"] == "matched"
+    summary = {
+        "register_invoices": len(register),
+        "gstr2b_invoices": len(portal),
+        "counts": {status: int(counts.get(status, 0)) for status in STATUSES},
+        "itc_available": round(float(results.loc[matched, "gstr2b_tax_amount"].sum()), 2),
+        "itc_at_risk": round(float(results.loc[~matched, "register_tax_amount"].fillna(0.0).sum()), 2)
+    }
+    return results, summary
+
+# Example usage: python -m backend.itc_reconciliation purchase_register.xlsx gstr2b.json [mismatches.xlsx]
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m backend.itc_reconciliation <purchase_register> <gstr2b.json> [output.xlsx]")
+        sys.exit(1)
+    results, summary = reconcile_itc(sys.argv[1], sys.argv[2])
+    print("ITC Reconciliation:", json.dumps(summary, indent=2))
+    if len(sys.argv) > 3:
+        results[results["status"] != "matched"].to_excel(sys.argv[3], index=False)
+        print(f"Mismatches written to {os.path.abspath(sys.argv[3])}")
@@ -0,0 +1,270 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from backend.app import process_invoice, resolve_stages
+from backend.batch import process_batch
+from backend.invoice_source import is_path, persist_upload, source_kind
+from backend.profiler import run_profiled
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+def _new_job(job_id, file_path, file_name, options):
+    now = time.time()
+    return {
+        "id": job_id,
+        "status": "queued",
+        "stage": None,
+        "progress": 0.0,
+        "file_path": file_path,
+        "file_name": file_name,
+        "options": options,
+        "created_at": now,
+        "updated_at": now,
+        "result": None,
+        "error": None
+    }
+
+class InMemoryJobStore:
+    """
+    Job records kept in a dict; lost when the server restarts.
+    """
+
+    # In-memory uploads stay in memory, since their jobs are not resumed anyway
+    upload_dir = None
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, limit=50):
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job["created_at"], reverse=True)
+            return [dict(job) for job in jobs[:limit]]
+
+    def pending(self):
+        return []
+
+class SQLiteJobStore:
+    """
+    Job records persisted in SQLite so queued jobs survive a restart. In-memory uploads are
+    written to upload_dir (default: "job_uploads" next to the database) so they do too.
+    """
+
+    def __init__(self, db_path, upload_dir=None):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.upload_dir = upload_dir or os.path.join(directory, "job_uploads")
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    file_path TEXT,
+                    file_name TEXT,
+                    options TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    result TEXT,
+                    error TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "options" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT")
+
+    def _row_to_job(self, row):
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["options"] = json.loads(job["options"]) if job["options"] else {}
+        return job
+
+    def add(self, job):
+        record = dict(job, result=json.dumps(job["result"]) if job["result"] is not None else None,
+                      options=json.dumps(job["options"]))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, stage, progress, file_path, file_name, options, created_at, updated_at, result, error) "
+                "VALUES (:id, :status, :stage, :progress, :file_path, :file_name, :options, :created_at, :updated_at, :result, :error)",
+                record
+            )
+
+    def update(self, job_id, **fields):
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = :{column}" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = :job_id", dict(fields, job_id=job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, limit=50):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def pending(self):
+        # Jobs interrupted by a restart are picked up again
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+def create_job_store():
+    """
+    JOB_STORE=sqlite selects the persistent store (path from JOB_DB, uploads under JOB_UPLOAD_DIR);
+    anything else keeps jobs in memory.
+    """
+    if os.environ.get("JOB_STORE", "memory").lower() == "sqlite":
+        return SQLiteJobStore(os.environ.get("JOB_DB", os.path.join("TaxAssistant", "jobs.db")),
+                              os.environ.get("JOB_UPLOAD_DIR"))
+    return InMemoryJobStore()
+
+class JobQueue:
+    """
+    Runs process_invoice on a local thread pool so HTTP requests return as soon as the upload is queued.
+    """
+
+    def __init__(self, store=None, workers=None):
+        self.store = store or create_job_store()
+        self.workers = workers or int(os.environ.get("JOB_WORKERS", os.cpu_count() or 1))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="invoice-job")
+        self._resume_pending()
+
+    def _resume_pending(self):
+        for job in self.store.pending():
+            if job["file_path"] and os.path.exists(job["file_path"]):
+                self.store.update(job["id"], status="queued", stage=None, progress=0.0)
+                run = self._run_batch if job["options"].get("kind") == "batch" else self._run
+                self._executor.submit(run, job["id"], job["file_path"], job["options"])
+            else:
+                self.store.update(job["id"], status="failed", error="Uploaded file no longer available")
+
+    def submit(self, file_path, file_name=None, stages=None, user_inputs=None, profile=None, profiler=None):
+        """
+        Queue an invoice for headless processing. stages/user_inputs/profile are passed to
+        process_invoice; an invalid stage list raises ValueError before anything is queued.
+        file_path is a path (removed when the job ends) or an in-memory upload such as a
+        spooled file. With a persistent store the upload is first written to a file under the
+        store's upload_dir and closed, so the job can be resumed after a restart; otherwise it is
+        kept as is and closed when the job ends.
+        profiler, if set, is why the job is profiled ("header", "sampled"); its profile is
+        stored under the job id (see backend.profiler).
+        """
+        options = {"stages": list(resolve_stages(stages)), "user_inputs": user_inputs or {}, "profile": profile,
+                   "profiler": profiler}
+        job_id = uuid.uuid4().hex
+        if not is_path(file_path) and self.store.upload_dir:
+            upload = file_path
+            suffix = ".pdf" if source_kind(upload) == "pdf" else os.path.splitext(file_name or "")[1]
+            file_path = persist_upload(upload, self.store.upload_dir, suffix)
+            if hasattr(upload, "close"):
+                upload.close()
+        stored_path = file_path if is_path(file_path) else None
+        self.store.add(_new_job(job_id, stored_path, file_name or os.path.basename(stored_path or "upload"), options))
+        self._executor.submit(self._run, job_id, file_path, options)
+        return job_id
+
+    def submit_batch(self, batch_dir, file_paths, workers=None, profile=None, upload=False):
+        """
+        Queue a bulk upload: process_batch over file_paths, which all lie in batch_dir. The job
+        owns batch_dir and removes it when it ends; with a persistent store, a batch
+        interrupted by a restart runs again. The job result is the batch summary, with files
+        reported relative to batch_dir.
+        """
+        options = {"kind": "batch", "files": [os.path.relpath(path, batch_dir) for path in file_paths],
+                   "workers": workers, "profile": profile, "upload": upload}
+        job_id = uuid.uuid4().hex
+        self.store.add(_new_job(job_id, batch_dir, f"{len(file_paths)} invoice(s)", options))
+        self._executor.submit(self._run_batch, job_id, batch_dir, options)
+        return job_id
+
+    def _run_batch(self, job_id, batch_dir, options):
+        self.store.update(job_id, status="running", stage="batch")
+        try:
+            file_paths = [os.path.join(batch_dir, name) for name in options["files"]]
+            summary = process_batch(file_paths, workers=options.get("workers"), profile=options.get("profile"),
+                                    upload=options.get("upload", False))
+            for result in summary["results"]:
+                result["file"] = os.path.relpath(result["file"], batch_dir)
+            self.store.update(job_id, status="completed", stage="done", progress=1.0, result=summary)
+        except Exception as e:
+            self.store.update(job_id, status="failed", error=f"Bulk processing error: {str(e)}")
+        finally:
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+    def _run(self, job_id, file_path, options):
+        stages = options.get("stages") or list(resolve_stages())
+
+        def on_stage(stage):
+            index = stages.index(stage) if stage in stages else 0
+            self.store.update(job_id, stage=stage, progress=round(index / len(stages), 2))
+
+        self.store.update(job_id, status="running")
+        try:
+            kwargs = {"stages": stages, "headless": True, "user_inputs": options.get("user_inputs"),
+                      "profile": options.get("profile"), "progress": on_stage}
+            if options.get("profiler"):
+                invoice_data, gst_json = run_profiled(job_id, options["profiler"], process_invoice, file_path, **kwargs)
+            else:
+                invoice_data, gst_json = process_invoice(file_path, **kwargs)
+            if not invoice_data:
+                self.store.update(job_id, status="failed", error="No text extracted from file")
+            else:
+                self.store.update(job_id, status="completed", stage="done", progress=1.0,
+                                  result={"invoice_data": invoice_data, "gst_json": gst_json})
+        except Exception as e:
+            self.store.update(job_id, status="failed", error=f"Processing error: {str(e)}")
+        finally:
+            if not is_path(file_path):
+                if hasattr(file_path, "close"):
+                    file_path.close()
+            elif os.path.exists(file_path):
+                os.remove(file_path)
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        if job:
+            job.pop("file_path", None)
+        return job
+
+    def list(self, limit=50):
+        jobs = self.store.list(limit)
+        for job in jobs:
+            job.pop("file_path", None)
+            job.pop("result", None)
+        return jobs
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,158 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+LEDGER_DB = os.environ.get("GST_LEDGER_DB", "gst_ledger.db")
+
+# Same columns, in the same order, as the rows produced by flatten_invoice_row
+LEDGER_COLUMNS = [
+    ("invoice_no", "TEXT NOT NULL"),
+    ("date", "TEXT NOT NULL"),
+    ("total_amount", "REAL"),
+    ("taxable_value", "REAL"),
+    ("cgst_amount", "REAL"),
+    ("sgst_amount", "REAL"),
+    ("igst_amount", "REAL"),
+    ("cgst_rate", "REAL"),
+    ("sgst_rate", "REAL"),
+    ("igst_rate", "REAL"),
+    ("additional_itc", "REAL"),
+    ("additional_expenses", "REAL"),
+    ("input_tax_credit", "REAL"),
+    ("business_expenses", "REAL"),
+    ("total_tax_liability", "REAL"),
+    ("net_tax_payable", "REAL"),
+    ("cgst_rates", "TEXT"),
+    ("cgst_amounts", "TEXT"),
+    ("sgst_rates", "TEXT"),
+    ("sgst_amounts", "TEXT"),
+    ("igst_rates", "TEXT"),
+    ("igst_amounts", "TEXT")
+]
+COLUMN_NAMES = [name for name, _ in LEDGER_COLUMNS]
+
+logger = logging.getLogger(__name__)
+
+class InvoiceLedger:
+    """
+    Append-only invoice store backed by SQLite.
+    A unique index on (invoice_no, date) rejects duplicates on insert, so adding an
+    invoice never reads or rewrites existing rows. Excel is only produced on export.
+    """
+
+    def __init__(self, db_path=LEDGER_DB):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = ", ".join(f"{name} {definition}" for name, definition in LEDGER_COLUMNS)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS invoices (id INTEGER PRIMARY KEY, {columns}, recorded_at REAL NOT NULL)")
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_no_date ON invoices (invoice_no, date)")
+        placeholders = ", ".join(f":{name}" for name in COLUMN_NAMES)
+        self._insert_sql = f"INSERT OR IGNORE INTO invoices ({', '.join(COLUMN_NAMES)}, recorded_at) VALUES ({placeholders}, :recorded_at)"
+
+    def _record(self, row):
+        record = {name: row.get(name) for name in COLUMN_NAMES}
+        record["invoice_no"] = str(record["invoice_no"] or "")
+        record["date"] = str(record["date"] or "")
+        record["recorded_at"] = time.time()
+        return record
+
+    def append(self, row):
+        """
+        Insert one flattened invoice row. Returns False if (invoice_no, date) is already recorded.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(self._insert_sql, self._record(row))
+            return cursor.rowcount == 1
+
+    def append_many(self, rows):
+        """
+        Insert many rows in a single transaction. Returns the number of new rows.
+        """
+        records = [self._record(row) for row in rows]
+        if not records:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(self._insert_sql, records)
+            return self._conn.total_changes - before
+
+    def exists(self, invoice_no, date):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM invoices WHERE invoice_no = ? AND date = ?", (str(invoice_no), str(date))
+            ).fetchone()
+        return row is not None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM invoices").fetchone()[0]
+
+    def rows(self):
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT {', '.join(COLUMN_NAMES)} FROM invoices ORDER BY id")
+            records = cursor.fetchall()
+        return [dict(zip(COLUMN_NAMES, record)) for record in records]
+
+    def to_dataframe(self):
+        import pandas as pd
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(COLUMN_NAMES)} FROM invoices ORDER BY id", self._conn)
+
+    def export_excel(self, filename="gst_data.xlsx"):
+        """
+        Materialise the ledger as an Excel workbook, the format previously rewritten on every insert.
+        """
+        df = self.to_dataframe()
+        df = df.dropna(axis=1, how="all")
+        df.to_excel(filename, index=False)
+        logger.info("Exported %d invoice(s) to %s", len(df), filename)
+        return filename
+
+    def import_excel(self, filename="gst_data.xlsx"):
+        """
+        Load rows from an existing gst_data.xlsx into the ledger (duplicates are skipped).
+        """
+        import pandas as pd
+        df = pd.read_excel(filename)
+        df = df.astype(object).where(pd.notna(df), None)
+        return self.append_many(df.to_dict("records"))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+def get_ledger(db_path=None):
+    """
+    Process-wide ledger instance for db_path (defaults to GST_LEDGER_DB).
+    """
+    db_path = db_path or LEDGER_DB
+    with _ledgers_lock:
+        if db_path not in _ledgers:
+            _ledgers[db_path] = InvoiceLedger(db_path)
+        return _ledgers[db_path]
+
+# Example usage:
+#   python -m backend.ledger export gst_data.xlsx
+#   python -m backend.ledger import gst_data.xlsx
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "import"):
+        print("Usage: python -m backend.ledger export|import [gst_data.xlsx]")
+        sys.exit(1)
+    excel_file = sys.argv[2] if len(sys.argv) > 2 else "gst_data.xlsx"
+    ledger = get_ledger()
+    if sys.argv[1] == "export":
+        ledger.export_excel(excel_file)
+    else:
+        print(f"Imported {ledger.import_excel(excel_file)} invoice(s) from {excel_file}")
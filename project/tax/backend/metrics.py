@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; spans a millisecond text-layer parse up to a slow multi-page OCR
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def configure_logging(level=None):
+    """
+    Log to stderr at LOG_LEVEL (default INFO). Raw OCR text and parsed invoices are logged at
+    DEBUG, so they are neither formatted nor written unless LOG_LEVEL=DEBUG.
+    """
+    logging.basicConfig(level=(level or LOG_LEVEL), format=LOG_FORMAT)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+class Counter:
+    """
+    Monotonic count per label set.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(values.items())]
+
+class Histogram:
+    """
+    Observations per label set in cumulative buckets, with their count and sum, in the
+    Prometheus histogram layout.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return {"count": series["count"], "sum": series["sum"]} if series else {"count": 0, "sum": 0.0}
+
+    def samples(self):
+        with self._lock:
+            series_items = [(key, list(series["counts"]), series["sum"], series["count"])
+                            for key, series in sorted(self._series.items())]
+        lines = []
+        for key, counts, total, count in series_items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Named metrics of this process, rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get_or_create(Counter, name, help_text)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Pipeline metrics. stage is one of ocr, pdf_render, ocr_page, parse, deductions, tax,
+# validation, interaction, report, json_write, excel_write, reminders, portal
+STAGE_SECONDS = registry.histogram("invoice_stage_seconds", "Time spent in each invoice pipeline stage.")
+STAGE_ERRORS = registry.counter("invoice_stage_errors_total", "Invoice pipeline stages that raised an exception.")
+INVOICES = registry.counter("invoices_processed_total", "Invoices run through process_invoice, by outcome.")
+PDF_PAGES = registry.counter("pdf_pages_total", "PDF pages read, by source (text layer, OCR or OCR cache).")
+
+@contextmanager
+def timed_stage(stage):
+    """
+    Observe the duration of a pipeline stage, counting it as an error if it raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
@@ -0,0 +1,194 @@
+import logging
+import os
+import queue
+import threading
+from functools import lru_cache
+import pytesseract
+
+# OCR_BACKEND selects the engine binding: "tesserocr" keeps Tesseract loaded in-process,
+# "pytesseract" runs the tesseract CLI per call, "auto" (default) prefers tesserocr when installed.
+OCR_BACKEND = os.environ.get("OCR_BACKEND", "auto").lower()
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def tesseract_version():
+    # Spawns tesseract once per process
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return "unknown"
+
+def _group_lines(data):
+    # Collapse word-level TSV rows into text lines with their bounding boxes
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top = data["left"][i], data["top"][i]
+        right, bottom = left + data["width"][i], top + data["height"][i]
+        line = lines.get(key)
+        if line is None:
+            lines[key] = {"words": [word], "box": [left, top, right, bottom]}
+        else:
+            line["words"].append(word)
+            box = line["box"]
+            box[0], box[1], box[2], box[3] = min(box[0], left), min(box[1], top), max(box[2], right), max(box[3], bottom)
+    return [{"text": " ".join(line["words"]), "box": tuple(line["box"])} for line in lines.values()]
+
+class PytesseractBackend:
+    """
+    Runs the tesseract executable once per call. Always available; pays process start-up,
+    model load and a temporary image file on every page.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self, lang=OCR_LANG):
+        self.lang = lang
+
+    def image_to_string(self, image, psm=6):
+        return pytesseract.image_to_string(image, lang=self.lang, config=f"--psm {psm}")
+
+    def version(self):
+        """
+        Version of the tesseract executable; part of OCR cache keys.
+        """
+        return tesseract_version()
+
+    def text_lines(self, image, psm=3):
+        """
+        Text lines with (left, top, right, bottom) boxes, as [{"text", "box"}].
+        """
+        data = pytesseract.image_to_data(image, lang=self.lang, config=f"--psm {psm}", output_type=pytesseract.Output.DICT)
+        return _group_lines(data)
+
+    def close(self):
+        pass
+
+class TesserocrBackend:
+    """
+    Keeps up to pool_size tesserocr API handles alive, each with the language model loaded
+    once. A handle is not thread-safe, so each call borrows one from the pool; recognition
+    releases the GIL, so concurrent calls from threads run in parallel.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang=OCR_LANG, pool_size=None, tessdata_path=None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.tessdata_path = tessdata_path or os.environ.get("TESSDATA_PREFIX")
+        self.pool_size = pool_size or int(os.environ.get("OCR_API_POOL", os.cpu_count() or 1))
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Fail fast (and let get_ocr_backend fall back) if the engine cannot start
+        self._idle.put(self._new_api())
+        self._created = 1
+
+    def _new_api(self):
+        kwargs = {"lang": self.lang}
+        if self.tessdata_path:
+            kwargs["path"] = self.tessdata_path
+        return self._tesserocr.PyTessBaseAPI(**kwargs)
+
+    def version(self):
+        """
+        tesserocr and linked libtesseract versions; part of OCR cache keys.
+        """
+        library = self._tesserocr.tesseract_version().splitlines()[0].strip()
+        return f"{getattr(self._tesserocr, '__version__', 'unknown')}/{library}"
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        # Reserve the slot under the lock so concurrent callers cannot overshoot pool_size, and
+        # give it back if the handle cannot be created
+        with self._lock:
+            can_grow = self._created < self.pool_size
+            if can_grow:
+                self._created += 1
+        if not can_grow:
+            return self._idle.get()
+        try:
+            return self._new_api()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _run(self, image, psm, read):
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImage(image)
+            return read(api)
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def image_to_string(self, image, psm=6):
+        return self._run(image, psm, lambda api: api.GetUTF8Text())
+
+    def text_lines(self, image, psm=3):
+        RIL = self._tesserocr.RIL
+
+        def read(api):
+            api.Recognize()
+            lines = []
+            iterator = api.GetIterator()
+            if iterator is None:
+                return lines
+            for line in self._tesserocr.iterate_level(iterator, RIL.TEXTLINE):
+                text = (line.GetUTF8Text(RIL.TEXTLINE) or "").strip()
+                box = line.BoundingBox(RIL.TEXTLINE)
+                if text and box:
+                    lines.append({"text": " ".join(text.split()), "box": tuple(box)})
+            return lines
+
+        return self._run(image, psm, read)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().End()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+BACKENDS = {"pytesseract": PytesseractBackend, "tesserocr": TesserocrBackend}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_ocr_backend(name=None):
+    """
+    Shared backend instance per name (one per process). "auto" and a tesserocr backend that
+    fails to import or start both resolve to pytesseract.
+    """
+    name = (name or OCR_BACKEND).lower()
+    with _backends_lock:
+        if name not in _backends:
+            if name not in BACKENDS and name != "auto":
+                raise ValueError(f"Unknown OCR backend: {name}")
+            backend = None
+            if name in ("auto", "tesserocr"):
+                try:
+                    backend = TesserocrBackend()
+                except Exception as e:
+                    logger.warning("tesserocr backend unavailable (%s); using pytesseract.", e)
+            _backends[name] = backend or PytesseractBackend()
+        return _backends[name]
+
+def close_ocr_backends():
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import threading
+from backend.ocr_backends import get_ocr_backend
+
+CACHE_DIR = os.environ.get("OCR_CACHE_DIR", os.path.join("TaxAssistant", "ocr_cache"))
+MAX_CACHE_BYTES = int(os.environ.get("OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_source(source, chunk_size=1024 * 1024):
+    """
+    Content hash of an invoice given as a path, bytes or a seekable file object; equal to
+    hash_file for the same content. File objects are rewound afterwards.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return hash_file(source, chunk_size)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+def hash_image(image):
+    """
+    Hash the source file of a PIL image when it was opened from disk, else its pixel data.
+    """
+    source = getattr(image, "filename", "")
+    if source and os.path.isfile(source):
+        return hash_file(source)
+    digest = hashlib.sha256(f"{image.mode}|{image.size}|".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+class OCRCache:
+    """
+    Persistent, content-addressed store of OCR text on disk.
+    Entries are plain text files; access time is tracked through the file mtime so
+    the least recently used entries are evicted once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def make_key(self, content_hash, dpi=None, psm=6, variant=None, backend=None):
+        # variant distinguishes OCR runs on differently prepared input (e.g. preprocessing on/off).
+        # backend (default: the configured one) is the engine doing the OCR; its name, version
+        # and language are part of the key, so switching or upgrading it invalidates old results
+        backend = backend or get_ocr_backend()
+        raw = f"{content_hash}|dpi={dpi}|psm={psm}|ocr={backend.name}-{backend.version()}|lang={backend.lang}"
+        if variant:
+            raw += f"|variant={variant}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under 90% of its budget
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes
+            }
+
+ocr_cache = OCRCache()
@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+from backend.ocr_backends import get_ocr_backend
+from backend.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DPI = 200
+DEFAULT_PSM = 6
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def default_worker_count():
+    """
+    Number of OCR worker processes: OCR_WORKERS from the environment, else one per CPU core.
+    """
+    configured = os.environ.get("OCR_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+def _get_pool():
+    # One pool per process, sized once from default_worker_count() and shared by concurrent
+    # jobs, so worker start-up is paid once and a pool in use is never replaced
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=default_worker_count())
+        return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+def _map_pages(pool, pdf_path, pages, limit, *args):
+    # _ocr_page over pages on the shared pool, in page order, with at most limit pages of
+    # this document in flight (and so at most limit page images in memory)
+    results, pending = [], deque()
+    for page in pages:
+        if len(pending) >= limit:
+            results.append(pending.popleft().result())
+        pending.append(pool.submit(_ocr_page, pdf_path, page, *args))
+    results.extend(future.result() for future in pending)
+    return results
+
+def _ocr_page(pdf_path, page_number, dpi, psm, tesseract_cmd, backend=None):
+    # Runs in a worker process: render exactly one page, OCR it and drop the image.
+    # The backend is created once per worker and stays warm for later pages.
+    # Returns (text, render seconds, OCR seconds); the parent records the timings, since
+    # only its metrics are served
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    render_seconds = 0.0
+    try:
+        start = time.perf_counter()
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+        render_seconds = time.perf_counter() - start
+        if not images:
+            return "", render_seconds, 0.0
+        image = images[0]
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        logger.debug("Processing PDF page %d", page_number)
+        start = time.perf_counter()
+        text = get_ocr_backend(backend).image_to_string(image, psm=psm)
+        return text, render_seconds, time.perf_counter() - start
+    except Exception as e:
+        logger.error("Error processing PDF page %d: %s", page_number, e)
+        return "", render_seconds, 0.0
+
+def count_pdf_pages(pdf_path):
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+def ocr_pdf_pages(pdf_path, dpi=DEFAULT_DPI, psm=DEFAULT_PSM, workers=None, backend=None, page_numbers=None):
+    """
+    OCR every page of a PDF (or only the 1-based page_numbers) in parallel and return the
+    page texts in page order. Pages run on one process pool shared by all callers (sized
+    by OCR_WORKERS); each worker renders and OCRs a single page, and at most `workers` of
+    this document's pages are in flight, so its page images are never all in memory at once.
+    """
+    if page_numbers is None:
+        pages = range(1, count_pdf_pages(pdf_path) + 1)
+    else:
+        pages = sorted(page_numbers)
+    if not pages:
+        return []
+    workers = workers or default_worker_count()
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+
+    # Single pages are not worth a round-trip through the pool
+    if workers <= 1 or len(pages) == 1:
+        results = [_ocr_page(pdf_path, page, dpi, psm, tesseract_cmd, backend) for page in pages]
+    else:
+        results = _map_pages(_get_pool(), pdf_path, pages, workers, dpi, psm, tesseract_cmd, backend)
+    for _, render_seconds, ocr_seconds in results:
+        STAGE_SECONDS.observe(render_seconds, stage="pdf_render")
+        STAGE_SECONDS.observe(ocr_seconds, stage="ocr_page")
+    return [text for text, _, _ in results]
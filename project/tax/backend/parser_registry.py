@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from backend.invoice_extractor import extract_invoice_fields
+
+logger = logging.getLogger(__name__)
+
+# Vendor templates are loaded from VENDOR_TEMPLATES (default backend/vendor_templates.json),
+# a JSON list of objects such as:
+#   {
+#     "name": "acme_traders",
+#     "gstins": ["27AAACA1234A1Z5"],
+#     "header_tokens": ["ACME", "TRADERS"],
+#     "fields": {
+#       "invoice_no": "Invoice\\s*No\\.?\\s*[:\\-]?\\s*([A-Z0-9/\\-]+)",
+#       "date": "Dated\\s*[:\\-]?\\s*(\\d{2}/\\d{2}/\\d{4})",
+#       "taxable_value": "Taxable\\s*Amount\\s*([\\d,]+\\.\\d{2})",
+#       "total_amount": "Invoice\\s*Total\\s*([\\d,]+\\.\\d{2})"
+#     },
+#     "tax_line": "(CGST|SGST|IGST)\\s*@\\s*(\\d+(?:\\.\\d+)?)%\\s*([\\d,]+\\.\\d{2})",
+#     "date_formats": ["%d/%m/%Y"]
+#   }
+# An invoice is dispatched to a template when one of its GSTINs, or all of its header
+# tokens, appear in the first HEADER_LINES lines of the OCR text. Header tokens must be
+# single words of 3+ letters/digits (TOKEN_PATTERN), and tax_line must capture exactly
+# (head, rate, amount); load_file skips templates that break either rule.
+TEMPLATES_FILE = os.environ.get("VENDOR_TEMPLATES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor_templates.json"))
+HEADER_LINES = 12
+HEADER_CHARS = 2000
+REQUIRED_FIELDS = ("invoice_no", "total_amount")
+
+GSTIN_PATTERN = re.compile(r"\d{2}[A-Z]{5}\d{4}[A-Z][0-9A-Z]Z[0-9A-Z]")
+TOKEN_PATTERN = re.compile(r"[A-Z0-9]{3,}")
+TAX_LINE_GROUPS = 3
+
+def _to_float(value):
+    return float(value.replace(",", ""))
+
+class VendorTemplate:
+    """
+    Field patterns for one vendor layout, compiled once when the template is registered.
+    """
+
+    def __init__(self, name, gstins=(), header_tokens=(), fields=None, tax_line=None, date_formats=None):
+        self.name = name
+        self.gstins = {gstin.upper() for gstin in gstins}
+        self.header_tokens = frozenset(token.upper() for token in header_tokens)
+        # Dispatch compares these with the TOKEN_PATTERN words of the header, so any other
+        # token ("M/S", "CO", "ACME-TRADERS") could never match
+        bad_tokens = sorted(token for token in self.header_tokens if not TOKEN_PATTERN.fullmatch(token))
+        if bad_tokens:
+            raise ValueError(f"Template {name}: header tokens {bad_tokens} are not words of 3+ letters or digits")
+        self.fields = {field: re.compile(pattern, re.IGNORECASE) for field, pattern in (fields or {}).items()}
+        self.tax_line = re.compile(tax_line, re.IGNORECASE) if tax_line else None
+        if self.tax_line and self.tax_line.groups != TAX_LINE_GROUPS:
+            raise ValueError(f"Template {name}: tax_line must have {TAX_LINE_GROUPS} groups (head, rate, amount), "
+                             f"has {self.tax_line.groups}")
+        self.date_formats = date_formats or ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d-%b-%Y"]
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec["name"], spec.get("gstins", ()), spec.get("header_tokens", ()), spec.get("fields"),
+                   spec.get("tax_line"), spec.get("date_formats"))
+
+    def _parse_date(self, raw_date):
+        for fmt in self.date_formats:
+            try:
+                return datetime.strptime(raw_date.strip(), fmt).strftime("%d-%m-%Y")
+            except ValueError:
+                continue
+        return None
+
+    def extract(self, text):
+        """
+        Return the field dict in the same shape as extract_invoice_fields, or None when a
+        required field is missing or a captured number does not parse (the caller then falls
+        back to the generic parser).
+        """
+        data = {}
+        for field, pattern in self.fields.items():
+            match = pattern.search(text)
+            if not match:
+                continue
+            value = next((group for group in match.groups() if group), match.group(0))
+            if field == "invoice_no":
+                data[field] = value.strip()
+            elif field == "date":
+                parsed_date = self._parse_date(value)
+                if parsed_date:
+                    data[field] = parsed_date
+            else:
+                try:
+                    data[field] = float(value) if field.endswith("_rate") else _to_float(value)
+                except ValueError:
+                    return None
+        if any(field not in data for field in REQUIRED_FIELDS):
+            return None
+
+        tax_details = {"cgst": [], "sgst": [], "igst": []}
+        if self.tax_line:
+            for head, rate, amount in self.tax_line.findall(text):
+                if head.lower() not in tax_details:
+                    continue
+                try:
+                    tax_details[head.lower()].append({"rate": float(rate), "amount": _to_float(amount)})
+                except ValueError:
+                    return None
+        data["tax_details"] = tax_details
+        for head in ("cgst", "sgst", "igst"):
+            if tax_details[head]:
+                data.setdefault(f"{head}_amount", sum(item["amount"] for item in tax_details[head]))
+                data.setdefault(f"{head}_rate", tax_details[head][0]["rate"])
+        if "taxable_value" not in data:
+            taxes = sum(data.get(f"{head}_amount", 0.0) for head in ("cgst", "sgst", "igst"))
+            data["taxable_value"] = data["total_amount"] - taxes
+
+        data.setdefault("cgst_rate", 0)
+        data.setdefault("sgst_rate", 0)
+        data.setdefault("cgst_amount", 0.0)
+        data.setdefault("sgst_amount", 0.0)
+        return data
+
+class ParserRegistry:
+    """
+    Dispatches OCR text to a vendor template by a cheap header fingerprint: a dict lookup
+    per GSTIN or header token found near the top of the text. Invoices that match no
+    template, or whose template misses a required field, go to the generic extractor.
+    """
+
+    GENERIC = "generic"
+
+    def __init__(self, generic_parser=extract_invoice_fields):
+        self.generic_parser = generic_parser
+        self._by_gstin = {}
+        self._by_token = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, template):
+        for gstin in template.gstins:
+            self._by_gstin[gstin] = template
+        if template.header_tokens:
+            # Index under the rarest-looking (longest) token; the full token set is checked on dispatch
+            anchor = max(template.header_tokens, key=len)
+            self._by_token.setdefault(anchor, []).append(template)
+        return template
+
+    def load_file(self, path=TEMPLATES_FILE):
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            specs = json.load(f)
+        loaded = 0
+        for spec in specs:
+            try:
+                template = VendorTemplate.from_dict(spec)
+            except (KeyError, ValueError, re.error) as e:
+                logger.warning("Skipping vendor template %s in %s: %s", spec.get("name", "?"), path, e)
+                continue
+            self.register(template)
+            loaded += 1
+        return loaded
+
+    def match(self, text):
+        # Only the start of the text is looked at, so dispatch cost does not grow with page count
+        header = "\n".join(text[:HEADER_CHARS].splitlines()[:HEADER_LINES]).upper()
+        for gstin in GSTIN_PATTERN.findall(header):
+            template = self._by_gstin.get(gstin)
+            if template:
+                return template
+        if self._by_token:
+            tokens = set(TOKEN_PATTERN.findall(header))
+            for token in tokens:
+                for template in self._by_token.get(token, ()):
+                    if template.header_tokens <= tokens:
+                        return template
+        return None
+
+    def _entry(self, name):
+        return self._stats.setdefault(name, {"hits": 0, "fallbacks": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+    def _record(self, name, elapsed, fallback_from=None):
+        with self._lock:
+            if fallback_from:
+                self._entry(fallback_from)["fallbacks"] += 1
+            stats = self._entry(name)
+            stats["hits"] += 1
+            elapsed_ms = elapsed * 1000
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def parse(self, text):
+        """
+        Parse OCR text and return (field dict, name of the parser that produced it).
+        """
+        start = time.perf_counter()
+        template = self.match(text)
+        if template:
+            data = template.extract(text)
+            if data is not None:
+                self._record(template.name, time.perf_counter() - start)
+                return data, template.name
+        data = self.generic_parser(text)
+        self._record(self.GENERIC, time.perf_counter() - start, fallback_from=template.name if template else None)
+        return data, self.GENERIC
+
+    def stats(self):
+        with self._lock:
+            total = sum(stats["hits"] for stats in self._stats.values())
+            return {
+                "templates": len({id(t) for t in self._by_gstin.values()} | {id(t) for ts in self._by_token.values() for t in ts}),
+                "invoices": total,
+                "template_hit_rate": (total - self._stats.get(self.GENERIC, {}).get("hits", 0)) / total if total else 0.0,
+                "parsers": {
+                    name: dict(stats, avg_ms=stats["total_ms"] / stats["hits"] if stats["hits"] else 0.0,
+                               hit_rate=stats["hits"] / total if total else 0.0)
+                    for name, stats in self._stats.items()
+                }
+            }
+
+parser_registry = ParserRegistry()
+parser_registry.load_file()
@@ -0,0 +1,127 @@
+import logging
+import os
+import re
+import time
+from contextlib import ExitStack
+from backend.ocr_engine import ocr_pdf_pages, count_pdf_pages, DEFAULT_DPI, DEFAULT_PSM
+from backend.ocr_backends import get_ocr_backend
+from backend.ocr_cache import hash_source
+from backend.invoice_source import is_path, open_binary, source_on_disk
+from backend.metrics import PDF_PAGES
+
+logger = logging.getLogger(__name__)
+
+# Machine-generated PDFs carry their text; reading it takes milliseconds where rendering
+# and OCR take seconds. PDF_TEXT_LAYER=0 always OCRs.
+MIN_TEXT_CHARS = int(os.environ.get("PDF_TEXT_MIN_CHARS", 20))
+# Pages where more than this share of the characters are unmapped glyphs ("(cid:12)") or
+# U+FFFD were written with fonts lacking a Unicode map; their text layer is garbage
+MAX_BAD_GLYPH_RATIO = float(os.environ.get("PDF_TEXT_MAX_BAD_GLYPHS", 0.1))
+# Words whose tops lie within this many points belong to the same line
+LINE_TOLERANCE = 3.0
+
+CID_GLYPH = re.compile(r"\(cid:\d+\)")
+
+def text_layer_enabled():
+    return os.environ.get("PDF_TEXT_LAYER", "1").lower() not in ("0", "false", "no", "off")
+
+def _load_pdfplumber():
+    # Optional dependency: without it every page goes through OCR
+    try:
+        import pdfplumber
+        return pdfplumber
+    except ImportError:
+        return None
+
+def _page_lines(words):
+    # Order words top-to-bottom, then left-to-right within a line, the way tesseract reads
+    # a page, so the field patterns see "CGST@9% 450.00" on one line
+    lines = []
+    for word in sorted(words, key=lambda word: (word["top"], word["x0"])):
+        if lines and abs(word["top"] - lines[-1]["top"]) <= LINE_TOLERANCE:
+            lines[-1]["words"].append(word)
+        else:
+            lines.append({"top": word["top"], "words": [word]})
+    return [" ".join(word["text"] for word in sorted(line["words"], key=lambda word: word["x0"])) for line in lines]
+
+def usable_text(text):
+    """
+    True when a page's text layer holds enough real characters to parse instead of OCR.
+    """
+    bad = sum(len(glyph) for glyph in CID_GLYPH.findall(text)) + text.count("\ufffd")
+    stripped = CID_GLYPH.sub("", text)
+    if sum(ch.isalnum() for ch in stripped) < MIN_TEXT_CHARS:
+        return False
+    return bad <= MAX_BAD_GLYPH_RATIO * max(len(text), 1)
+
+def read_text_layer(source):
+    """
+    Native text of every page, rebuilt line by line from word positions, or None for pages
+    without a usable text layer. source is a path, bytes or a file object; it is parsed in
+    place. Returns None when pdfplumber is not installed or the file cannot be parsed.
+    """
+    pdfplumber = _load_pdfplumber()
+    if pdfplumber is None:
+        return None
+    try:
+        texts = []
+        with pdfplumber.open(source if is_path(source) else open_binary(source)) as pdf:
+            for page in pdf.pages:
+                text = "\n".join(_page_lines(page.extract_words(keep_blank_chars=False)))
+                texts.append(text if usable_text(text) else None)
+                page.flush_cache()
+        return texts
+    except Exception as e:
+        logger.warning("Could not read PDF text layer: %s", e)
+        return None
+
+def extract_pdf_pages(source, dpi=DEFAULT_DPI, psm=DEFAULT_PSM, workers=None, backend=None, use_text_layer=None, cache=None):
+    """
+    Text of every page of a PDF (path, bytes or file object) with the path each one took.
+    Pages with a usable text layer are read directly from memory; only the remaining pages
+    are rendered and OCR'd (in parallel, see backend.ocr_engine), and with a cache
+    (backend.ocr_cache.OCRCache) their text is cached per page. Poppler only reads files,
+    so an in-memory PDF is written to one temporary file if poppler is needed at all.
+    Returns [{"page", "source": "text"|"ocr"|"ocr_cache", "text", "ms"}] in page order;
+    ms is each page's share of the wall time spent on its path.
+    """
+    use_text_layer = text_layer_enabled() if use_text_layer is None else use_text_layer
+    with ExitStack() as stack:
+        on_disk = []
+
+        def pdf_path():
+            if not on_disk:
+                on_disk.append(stack.enter_context(source_on_disk(source)))
+            return on_disk[0]
+
+        start = time.perf_counter()
+        layer = read_text_layer(source) if use_text_layer else None
+        if layer is None:
+            layer = [None] * count_pdf_pages(pdf_path())
+        layer_ms = (time.perf_counter() - start) * 1000 / max(len(layer), 1)
+        records = [None if text is None else {"page": number, "source": "text", "text": text, "ms": layer_ms}
+                   for number, text in enumerate(layer, start=1)]
+
+        missing = [number for number, text in enumerate(layer, start=1) if text is None]
+        keys = {}
+        if missing and cache is not None:
+            content_hash = hash_source(source)
+            ocr_backend = get_ocr_backend(backend)
+            for number in missing:
+                keys[number] = cache.make_key(content_hash, dpi=dpi, psm=psm, variant=f"page-{number}", backend=ocr_backend)
+                cached_text = cache.get(keys[number])
+                if cached_text is not None:
+                    records[number - 1] = {"page": number, "source": "ocr_cache", "text": cached_text, "ms": 0.0}
+            missing = [number for number in missing if records[number - 1] is None]
+
+        if missing:
+            start = time.perf_counter()
+            texts = ocr_pdf_pages(pdf_path(), dpi=dpi, psm=psm, workers=workers, backend=backend, page_numbers=missing)
+            ocr_ms = (time.perf_counter() - start) * 1000 / len(missing)
+            for number, text in zip(missing, texts):
+                records[number - 1] = {"page": number, "source": "ocr", "text": text, "ms": ocr_ms}
+                if number in keys and text.strip():
+                    cache.put(keys[number], text)
+    for record in records:
+        PDF_PAGES.inc(source=record["source"])
+    return records
@@ -0,0 +1,187 @@
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Requests carrying this header (any value but 0/false/no/off) are profiled
+PROFILE_HEADER = "X-Profile"
+# Share of the remaining requests profiled at random; 0 (default) turns sampling off, so an
+# unprofiled request costs one comparison
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+# The store keeps the newest profiles within both limits and drops the oldest
+MAX_PROFILES = int(os.environ.get("PROFILE_MAX_ENTRIES", 50))
+MAX_PROFILE_BYTES = int(os.environ.get("PROFILE_MAX_BYTES", 32 * 1024 * 1024))
+# Call paths below this many seconds are left out of folded stacks
+MIN_FOLDED_SECONDS = 0.0001
+
+# Only one cProfile profiler can be active per interpreter at a time (Python 3.12+ refuses a
+# second one), so concurrent jobs wanting a profile run unprofiled instead of waiting
+_active = threading.Lock()
+
+def profile_trigger(header_value=None, sample_rate=None):
+    """
+    Why a request should be profiled: "header" when it asks for it, "sampled" when picked at
+    random at sample_rate (default SAMPLE_RATE), else None.
+    """
+    if header_value and header_value.strip().lower() not in ("0", "false", "no", "off"):
+        return "header"
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate > 0 and random.random() < rate:
+        return "sampled"
+    return None
+
+def _label(func):
+    filename, line, name = func
+    return name if filename == "~" else f"{os.path.basename(filename)}:{line}({name})"
+
+def folded_stacks(stats, min_seconds=MIN_FOLDED_SECONDS):
+    """
+    Folded stacks ("root;caller;callee microseconds" per line) for flamegraph.pl or
+    speedscope. cProfile records caller/callee pairs rather than whole stacks, so the time of
+    a function called from several places is split between them in proportion to each
+    caller's share, the way gprof2dot and flameprof draw it.
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+    folded = defaultdict(float)
+
+    def walk(func, path, self_seconds, cumulative_seconds, on_path):
+        path = path + (_label(func),)
+        folded[";".join(path)] += self_seconds
+        total = stats[func][3]
+        scale = cumulative_seconds / total if total else 0.0
+        for callee, (_, _, callee_self, callee_cumulative) in callees[func].items():
+            if callee in on_path or callee_cumulative * scale < min_seconds:
+                continue
+            walk(callee, path, callee_self * scale, callee_cumulative * scale, on_path | {callee})
+
+    for func, (_, _, self_seconds, cumulative_seconds, callers) in stats.items():
+        if not callers:
+            walk(func, (), self_seconds, cumulative_seconds, {func})
+    lines = [f"{stack} {round(seconds * 1_000_000)}" for stack, seconds in sorted(folded.items()) if seconds >= 0.0000005]
+    return "\n".join(lines) + "\n"
+
+def top_functions(stats, limit=30, sort="cumulative"):
+    """
+    The limit most expensive functions by cumulative or self ("tottime") time, each with the
+    functions it called and the time spent in them: one level of the call tree per entry.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, calls, _, cumulative) in callers.items():
+            callees[caller].append({"function": _label(func), "calls": calls, "cumulative_s": round(cumulative, 6)})
+    index = 3 if sort == "cumulative" else 2
+    ranked = sorted(stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    return [{
+        "function": _label(func),
+        "calls": calls,
+        "primitive_calls": primitive_calls,
+        "self_s": round(self_seconds, 6),
+        "cumulative_s": round(cumulative_seconds, 6),
+        "callees": sorted(callees[func], key=lambda callee: callee["cumulative_s"], reverse=True)[:10]
+    } for func, (primitive_calls, calls, self_seconds, cumulative_seconds, _) in ranked]
+
+class ProfileStore:
+    """
+    Most recent profiles in memory, keyed by request (job) id. Each is kept as the marshalled
+    pstats table, the same bytes cProfile writes to a .prof file.
+    """
+
+    def __init__(self, max_profiles=MAX_PROFILES, max_bytes=MAX_PROFILE_BYTES):
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self._profiles = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def put(self, key, profile, **info):
+        data = marshal.dumps(pstats.Stats(profile).stats)
+        entry = dict(info, id=key, size_bytes=len(data), created_at=time.time())
+        with self._lock:
+            previous = self._profiles.pop(key, None)
+            if previous is not None:
+                self._size -= previous[0]["size_bytes"]
+            self._profiles[key] = (entry, data)
+            self._size += len(data)
+            while self._profiles and (len(self._profiles) > self.max_profiles or self._size > self.max_bytes):
+                evicted, _ = self._profiles.popitem(last=False)[1]
+                self._size -= evicted["size_bytes"]
+        return entry
+
+    def info(self, key):
+        with self._lock:
+            stored = self._profiles.get(key)
+            return dict(stored[0]) if stored else None
+
+    def raw(self, key):
+        """
+        The profile as .prof bytes, readable by pstats, snakeviz or flameprof; None if unknown.
+        """
+        with self._lock:
+            stored = self._profiles.get(key)
+            return stored[1] if stored else None
+
+    def stats(self, key):
+        data = self.raw(key)
+        return marshal.loads(data) if data is not None else None
+
+    def list(self):
+        with self._lock:
+            return [dict(entry) for entry, _ in reversed(self._profiles.values())]
+
+    def summary(self):
+        with self._lock:
+            return {"profiles": len(self._profiles), "size_bytes": self._size,
+                    "max_profiles": self.max_profiles, "max_bytes": self.max_bytes}
+
+profile_store = ProfileStore()
+
+def run_profiled(key, trigger, func, *args, store=None, **kwargs):
+    """
+    Call func under cProfile and store the profile under key, also when func raises.
+    Only the calling thread is profiled: OCR done in worker processes shows up as time spent
+    waiting on their futures. Runs func unprofiled if another profile is being taken.
+    """
+    if not _active.acquire(blocking=False):
+        logger.info("Profiler busy; running %s without profiling.", key)
+        return func(*args, **kwargs)
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    error = None
+    try:
+        return profile.runcall(func, *args, **kwargs)
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _active.release()
+        wall_seconds = time.perf_counter() - start
+        (store or profile_store).put(key, profile, trigger=trigger, wall_seconds=round(wall_seconds, 6), error=error)
+        logger.info("Stored %s profile of %s (%.2fs).", trigger, key, wall_seconds)
+
+class _StatsSource:
+    # pstats.Stats loads any object with create_stats() and a stats dict
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def format_stats(stats, limit=40, sort="cumulative"):
+    """
+    pstats' plain-text report of a stored profile.
+    """
+    output = io.StringIO()
+    report = pstats.Stats(_StatsSource(stats), stream=output)
+    report.strip_dirs().sort_stats(sort).print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,103 @@
+import time
+from PIL import Image
+from backend.ocr_backends import get_ocr_backend
+from backend.invoice_extractor import INVOICE_NO, DATE, DATE_ALT
+
+# Width of the image used for the layout pass; keywords are still legible at this size
+LAYOUT_WIDTH = 1000
+# Lines containing these words locate the header and the tax summary block
+HEADER_KEYWORDS = ("INVOICE", "INV NO", "INV.", "DATE", "GSTIN", "BILL TO")
+TOTALS_KEYWORDS = ("TOTAL", "TAXABLE", "CGST", "SGST", "IGST", "GST@", "PAYABLE", "AMT")
+# Fields the regions must yield; when any is missing the caller falls back to full-page OCR
+ROI_REQUIRED_FIELDS = ("invoice_no", "date", "total_amount", "taxable_value")
+# Crops are stacked into one image separated by this many blank pixels, so the
+# regions cost a single Tesseract run
+STITCH_GAP = 30
+
+def layout_lines(image, width=LAYOUT_WIDTH, backend=None):
+    """
+    Cheap layout pass: Tesseract page segmentation on a downscaled copy of the image, as
+    text lines. Returns [{"text", "box": (left, top, right, bottom)}] in full-size coordinates.
+    """
+    scale = min(1.0, width / image.width)
+    small = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.BILINEAR) \
+        if scale < 1.0 else image
+    lines = (backend or get_ocr_backend()).text_lines(small, psm=3)
+    return [{"text": line["text"], "box": tuple(int(value / scale) for value in line["box"])} for line in lines]
+
+def classify_line(text):
+    """
+    "header", "totals" or None for a layout line.
+    """
+    upper = text.upper()
+    if any(keyword in upper for keyword in TOTALS_KEYWORDS):
+        return "totals"
+    if any(keyword in upper for keyword in HEADER_KEYWORDS) or INVOICE_NO.search(text) \
+            or DATE.search(text) or DATE_ALT.search(text):
+        return "header"
+    return None
+
+def find_regions(lines, image_height):
+    """
+    Full-width horizontal bands around the header and totals lines, padded by one line
+    height (values are often printed on the next line) and merged where they overlap.
+    Returns [{"label", "top", "bottom"}] sorted top to bottom.
+    """
+    bands = []
+    for line in lines:
+        label = classify_line(line["text"])
+        if not label:
+            continue
+        _, top, _, bottom = line["box"]
+        pad = max(bottom - top, 10)
+        bands.append({"label": label, "top": max(0, top - pad), "bottom": min(image_height, bottom + pad)})
+    bands.sort(key=lambda band: band["top"])
+
+    merged = []
+    for band in bands:
+        if merged and band["top"] <= merged[-1]["bottom"]:
+            last = merged[-1]
+            last["bottom"] = max(last["bottom"], band["bottom"])
+            if band["label"] not in last["label"].split("+"):
+                last["label"] += "+" + band["label"]
+        else:
+            merged.append(dict(band))
+    return merged
+
+def stitch_regions(image, regions, gap=STITCH_GAP):
+    """
+    Stack the region crops vertically, in page order, into a single image.
+    """
+    height = sum(region["bottom"] - region["top"] for region in regions) + gap * (len(regions) - 1)
+    fill = 255 if image.mode == "L" else (255,) * len(image.getbands())
+    canvas = Image.new(image.mode, (image.width, height), fill)
+    y = 0
+    for region in regions:
+        crop = image.crop((0, region["top"], image.width, region["bottom"]))
+        canvas.paste(crop, (0, y))
+        y += crop.height + gap
+    return canvas
+
+def ocr_regions(image, psm=6, backend=None):
+    """
+    Locate the header and totals regions and OCR only those. Returns (text, info); text is
+    "" when the layout pass found nothing of interest.
+    """
+    backend = backend or get_ocr_backend()
+    info = {}
+    start = time.perf_counter()
+    regions = find_regions(layout_lines(image, backend=backend), image.height)
+    info["layout_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    info["regions"] = regions
+    if not regions:
+        info["area_fraction"] = 0.0
+        return "", info
+
+    info["area_fraction"] = round(sum(region["bottom"] - region["top"] for region in regions) / image.height, 3)
+    start = time.perf_counter()
+    text = backend.image_to_string(stitch_regions(image, regions), psm=psm)
+    info["ocr_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return text, info
+
+def missing_fields(invoice_data, required=ROI_REQUIRED_FIELDS):
+    return [field for field in required if field not in invoice_data]
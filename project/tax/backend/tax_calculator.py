@@ -1,36 +1,175 @@
-def calculate_tax_liability(invoice_data):
+import numpy as np
+
+# Input tax credit estimated as this fraction of the taxable value (adjust based on GST rules)
+DEFAULT_ITC_RATE = 0.18
+TAX_HEADS = ("cgst", "sgst", "igst")
+MISMATCH_TOLERANCE = 0.01
+
+def _column(values):
+    # Float array for a column, with missing values (None/NaN) treated as 0.0
+    array = np.asarray(values, dtype=np.float64)
+    return np.nan_to_num(array, nan=0.0)
+
+def compute_tax_arrays(cgst_amount, sgst_amount, igst_amount, taxable_value, total_amount, itc_rate=DEFAULT_ITC_RATE):
+    """
+    Vectorized core of the tax engine. Takes equal-length columns (arrays or lists) and
+    returns a dict of arrays: total_tax_liability, net_tax_payable, input_tax_credit and
+    mismatch (net payable differs from the summed tax heads by more than MISMATCH_TOLERANCE).
+    """
+    cgst, sgst, igst = (_column(values) for values in (cgst_amount, sgst_amount, igst_amount))
+    taxable = _column(taxable_value)
+    total = _column(total_amount)
+
+    total_tax_liability = cgst + sgst + igst
+    # Should match total_tax_liability
+    net_tax_payable = total - taxable
+    return {
+        "total_tax_liability": total_tax_liability,
+        "net_tax_payable": net_tax_payable,
+        "input_tax_credit": taxable * itc_rate,
+        "mismatch": np.abs(net_tax_payable - total_tax_liability) > MISMATCH_TOLERANCE
+    }
+
+def calculate_tax_liability(invoice_data, itc_rate=DEFAULT_ITC_RATE):
     """
     Calculate total tax liability, net tax payable, and input tax credit (ITC).
     Returns a dictionary with calculated values.
     """
+    result = compute_tax_arrays(
+        [invoice_data.get("cgst_amount", 0.0)], [invoice_data.get("sgst_amount", 0.0)],
+        [invoice_data.get("igst_amount", 0.0)], [invoice_data.get("taxable_value", 0.0)],
+        [invoice_data.get("total_amount", 0.0)], itc_rate
+    )
     tax_calculations = {
-        "total_tax_liability": 0.0,
-        "net_tax_payable": 0.0,
-        "input_tax_credit": 0.0,
+        "total_tax_liability": float(result["total_tax_liability"][0]),
+        "net_tax_payable": float(result["net_tax_payable"][0]),
+        "input_tax_credit": float(result["input_tax_credit"][0]),
         "notes": []
     }
+    if result["mismatch"][0]:
+        tax_calculations["notes"].append("Warning: Net tax payable does not match total tax liability.")
+    return tax_calculations
+
+def _to_frame(invoices):
+    import pandas as pd
+    if isinstance(invoices, pd.DataFrame):
+        return invoices
+    from backend.user_interaction import flatten_invoice_row
+    return pd.DataFrame.from_records([
+        flatten_invoice_row(invoice) if "tax_details" in invoice else invoice for invoice in invoices
+    ])
 
-    # Sum CGST, SGST, and IGST amounts
-    cgst_amount = invoice_data.get("cgst_amount", 0.0)
-    sgst_amount = invoice_data.get("sgst_amount", 0.0)
-    igst_amount = invoice_data.get("igst_amount", 0.0)
+def calculate_tax_liability_batch(invoices, itc_rate=DEFAULT_ITC_RATE):
+    """
+    calculate_tax_liability over many invoices at once. invoices is a DataFrame with
+    ledger columns (see backend.ledger) or a list of invoice dicts / ledger rows.
+    Returns a copy of the frame with the computed columns set.
+    """
+    frame = _to_frame(invoices).copy()
+    columns = [
+        frame[name].to_numpy() if name in frame else np.zeros(len(frame))
+        for name in ("cgst_amount", "sgst_amount", "igst_amount", "taxable_value", "total_amount")
+    ]
+    result = compute_tax_arrays(*columns, itc_rate=itc_rate)
+    for name, values in result.items():
+        frame[name] = values
+    return frame
 
-    total_tax_liability = cgst_amount + sgst_amount + igst_amount
-    tax_calculations["total_tax_liability"] = total_tax_liability
+def _period_column(frame):
+    # Filing period (MMYYYY) from the dd-mm-YYYY invoice date
+    dates = frame["date"].astype(str)
+    return dates.str.slice(3, 5) + dates.str.slice(6, 10)
 
-    # Net tax payable (assuming no ITC for simplicity; adjust based on deductions)
-    taxable_value = invoice_data.get("taxable_value", 0.0)
-    total_amount = invoice_data.get("total_amount", 0.0)
-    tax_calculations["net_tax_payable"] = total_amount - taxable_value  # Should match total_tax_liability
+def _rate_lines(frame, periods, head):
+    # One row per (invoice, rate) of a tax head: the detailed rate/amount lists when the
+    # invoice has them, else the head's single rate and amount
+    import pandas as pd
+    rates_column, amounts_column = f"{head}_rates", f"{head}_amounts"
+    if rates_column in frame and amounts_column in frame:
+        detailed = frame[rates_column].fillna("").astype(str).str.len().gt(0).to_numpy()
+    else:
+        detailed = np.zeros(len(frame), dtype=bool)
 
-    # Estimate ITC (can be refined with deduction_identifier.py)
-    tax_calculations["input_tax_credit"] = taxable_value * 0.18  # Example: 18% ITC (adjust based on GST rules)
+    parts = []
+    if detailed.any():
+        split = pd.DataFrame({
+            "period": periods[detailed].to_numpy(),
+            "rate": frame.loc[detailed, rates_column].astype(str).str.split(","),
+            "amount": frame.loc[detailed, amounts_column].astype(str).str.split(",")
+        }).explode(["rate", "amount"])
+        parts.append(split)
+    simple = ~detailed
+    if simple.any():
+        parts.append(pd.DataFrame({
+            "period": periods[simple].to_numpy(),
+            "rate": frame[f"{head}_rate"].to_numpy()[simple] if f"{head}_rate" in frame else 0.0,
+            "amount": frame[f"{head}_amount"].to_numpy()[simple] if f"{head}_amount" in frame else 0.0
+        }))
+    if not parts:
+        return pd.DataFrame(columns=["period", "rate", "amount"])
+    lines = pd.concat(parts, ignore_index=True)
+    lines["rate"] = pd.to_numeric(lines["rate"], errors="coerce").fillna(0.0)
+    lines["amount"] = pd.to_numeric(lines["amount"], errors="coerce").fillna(0.0)
+    return lines[lines["amount"] != 0]
 
-    # Validation
-    if abs(tax_calculations["net_tax_payable"] - total_tax_liability) > 0.01:
-        tax_calculations["notes"].append("Warning: Net tax payable does not match total tax liability.")
+def period_liability(invoices, itc_rate=DEFAULT_ITC_RATE):
+    """
+    GSTR-3B style aggregates per filing period (MMYYYY), computed with grouped pandas sums.
+    Returns (summary, by_rate):
+      summary: one row per period with invoices, taxable_value, cgst/sgst/igst liability,
+               total_tax_liability, input_tax_credit (estimated + additional_itc),
+               net_payable and itc_carry_forward
+      by_rate: one row per (period, head, rate) with tax_amount and the implied taxable_value
+    """
+    import pandas as pd
+    frame = calculate_tax_liability_batch(invoices, itc_rate)
+    periods = _period_column(frame) if "date" in frame else pd.Series([""] * len(frame))
+    frame["period"] = periods.to_numpy()
+    additional_itc = frame["additional_itc"].fillna(0.0) if "additional_itc" in frame else 0.0
+    frame["input_tax_credit"] = frame["input_tax_credit"] + additional_itc
+    for head in TAX_HEADS:
+        column = f"{head}_amount"
+        frame[head] = frame[column].fillna(0.0) if column in frame else 0.0
+    if "taxable_value" not in frame:
+        frame["taxable_value"] = 0.0
 
-    return tax_calculations
+    summary = frame.groupby("period", sort=True).agg(
+        invoices=("period", "size"),
+        taxable_value=("taxable_value", "sum"),
+        cgst=("cgst", "sum"),
+        sgst=("sgst", "sum"),
+        igst=("igst", "sum"),
+        total_tax_liability=("total_tax_liability", "sum"),
+        input_tax_credit=("input_tax_credit", "sum")
+    )
+    summary["net_payable"] = (summary["total_tax_liability"] - summary["input_tax_credit"]).clip(lower=0.0)
+    summary["itc_carry_forward"] = (summary["input_tax_credit"] - summary["total_tax_liability"]).clip(lower=0.0)
+
+    by_rate = []
+    for head in TAX_HEADS:
+        lines = _rate_lines(frame, frame["period"], head)
+        if lines.empty:
+            continue
+        grouped = lines.groupby(["period", "rate"], sort=True)["amount"].sum().reset_index(name="tax_amount")
+        grouped.insert(1, "head", head.upper())
+        rates = grouped["rate"].to_numpy()
+        grouped["taxable_value"] = np.divide(grouped["tax_amount"].to_numpy() * 100, rates,
+                                             out=np.zeros(len(grouped)), where=rates > 0)
+        by_rate.append(grouped)
+    by_rate = pd.concat(by_rate, ignore_index=True) if by_rate else \
+        pd.DataFrame(columns=["period", "head", "rate", "tax_amount", "taxable_value"])
+    return summary.reset_index(), by_rate
+
+def ledger_period_liability(ledger=None, period=None, itc_rate=DEFAULT_ITC_RATE):
+    """
+    period_liability over every invoice in the ledger, optionally limited to one period.
+    """
+    from backend.ledger import get_ledger
+    summary, by_rate = period_liability((ledger or get_ledger()).to_dataframe(), itc_rate)
+    if period:
+        summary = summary[summary["period"] == period]
+        by_rate = by_rate[by_rate["period"] == period]
+    return summary, by_rate
 
 # Example usage
 if __name__ == "__main__":
@@ -45,4 +184,8 @@ if __name__ == "__main__":
         "igst_amount": 0.0
     }
     calculations = calculate_tax_liability(sample_invoice)
-    print("Tax Calculations:", calculations)
\ No newline at end of file
+    print("Tax Calculations:", calculations)
+
+    summary, by_rate = period_liability([sample_invoice, dict(sample_invoice, invoice_no="80XBoEZ0-8BP001", cgst_rate=9, sgst_rate=9)])
+    print("Period Liability:\n", summary.to_string(index=False))
+    print("By Rate:\n", by_rate.to_string(index=False))
@@ -1,23 +1,61 @@
-import pandas as pd
+import json
+import logging
+import os
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-import os
-import time
+from backend.ledger import get_ledger
 
-def interact_with_user(invoice_data):
+logger = logging.getLogger(__name__)
+
+# Defaults used for the user-supplied fields when running headless
+PROFILES_FILE = os.environ.get("USER_INPUT_PROFILES", os.path.join("TaxAssistant", "profiles.json"))
+DEFAULT_USER_INPUTS = {"additional_itc": 0.0, "additional_expenses": 0.0}
+
+def prompt_user_inputs(invoice_data):
     """
-    Prompt user for additional tax-related data and generate a report.
+    Ask on stdin for the additional tax-related data of an invoice.
     """
     print("\nTax Assistant - User Input")
     print("Enter additional tax information for invoice:", invoice_data.get("invoice_no", ""))
     
     additional_itc = float(input("Enter additional Input Tax Credit (ITC) amount (or 0): ") or 0)
     additional_expenses = float(input("Enter additional business expenses (or 0): ") or 0)
+    return {"additional_itc": additional_itc, "additional_expenses": additional_expenses}
 
+def load_input_profile(name="default", path=None):
+    """
+    Look up a named defaults profile in the profiles JSON file, e.g.
+    {"default": {"additional_itc": 0, "additional_expenses": 0}, "retail": {...}}.
+    Missing files or profiles fall back to zeros.
+    """
+    path = path or PROFILES_FILE
+    profile = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f).get(name, {})
+    return dict(DEFAULT_USER_INPUTS, **{key: profile[key] for key in DEFAULT_USER_INPUTS if key in profile})
+
+def resolve_user_inputs(user_inputs=None, profile=None):
+    """
+    Non-interactive user inputs: explicit values override the named (or default) profile.
+    """
+    resolved = load_input_profile(profile or "default")
+    for key, value in (user_inputs or {}).items():
+        if key in DEFAULT_USER_INPUTS and value is not None and value != "":
+            resolved[key] = value
+    return resolved
+
+def apply_user_inputs(invoice_data, user_inputs):
     # Update invoice_data with user input
-    invoice_data["additional_itc"] = additional_itc
-    invoice_data["additional_expenses"] = additional_expenses
+    invoice_data["additional_itc"] = float(user_inputs.get("additional_itc", 0) or 0)
+    invoice_data["additional_expenses"] = float(user_inputs.get("additional_expenses", 0) or 0)
+
+def interact_with_user(invoice_data):
+    """
+    Prompt user for additional tax-related data and generate a report.
+    """
+    apply_user_inputs(invoice_data, prompt_user_inputs(invoice_data))
 
     # Generate detailed report (PDF)
     generate_report(invoice_data)
@@ -65,13 +103,12 @@ def generate_report(invoice_data):
 
     elements.append(table)
     doc.build(elements)
-    print(f"Detailed tax report generated: {pdf_filename}")
-
-    # Also enhance Excel output with additional fields
-    append_to_enhanced_excel(invoice_data)
+    logger.info("Detailed tax report generated: %s", pdf_filename)
 
-def append_to_enhanced_excel(invoice_data, filename="gst_data.xlsx", retries=3, delay=2):
-    # Flatten tax_details into separate columns
+def flatten_invoice_row(invoice_data):
+    """
+    Flatten invoice data (including tax_details) into a single spreadsheet row.
+    """
     flattened_data = {
         "invoice_no": invoice_data.get("invoice_no", ""),
         "date": invoice_data.get("date", ""),
@@ -109,36 +146,19 @@ def append_to_enhanced_excel(invoice_data, filename="gst_data.xlsx", retries=3,
         flattened_data["igst_rates"] = ", ".join(f"{d['rate']}" for d in igst_details)
         flattened_data["igst_amounts"] = ", ".join(f"{d['amount']:.2f}" for d in igst_details)
     
-    df_new = pd.DataFrame([flattened_data])
-    
-    if os.path.exists(filename):
-        try:
-            df_existing = pd.read_excel(filename)
-            # Check for duplicates based on invoice_no and date
-            df_existing = df_existing.drop_duplicates(subset=["invoice_no", "date"], keep="first")
-            if not df_existing[
-                (df_existing["invoice_no"] == flattened_data["invoice_no"]) & 
-                (df_existing["date"] == flattened_data["date"])
-            ].empty:
-                print(f"Duplicate entry for invoice {flattened_data['invoice_no']} on {flattened_data['date']} skipped.")
-                return
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        except Exception as e:
-            print(f"Error reading existing Excel file: {e}")
-            df_combined = df_new
-    else:
-        df_combined = df_new
-    
-    for attempt in range(retries):
-        try:
-            df_combined.to_excel(filename, index=False)
-            print(f"GST data appended to {filename}")
-            break
-        except PermissionError:
-            print(f"Permission denied for {filename}. Retrying in {delay} seconds... (Attempt {attempt + 1}/{retries})")
-            time.sleep(delay)
-    else:
-        print(f"Failed to write to {filename} after {retries} attempts. Please close the file if it’s open.")
+    return flattened_data
+
+def append_to_enhanced_excel(invoice_data, ledger=None):
+    """
+    Record the flattened invoice (including user-supplied fields) in the invoice ledger.
+    """
+    ledger = ledger or get_ledger()
+    flattened_data = flatten_invoice_row(invoice_data)
+    if ledger.append(flattened_data):
+        logger.info("GST data recorded in ledger %s", ledger.db_path)
+        return True
+    logger.info("Duplicate entry for invoice %s on %s skipped.", flattened_data['invoice_no'], flattened_data['date'])
+    return False
 
 # Example usage
 if __name__ == "__main__":
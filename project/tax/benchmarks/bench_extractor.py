@@ -0,0 +1,62 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.invoice_extractor import extract_invoice_fields
+
+GST_RATES = [9, 2.5, 6, 14]
+LINE_ITEMS = [
+    "Office chair ergonomic HSN 9401 Qty 2 Rate 4500.00 Amount 9000.00",
+    "Split AC installation SAC 998717 Qty 1 Rate 2500.00 Amount 2500.00",
+    "Printer cartridge HSN 8443 Qty 5 Rate 620.00 Amount 3100.00",
+    "Annual maintenance contract SAC 998713 Qty 1 Rate 12000.00 Amount 12000.00",
+]
+
+def make_invoice_text(pages, rate_lines, seed=0):
+    """
+    Build OCR-like text for a multi-page invoice with rate_lines CGST/SGST line pairs.
+    """
+    rng = random.Random(seed)
+    lines = ["Tax Invoice", "Invoice No 80XBOEZ0-8BP000 Date 26-02-25", "GSTIN 22AAAAA0000A1Z5"]
+    for page in range(pages):
+        lines.append(f"Page {page + 1} of {pages}")
+        lines.extend(rng.choice(LINE_ITEMS) for _ in range(40))
+    taxable = 0.0
+    for i in range(rate_lines):
+        rate = GST_RATES[i % len(GST_RATES)]
+        amount = round(rng.uniform(100, 5000), 2)
+        taxable += amount * 100 / rate
+        lines.append(f"CGST@{rate}% {amount:.2f}")
+        lines.append(f"SGST@{rate}% {amount:.2f}")
+    lines.append(f"Sub Total {taxable:.2f}")
+    lines.append(f"Grand Total: Rs. {taxable * 1.18:.2f}")
+    return "\n".join(lines)
+
+def run(pages, rate_lines, iterations):
+    text = make_invoice_text(pages, rate_lines)
+    extract_invoice_fields(text)  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        extract_invoice_fields(text)
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": pages,
+        "rate_lines": rate_lines,
+        "chars": len(text),
+        "invoices_per_sec": iterations / elapsed,
+        "ms_per_invoice": elapsed / iterations * 1000
+    }
+
+# Example usage: python benchmarks/bench_extractor.py --iterations 200
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark for the invoice field extractor.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    for pages, rate_lines in [(1, 2), (10, 20), (50, 100), (80, 400)]:
+        result = run(pages, rate_lines, args.iterations)
+        print(f"{result['pages']:>3} pages, {result['rate_lines']:>3} rate lines, {result['chars']:>7} chars: "
+              f"{result['invoices_per_sec']:>9.1f} invoices/sec ({result['ms_per_invoice']:.3f} ms/invoice)")
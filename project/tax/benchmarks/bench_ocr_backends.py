@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.ocr_backends import BACKENDS
+
+def make_page(lines=30, width=1700, height=2200):
+    """
+    Synthetic invoice page (A4 at ~200 DPI) with `lines` lines of invoice-like text.
+    """
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    text = ["TAX INVOICE", "Invoice No 80XBOEZ0-8BP000 Date 26-02-25", "GSTIN 22AAAAA0000A1Z5"]
+    text += [f"{n + 1}. Office chair ergonomic HSN 9401 Qty 2 Rate 4500.00 Amount 9000.00" for n in range(lines)]
+    text += ["CGST@9% 810.00", "SGST@9% 810.00", "Grand Total: Rs. 10620.00"]
+    try:
+        font = ImageFont.load_default(size=32)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font size
+        font = ImageFont.load_default()
+    for n, line in enumerate(text):
+        draw.text((100, 100 + n * 55), line, fill=0, font=font)
+    return image
+
+def run(backend_name, pages, iterations):
+    """
+    Per-page latency of one backend. The first call (engine start-up) is reported separately.
+    """
+    start = time.perf_counter()
+    backend = BACKENDS[backend_name]()
+    backend.image_to_string(pages[0])
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for _ in range(iterations):
+        for page in pages:
+            start = time.perf_counter()
+            backend.image_to_string(page)
+            latencies.append((time.perf_counter() - start) * 1000)
+    backend.close()
+    latencies.sort()
+    return {
+        "backend": backend_name,
+        "pages": len(latencies),
+        "cold_ms": cold_ms,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+# Example usage: python benchmarks/bench_ocr_backends.py --iterations 5 --images invoice1.png invoice2.png
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-page OCR latency of the pytesseract and tesserocr backends.")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--images", nargs="*", help="Page images to OCR (default: synthetic small and full pages)")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    pages = [Image.open(path) for path in args.images] if args.images else [make_page(lines=3), make_page(lines=30)]
+    for name in args.backends:
+        try:
+            result = run(name, pages, args.iterations)
+        except Exception as e:
+            print(f"{name:>12}: unavailable ({e})")
+            continue
+        print(f"{result['backend']:>12}: {result['pages']:>4} pages, cold start {result['cold_ms']:.0f} ms, "
+              f"mean {result['mean_ms']:.1f} ms, p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms per page")
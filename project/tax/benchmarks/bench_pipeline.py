@@ -0,0 +1,250 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Everything the pipeline writes (ledger, journal, OCR cache, reports) goes to a scratch
+# directory, so a run never touches real data and the OCR cache never short-circuits OCR
+WORK_DIR = tempfile.mkdtemp(prefix="bench_pipeline_")
+os.environ["GST_LEDGER_DB"] = os.path.join(WORK_DIR, "gst_ledger.db")
+os.environ["GSTR1_JOURNAL"] = os.path.join(WORK_DIR, "gst_data.jsonl")
+os.environ["OCR_CACHE_DIR"] = os.path.join(WORK_DIR, "ocr_cache")
+atexit.register(shutil.rmtree, WORK_DIR, ignore_errors=True)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from backend.app import (extract_text_from_pdf, parse_invoice_data, to_gst_json, append_to_json, append_to_excel,
+                         export_excel, export_json, process_invoice)
+from backend.ledger import InvoiceLedger
+from backend.gstr1_journal import GSTR1Journal
+from invoice_corpus import generate_corpus, load_corpus, LAYOUTS
+from portal_load import percentile
+
+HISTORY_FILE = os.path.join(BENCH_DIR, "results", "history.jsonl")
+# A benchmark regresses when its median slows down by more than this fraction against the
+# previous comparable run, or a field's extraction accuracy drops by more than ACCURACY_DROP
+DEFAULT_THRESHOLD = 0.2
+# Medians moving by less than this are timer noise, whatever the relative change
+NOISE_FLOOR_MS = 0.1
+ACCURACY_DROP = 0.01
+ACCURACY_FIELDS = ("invoice_no", "date", "taxable_value", "cgst_amount", "sgst_amount", "igst_amount", "total_amount")
+BENCHMARKS = ("extract_pdf", "parse", "to_gst_json", "writers", "process_invoice")
+END_TO_END_STAGES = "deductions,tax,validation,interaction,report,outputs"
+
+def summarize(samples_ms, units=None):
+    """
+    Latency percentiles (ms) of a list of per-call timings and the resulting throughput.
+    units counts the work items behind each sample (e.g. pages) for a per-unit rate.
+    """
+    ordered = sorted(samples_ms)
+    total = sum(ordered)
+    result = {
+        "count": len(ordered),
+        "mean_ms": total / len(ordered) if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50),
+        "p95_ms": percentile(ordered, 95),
+        "p99_ms": percentile(ordered, 99),
+        "per_sec": len(ordered) / (total / 1000) if total else 0.0
+    }
+    if units is not None:
+        result["units_per_sec"] = units / (total / 1000) if total else 0.0
+    return result
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return value, (time.perf_counter() - start) * 1000
+
+def _field_matches(expected, actual):
+    if isinstance(expected, float):
+        return isinstance(actual, (int, float)) and abs(actual - expected) <= 0.011
+    return actual == expected
+
+def bench_extract(corpus_dir, documents):
+    # Text-layer and scanned documents take different paths and are reported separately
+    samples, texts = {}, {}
+    for document in documents:
+        path = os.path.join(corpus_dir, document["file"])
+        text, elapsed = _timed(extract_text_from_pdf, path, use_cache=False)
+        key = "extract_pdf[text_layer]" if document["noise"] == 0 else "extract_pdf[scan]"
+        samples.setdefault(key, ([], [0]))
+        samples[key][0].append(elapsed)
+        samples[key][1][0] += document["pages"]
+        texts[document["file"]] = text
+    return {key: summarize(timings, units=pages[0]) for key, (timings, pages) in samples.items()}, texts
+
+def _repeated(func, arg, iterations):
+    # Calls taking microseconds are timed as a batch; the sample is the mean per call
+    start = time.perf_counter()
+    for _ in range(iterations):
+        value = func(arg)
+    return value, (time.perf_counter() - start) * 1000 / iterations
+
+def bench_parse(documents, texts, iterations):
+    timings, parsed = [], {}
+    for document in documents:
+        data, elapsed = _repeated(parse_invoice_data, texts[document["file"]], iterations)
+        timings.append(elapsed)
+        parsed[document["file"]] = data
+    return summarize(timings), parsed
+
+def accuracy(documents, parsed):
+    """
+    Share of documents whose parsed field equals the ground truth, per field.
+    """
+    hits = {field: 0 for field in ACCURACY_FIELDS}
+    for document in documents:
+        data = parsed.get(document["file"], {})
+        for field in ACCURACY_FIELDS:
+            hits[field] += _field_matches(document["truth"][field], data.get(field, 0.0 if field.endswith("_amount") else None))
+    return {field: round(count / len(documents), 4) for field, count in hits.items()} if documents else {}
+
+def bench_to_gst_json(parsed, iterations):
+    return summarize([_repeated(to_gst_json, data, iterations)[1] for data in parsed.values()])
+
+def bench_writers(parsed):
+    # Per-invoice appends to a fresh ledger and journal, then one export of each
+    ledger = InvoiceLedger(os.path.join(WORK_DIR, "writers_ledger.db"))
+    journal = GSTR1Journal(os.path.join(WORK_DIR, "writers_journal.jsonl"))
+    json_timings, excel_timings = [], []
+    for data in parsed.values():
+        json_timings.append(_timed(append_to_json, data, journal=journal)[1])
+        excel_timings.append(_timed(append_to_excel, data, ledger=ledger)[1])
+    results = {
+        "writers[append_json]": summarize(json_timings),
+        "writers[append_excel]": summarize(excel_timings),
+        "writers[export_excel]": summarize([_timed(export_excel, os.path.join(WORK_DIR, "export.xlsx"), ledger=ledger)[1]]),
+        "writers[export_json]": summarize([_timed(export_json, os.path.join(WORK_DIR, "export.json"), journal=journal)[1]])
+    }
+    ledger.close()
+    return results
+
+def bench_process_invoice(corpus_dir, documents):
+    # Headless run of every stage except reminders and the portal; reports land in WORK_DIR
+    timings = []
+    previous_dir = os.getcwd()
+    os.chdir(WORK_DIR)
+    try:
+        for document in documents:
+            path = os.path.join(corpus_dir, document["file"])
+            timings.append(_timed(process_invoice, path, stages=END_TO_END_STAGES, headless=True)[1])
+    finally:
+        os.chdir(previous_dir)
+    return summarize(timings, units=sum(document["pages"] for document in documents))
+
+def run(corpus_dir, selected=BENCHMARKS, iterations=20):
+    manifest = load_corpus(corpus_dir)
+    documents = manifest["documents"]
+    results, quality = {}, {}
+    extract_results, texts = bench_extract(corpus_dir, documents)
+    if "extract_pdf" in selected:
+        results.update(extract_results)
+    parse_result, parsed = bench_parse(documents, texts, iterations)
+    if "parse" in selected:
+        results["parse"] = parse_result
+    quality = accuracy(documents, parsed)
+    if "to_gst_json" in selected:
+        results["to_gst_json"] = bench_to_gst_json(parsed, iterations)
+    if "writers" in selected:
+        results.update(bench_writers(parsed))
+    if "process_invoice" in selected:
+        results["process_invoice"] = bench_process_invoice(corpus_dir, documents)
+    corpus = {key: manifest[key] for key in ("seed", "count", "layouts", "page_counts", "noise_levels")}
+    return {"corpus": corpus, "results": results, "accuracy": quality}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_history(record, path=HISTORY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+def find_regressions(record, history, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare a run with the latest earlier run on the same corpus and host. Returns
+    (baseline or None, [regression messages]).
+    """
+    baseline = next((previous for previous in reversed(history)
+                     if previous["corpus"] == record["corpus"] and previous.get("host") == record.get("host")), None)
+    if baseline is None:
+        return None, []
+    regressions = []
+    for name, result in record["results"].items():
+        before = baseline["results"].get(name)
+        if (before and before["p50_ms"] > 0 and result["p50_ms"] > before["p50_ms"] * (1 + threshold)
+                and result["p50_ms"] - before["p50_ms"] >= NOISE_FLOOR_MS):
+            regressions.append(f"{name}: p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms "
+                               f"({result['p50_ms'] / before['p50_ms'] - 1:+.0%})")
+    for field, share in record["accuracy"].items():
+        before = baseline["accuracy"].get(field)
+        if before is not None and share < before - ACCURACY_DROP:
+            regressions.append(f"accuracy {field}: {before:.1%} -> {share:.1%}")
+    return baseline, regressions
+
+def print_report(record, baseline):
+    print(f"{'benchmark':<28}{'n':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'per sec':>10}{'vs prev':>10}")
+    for name, result in sorted(record["results"].items()):
+        change = ""
+        before = baseline["results"].get(name) if baseline else None
+        if before and before["p50_ms"]:
+            change = f"{result['p50_ms'] / before['p50_ms'] - 1:+.0%}"
+        print(f"{name:<28}{result['count']:>6}{result['p50_ms']:>11.2f}{result['p95_ms']:>11.2f}"
+              f"{result['p99_ms']:>11.2f}{result['per_sec']:>10.1f}{change:>10}")
+    print("Field accuracy:", ", ".join(f"{field} {share:.0%}" for field, share in record["accuracy"].items()))
+
+# Example usage:
+#   python benchmarks/bench_pipeline.py                      # generate a corpus, run, record history
+#   python benchmarks/bench_pipeline.py --corpus corpus/ --fail-on-regression
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput/latency benchmarks of the invoice pipeline.")
+    parser.add_argument("--corpus", default=None, help="Corpus directory from invoice_corpus.py (default: generate one)")
+    parser.add_argument("--count", type=int, default=12, help="Invoices in a generated corpus")
+    parser.add_argument("--pages", default="1,3", help="Page counts of a generated corpus")
+    parser.add_argument("--noise", default="0,1", help="Noise levels of a generated corpus (0 = text layer)")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="Comma-separated benchmarks to run")
+    parser.add_argument("--iterations", type=int, default=20, help="Repetitions of the in-memory benchmarks")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSONL file runs are recorded in")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed p50 slowdown")
+    parser.add_argument("--no-record", action="store_true", help="Compare with history without appending this run")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on a regression")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    selected = tuple(name for name in args.only.split(",") if name)
+    corpus_dir = args.corpus
+    if corpus_dir is None:
+        corpus_dir = os.path.join(WORK_DIR, "corpus")
+        generate_corpus(corpus_dir, args.count, 0, LAYOUTS,
+                        tuple(int(n) for n in args.pages.split(",")), tuple(int(n) for n in args.noise.split(",")))
+    record = dict(run(corpus_dir, selected, args.iterations),
+                  timestamp=datetime.now().isoformat(timespec="seconds"), commit=_git_commit(),
+                  host=platform.node(), python=platform.python_version())
+    history = load_history(args.history)
+    baseline, regressions = find_regressions(record, history, args.threshold)
+    print_report(record, baseline)
+    if baseline:
+        print(f"Compared with {baseline['commit']} ({baseline['timestamp']})")
+    if not args.no_record:
+        append_history(record, args.history)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    sys.exit(1 if regressions and args.fail_on_regression else 0)
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import random
+import string
+import sys
+from datetime import date, timedelta
+import numpy as np
+from PIL import Image, ImageFilter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+# Layouts differ in where fields sit and how the tax summary is worded:
+#   classic - stacked header, item lines, intra-state CGST/SGST summary
+#   igst    - inter-state invoice with a single IGST amount
+#   table   - two-column header and gridded item table (exercises text-layer line grouping)
+LAYOUTS = ("classic", "igst", "table")
+# 0 is a digitally generated PDF with a text layer; higher levels are scans (image-only
+# pages) with increasing speckle, blur and skew, so they take the OCR path
+NOISE_LEVELS = (0, 1, 2)
+SCAN_DPI = 200
+
+ITEMS = [
+    ("Office chair ergonomic", "HSN 9401", 4500.00),
+    ("Split AC installation", "SAC 998717", 2500.00),
+    ("Printer cartridge", "HSN 8443", 620.00),
+    ("Annual maintenance contract", "SAC 998713", 12000.00),
+    ("LED monitor 24 inch", "HSN 8528", 9800.00),
+    ("Courier services", "SAC 996812", 350.00),
+]
+GST_RATES = (5, 12, 18, 28)
+ITEMS_PER_PAGE = 18
+
+def _invoice_no(rng):
+    alphabet = string.ascii_uppercase + string.digits
+    return "".join(rng.choices(alphabet, k=rng.randint(8, 12))) + "-" + "".join(rng.choices(alphabet, k=6))
+
+def make_invoice(rng, layout, pages):
+    """
+    Random invoice content and its ground truth (the fields parse_invoice_data extracts).
+    """
+    item_count = max(1, (pages - 1) * ITEMS_PER_PAGE + rng.randint(3, ITEMS_PER_PAGE - 4))
+    items = []
+    for _ in range(item_count):
+        name, code, price = rng.choice(ITEMS)
+        qty = rng.randint(1, 5)
+        items.append({"name": name, "code": code, "qty": qty, "rate": price, "amount": round(price * qty, 2)})
+    taxable = round(sum(item["amount"] for item in items), 2)
+    gst_rate = rng.choice(GST_RATES)
+    invoice_date = date(2025, 1, 1) + timedelta(days=rng.randint(0, 364))
+    truth = {
+        "invoice_no": _invoice_no(rng),
+        "date": invoice_date.strftime("%d-%m-%Y"),
+        "taxable_value": taxable,
+        "cgst_amount": 0.0,
+        "sgst_amount": 0.0,
+        "igst_amount": 0.0
+    }
+    if layout == "igst":
+        truth["igst_amount"] = round(taxable * gst_rate / 100, 2)
+        truth["igst_rate"] = gst_rate
+    else:
+        half = round(taxable * gst_rate / 200, 2)
+        truth["cgst_amount"] = truth["sgst_amount"] = half
+        truth["cgst_rate"] = truth["sgst_rate"] = gst_rate / 2
+    truth["total_amount"] = round(taxable + truth["cgst_amount"] + truth["sgst_amount"] + truth["igst_amount"], 2)
+    return {"layout": layout, "pages": pages, "items": items, "gst_rate": gst_rate, "truth": truth}
+
+def _summary_lines(invoice):
+    truth = invoice["truth"]
+    lines = [f"Taxable Value {truth['taxable_value']:.2f}"]
+    if invoice["layout"] == "igst":
+        lines += [f"IGST Amt {truth['igst_amount']:.2f}", f"Tax rate: IGST {invoice['gst_rate']}%"]
+    else:
+        rate = f"{truth['cgst_rate']:g}"
+        lines += [f"CGST@{rate}% {truth['cgst_amount']:.2f}", f"SGST@{rate}% {truth['sgst_amount']:.2f}"]
+    lines.append(f"Grand Total: Rs. {truth['total_amount']:.2f}")
+    return lines
+
+def _draw_header(pdf, invoice, layout, width, height):
+    truth = invoice["truth"]
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(40, height - 50, "Tax Invoice")
+    pdf.setFont("Helvetica", 10)
+    if layout == "table":
+        pdf.drawString(40, height - 80, "Sharma Office Supplies Pvt Ltd")
+        pdf.drawRightString(width - 40, height - 80, f"Invoice No {truth['invoice_no']}")
+        pdf.drawString(40, height - 95, "GSTIN 22AAAAA0000A1Z5")
+        pdf.drawRightString(width - 40, height - 95, f"Date {truth['date']}")
+    else:
+        pdf.drawString(40, height - 80, f"Invoice No {truth['invoice_no']}")
+        pdf.drawString(40, height - 95, f"Date {truth['date']}")
+        pdf.drawString(40, height - 110, "GSTIN 22AAAAA0000A1Z5")
+
+def render_pdf(invoice, path):
+    """
+    Draw the invoice with reportlab: header on the first page, items over all pages and the
+    tax summary at the end of the last one.
+    """
+    width, height = A4
+    pdf = canvas.Canvas(path, pagesize=A4)
+    pages = [invoice["items"][i:i + ITEMS_PER_PAGE] for i in range(0, len(invoice["items"]), ITEMS_PER_PAGE)]
+    for page_number, items in enumerate(pages, start=1):
+        if page_number == 1:
+            _draw_header(pdf, invoice, invoice["layout"], width, height)
+        top = height - 140
+        if invoice["layout"] == "table":
+            rows = [["Item", "HSN/SAC", "Qty", "Rate", "Amount"]]
+            rows += [[item["name"], item["code"], str(item["qty"]), f"{item['rate']:.2f}", f"{item['amount']:.2f}"] for item in items]
+            table = Table(rows, colWidths=[190, 90, 40, 80, 90])
+            table.setStyle(TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                                       ("FONTSIZE", (0, 0), (-1, -1), 9)]))
+            _, table_height = table.wrap(width, height)
+            table.drawOn(pdf, 40, top - table_height)
+            y = top - table_height - 30
+        else:
+            pdf.setFont("Helvetica", 10)
+            y = top
+            for number, item in enumerate(items, start=1):
+                pdf.drawString(40, y, f"{number}. {item['name']} {item['code']} Qty {item['qty']} "
+                                      f"Rate {item['rate']:.2f} Amount {item['amount']:.2f}")
+                y -= 16
+            y -= 14
+        pdf.setFont("Helvetica", 10)
+        pdf.drawString(40, 30, f"Page {page_number} of {len(pages)}")
+        if page_number == len(pages):
+            pdf.setFont("Helvetica-Bold", 11)
+            for line in _summary_lines(invoice):
+                pdf.drawString(width - 260, y, line)
+                y -= 18
+        pdf.showPage()
+    pdf.save()
+
+def degrade_to_scan(pdf_path, noise, seed=0):
+    """
+    Replace a rendered PDF with an image-only copy that looks scanned at the given noise
+    level: speckle, blur and a small skew. Needs poppler (pdf2image).
+    """
+    from pdf2image import convert_from_path
+    rng = np.random.default_rng(seed)
+    pages = []
+    for page in convert_from_path(pdf_path, dpi=SCAN_DPI, grayscale=True):
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels += rng.normal(0, 10 * noise, pixels.shape)
+        speckle = rng.random(pixels.shape) < 0.002 * noise
+        pixels[speckle] = 0
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        if noise >= 2:
+            image = image.filter(ImageFilter.GaussianBlur(0.8))
+        angle = float(rng.uniform(-0.8, 0.8)) * noise
+        pages.append(image.rotate(angle, fillcolor=255, expand=False))
+    pages[0].save(pdf_path, "PDF", resolution=SCAN_DPI, save_all=True, append_images=pages[1:])
+
+def generate_corpus(out_dir, count=24, seed=0, layouts=LAYOUTS, page_counts=(1, 3), noise_levels=(0, 1)):
+    """
+    Write count invoices to out_dir, cycling through every layout/page count/noise
+    combination, each as <name>.pdf with its ground truth in <name>.json, plus a
+    manifest.json describing the corpus. Returns the manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    combinations = [(layout, pages, noise) for layout in layouts for pages in page_counts for noise in noise_levels]
+    documents = []
+    for index in range(count):
+        layout, pages, noise = combinations[index % len(combinations)]
+        invoice = make_invoice(rng, layout, pages)
+        name = f"invoice_{index:04d}_{layout}_p{pages}_n{noise}"
+        pdf_path = os.path.join(out_dir, f"{name}.pdf")
+        render_pdf(invoice, pdf_path)
+        if noise:
+            degrade_to_scan(pdf_path, noise, seed=seed * 100003 + index)
+        with open(os.path.join(out_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(invoice["truth"], f, indent=2)
+        documents.append({"file": f"{name}.pdf", "layout": layout, "pages": pages, "noise": noise, "truth": invoice["truth"]})
+    manifest = {
+        "seed": seed,
+        "count": count,
+        "layouts": list(layouts),
+        "page_counts": list(page_counts),
+        "noise_levels": list(noise_levels),
+        "documents": documents
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_corpus(corpus_dir):
+    with open(os.path.join(corpus_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _int_list(value):
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+# Example usage: python benchmarks/invoice_corpus.py corpus/ --count 48 --pages 1,3,8 --noise 0,1,2
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic invoice corpus with ground truth.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layouts", default=",".join(LAYOUTS))
+    parser.add_argument("--pages", default="1,3", help="Comma-separated page counts")
+    parser.add_argument("--noise", default="0,1", help="Comma-separated noise levels (0 = text layer, 1-2 = scans)")
+    args = parser.parse_args()
+
+    layouts = tuple(layout for layout in args.layouts.split(",") if layout)
+    unknown = [layout for layout in layouts if layout not in LAYOUTS]
+    if unknown:
+        print(f"Unknown layout(s): {', '.join(unknown)}")
+        sys.exit(1)
+    manifest = generate_corpus(args.out_dir, args.count, args.seed, layouts, _int_list(args.pages), _int_list(args.noise))
+    print(f"Wrote {len(manifest['documents'])} invoice(s) to {os.path.abspath(args.out_dir)}")
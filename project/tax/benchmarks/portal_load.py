@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.gst_portal_simulator import DEFAULT_ENDPOINT, GSTPortalClient, simulate_gst_upload
+
+def make_gst_json(index, invoices=1):
+    """
+    Minimal valid GSTR-1 document with `invoices` single-item invoices.
+    """
+    return {
+        "gstin": "22AAAAA0000A1Z5",
+        "fp": "022025",
+        "b2b": [{
+            "inv": [{
+                "inum": f"LOAD-{index:06d}-{n:03d}",
+                "idt": "26-02-2025",
+                "val": 1180.0,
+                "pos": "22",
+                "rchrg": "N",
+                "etin": "",
+                "inv_typ": "R",
+                "itms": [{"num": 1, "itm_det": {"rt": 9.0, "txval": 1000.0, "iamt": 0.0, "camt": 90.0, "samt": 90.0, "csamt": 0.0}}]
+            } for n in range(invoices)]
+        }]
+    }
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def run(api_endpoint, clients, requests_per_client, invoices_per_request=1, max_retries=0):
+    """
+    Drive simulate_gst_upload from `clients` threads and return latency percentiles (ms) and throughput.
+    Retries are off by default so the numbers reflect the portal, not the client's backoff.
+    """
+    client = GSTPortalClient(api_endpoint, pool_size=clients, max_concurrency=clients, max_retries=max_retries)
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        for i in range(requests_per_client):
+            gst_json = make_gst_json(worker_id * requests_per_client + i, invoices_per_request)
+            start = time.perf_counter()
+            response = simulate_gst_upload(gst_json, client=client)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if response["status"] != "success":
+                    errors[response["message"]] = errors.get(response["message"], 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(worker, range(clients)))
+    wall = time.perf_counter() - start
+    client.close()
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "failed": sum(errors.values()),
+        "errors": errors,
+        "requests_per_sec": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0
+    }
+
+# Example usage (start the mock portal first: python mock_portal.py --latency-ms 50 --jitter-ms 20):
+#   python benchmarks/portal_load.py --clients 1 4 16 32 --requests 200
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the GST portal upload client.")
+    parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--invoices", type=int, default=1, help="Invoices per GSTR-1 payload")
+    parser.add_argument("--retries", type=int, default=0)
+    args = parser.parse_args()
+
+    for clients in args.clients:
+        result = run(args.endpoint, clients, args.requests, args.invoices, args.retries)
+        print(f"{result['clients']:>3} clients: {result['requests']:>6} requests, {result['failed']:>5} failed, "
+              f"{result['requests_per_sec']:>8.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+              f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+        for message, count in sorted(result["errors"].items(), key=lambda item: -item[1]):
+            print(f"      {count:>5} x {message}")
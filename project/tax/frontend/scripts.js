@@ -24,14 +24,35 @@ document.addEventListener('DOMContentLoaded', () => {
                 uploadStatus.textContent = `Error: ${data.error}`;
                 return;
             }
-            uploadStatus.textContent = 'Upload successful!';
-            displayInvoiceData(data.invoice_data);
-            displayDownloadLinks(data.outputs);
+            uploadStatus.textContent = 'Upload successful! Processing invoice...';
+            const job = await waitForJob(data.job_id);
+            if (job.status === 'failed') {
+                uploadStatus.textContent = `Error: ${job.error}`;
+                return;
+            }
+            uploadStatus.textContent = 'Invoice processed successfully!';
+            displayInvoiceData(job.result.invoice_data);
+            displayDownloadLinks();
         } catch (error) {
             uploadStatus.textContent = `Error uploading file: ${error.message}`;
         }
     }
 
+    async function waitForJob(jobId, intervalMs = 1000) {
+        while (true) {
+            const response = await fetch(`http://localhost:5000/jobs/${jobId}`);
+            const job = await response.json();
+            if (job.error && !job.status) {
+                throw new Error(job.error);
+            }
+            if (job.status === 'completed' || job.status === 'failed') {
+                return job;
+            }
+            uploadStatus.textContent = `Processing invoice (${job.stage || job.status})...`;
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
     function displayInvoiceData(data) {
         invoiceData.innerHTML = `
             <h3>Invoice Data</h3>
@@ -48,9 +69,13 @@ document.addEventListener('DOMContentLoaded', () => {
         `;
     }
 
-    function displayDownloadLinks(outputs) {
+    // Processed invoices are appended to the server's ledger and GSTR-1 journal;
+    // the exports are built from them on download
+    function displayDownloadLinks() {
         downloadLinks.innerHTML = `
             <h3>Download Outputs</h3>
+            <p><a href="http://localhost:5000/export/excel">Invoice ledger (Excel)</a></p>
+            <p><a href="http://localhost:5000/export/gstr1">GSTR-1 (JSON)</a></p>
             <p>Click the buttons below to download your reports:</p>
         `;
     }
@@ -64,7 +89,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 return;
             }
             displayInvoiceData(data.invoice_data);
-            displayDownloadLinks(data.outputs);
+            displayDownloadLinks();
             uploadStatus.textContent = 'Invoice processed successfully!';
         } catch (error) {
             uploadStatus.textContent = `Error processing invoice: ${error.message}`;
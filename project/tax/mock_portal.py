@@ -0,0 +1,165 @@
+import argparse
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import Flask, request, jsonify
+
+# Local stand-in for the GST portal's GSTR-1 save API.
+# Example usage: python mock_portal.py --port 5001 --latency-ms 80 --error-rate 0.02 --rate-limit 50
+
+app = Flask(__name__)
+
+GSTIN_PATTERN = re.compile(r"^\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]$")
+PLACEHOLDER_GSTIN = "YOUR_GSTIN_HERE"
+FP_PATTERN = re.compile(r"^(0[1-9]|1[0-2])\d{4}$")
+POS_PATTERN = re.compile(r"^\d{2}$")
+INVOICE_TYPES = {"R", "SEWP", "SEWOP", "DE", "CBW"}
+ITEM_AMOUNT_FIELDS = ("txval", "iamt", "camt", "samt", "csamt")
+
+config = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "error_rate": 0.0,
+    "rate_limit": 0.0,
+    "allow_placeholder_gstin": True
+}
+stats = {"requests": 0, "accepted": 0, "rejected": 0, "injected_errors": 0, "rate_limited": 0}
+stats_lock = threading.Lock()
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second with bursts of up to `rate` requests.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+bucket = None
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate_gstr1_payload(payload):
+    """
+    Check a GSTR-1 B2B payload against the portal's schema rules. Returns a list of errors.
+    """
+    if not isinstance(payload, dict):
+        return ["Payload must be a JSON object"]
+    errors = []
+    gstin = payload.get("gstin")
+    if not isinstance(gstin, str) or not (GSTIN_PATTERN.match(gstin) or (config["allow_placeholder_gstin"] and gstin == PLACEHOLDER_GSTIN)):
+        errors.append(f"gstin: invalid GSTIN {gstin!r}")
+    if not isinstance(payload.get("fp"), str) or not FP_PATTERN.match(payload["fp"]):
+        errors.append(f"fp: expected MMYYYY, got {payload.get('fp')!r}")
+    b2b = payload.get("b2b")
+    if not isinstance(b2b, list) or not b2b:
+        errors.append("b2b: must be a non-empty list")
+        return errors
+
+    for b, section in enumerate(b2b):
+        invoices = section.get("inv") if isinstance(section, dict) else None
+        if not isinstance(invoices, list) or not invoices:
+            errors.append(f"b2b[{b}].inv: must be a non-empty list")
+            continue
+        for i, inv in enumerate(invoices):
+            where = f"b2b[{b}].inv[{i}]"
+            if not isinstance(inv, dict):
+                errors.append(f"{where}: must be an object")
+                continue
+            inum = inv.get("inum")
+            if not isinstance(inum, str) or not 1 <= len(inum) <= 16:
+                errors.append(f"{where}.inum: must be 1-16 characters")
+            try:
+                datetime.strptime(inv.get("idt", ""), "%d-%m-%Y")
+            except (TypeError, ValueError):
+                errors.append(f"{where}.idt: expected dd-mm-yyyy, got {inv.get('idt')!r}")
+            if not _is_number(inv.get("val")):
+                errors.append(f"{where}.val: must be a number")
+            if not isinstance(inv.get("pos"), str) or not POS_PATTERN.match(inv["pos"]):
+                errors.append(f"{where}.pos: must be a 2-digit state code")
+            if inv.get("rchrg") not in ("Y", "N"):
+                errors.append(f"{where}.rchrg: must be Y or N")
+            if inv.get("inv_typ") not in INVOICE_TYPES:
+                errors.append(f"{where}.inv_typ: must be one of {sorted(INVOICE_TYPES)}")
+            items = inv.get("itms")
+            if not isinstance(items, list) or not items:
+                errors.append(f"{where}.itms: must be a non-empty list")
+                continue
+            for n, item in enumerate(items):
+                detail = item.get("itm_det") if isinstance(item, dict) else None
+                if not isinstance(item, dict) or not isinstance(item.get("num"), int) or not isinstance(detail, dict):
+                    errors.append(f"{where}.itms[{n}]: needs an integer num and an itm_det object")
+                    continue
+                if not _is_number(detail.get("rt")):
+                    errors.append(f"{where}.itms[{n}].itm_det.rt: must be a number")
+                for field in ITEM_AMOUNT_FIELDS:
+                    if not _is_number(detail.get(field)):
+                        errors.append(f"{where}.itms[{n}].itm_det.{field}: must be a number")
+    return errors
+
+def _count(key):
+    with stats_lock:
+        stats[key] += 1
+
+@app.route('/api/gstr1', methods=['POST'])
+def gstr1_endpoint():
+    _count("requests")
+    if bucket is not None and not bucket.acquire():
+        _count("rate_limited")
+        return jsonify({"status": "error", "message": "Rate limit exceeded"}), 429, {"Retry-After": "1"}
+
+    delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+    if delay > 0:
+        time.sleep(delay / 1000)
+    if config["error_rate"] and random.random() < config["error_rate"]:
+        _count("injected_errors")
+        return jsonify({"status": "error", "message": "Injected portal failure"}), 503
+
+    payload = request.get_json(silent=True)
+    errors = validate_gstr1_payload(payload)
+    if errors:
+        _count("rejected")
+        return jsonify({"status": "error", "message": "GSTR-1 validation failed", "errors": errors}), 422
+
+    _count("accepted")
+    invoices = sum(len(section["inv"]) for section in payload["b2b"])
+    return jsonify({"status": "accepted", "reference_id": uuid.uuid4().hex, "gstin": payload["gstin"],
+                    "fp": payload["fp"], "invoices": invoices}), 200
+
+@app.route('/api/stats', methods=['GET'])
+def stats_endpoint():
+    with stats_lock:
+        return jsonify(dict(stats, config=config)), 200
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local mock GST portal (GSTR-1 upload API).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s (0 = unlimited)")
+    parser.add_argument("--strict-gstin", action="store_true", help="Reject the YOUR_GSTIN_HERE placeholder")
+    args = parser.parse_args()
+
+    config.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                  rate_limit=args.rate_limit, allow_placeholder_gstin=not args.strict_gstin)
+    if args.rate_limit > 0:
+        bucket = TokenBucket(args.rate_limit)
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -1,15 +1,51 @@
+import hmac
+import io
+import json
 import sys
 import os
-from flask import Flask, request, send_file, jsonify
+import shutil
+import tempfile
+import uuid
+from flask import Flask, Response, request, send_file, jsonify
+from werkzeug.utils import secure_filename
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from backend.app import process_invoice
+from backend.app import export_excel, export_json, resolve_stages
+from backend.batch import is_supported_invoice, extract_invoice_archive
+from backend.job_queue import JobQueue
+from backend.invoice_source import spool_upload
+from backend.filing_reminder import reminder_service
+from backend.ocr_cache import ocr_cache
+from backend.parser_registry import parser_registry
+from backend.tax_calculator import ledger_period_liability, DEFAULT_ITC_RATE
+from backend.itc_reconciliation import reconcile_itc
+from backend.metrics import registry, configure_logging
+from backend.profiler import (PROFILE_HEADER, profile_trigger, profile_store, top_functions, folded_stacks,
+                              format_stats)
 
 app = Flask(__name__)
+configure_logging()
 
 UPLOAD_FOLDER = 'TaxAssistant/uploads'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# /admin endpoints and the X-Profile header require X-Admin-Token with this value; without
+# ADMIN_TOKEN they are disabled (profiling by PROFILE_SAMPLE_RATE still works)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+_job_queue = None
+
+def get_job_queue():
+    # Created lazily so the debug reloader's parent process never starts workers
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
+
+def _is_admin():
+    token = request.headers.get('X-Admin-Token')
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
 @app.route('/process-invoice', methods=['POST'])
 def process_invoice_endpoint():
     if 'invoice' not in request.files:
@@ -20,23 +56,86 @@ def process_invoice_endpoint():
     if not file.filename.lower().endswith(('.pdf', '.jpg', '.png')):
         return jsonify({"error": "Only PDF, JPG, or PNG files are accepted"}), 400
 
-    # Save the uploaded file temporarily
-    upload_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(upload_path)
+    # Headless pipeline options: additional ITC/expenses come from the form or a defaults profile
+    user_inputs = {
+        "additional_itc": request.form.get('additional_itc', type=float),
+        "additional_expenses": request.form.get('additional_expenses', type=float)
+    }
+    profile = request.form.get('profile')
+    stages = request.form.get('stages')
+    try:
+        resolve_stages(stages)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Keep the upload in a private spooled buffer (memory, or an anonymous temporary file when
+    # large); the job worker closes it when done, whatever the outcome. With JOB_STORE=sqlite the
+    # queue writes it to a file first, so the job can be resumed after a restart
+    upload = spool_upload(file.stream)
+    # Opt-in profiling: X-Profile on the request, or PROFILE_SAMPLE_RATE of all requests
+    profiler = profile_trigger(request.headers.get(PROFILE_HEADER) if _is_admin() else None)
 
     try:
-        # Process the invoice
-        result = process_invoice(upload_path)
-        if "error" in result:
-            return jsonify(result), 400
+        job_id = get_job_queue().submit(upload, file_name=file.filename, stages=stages,
+                                        user_inputs=user_inputs, profile=profile, profiler=profiler)
+    except Exception as e:
+        upload.close()
+        return jsonify({"error": f"Could not queue invoice: {str(e)}"}), 500
+
+    response = {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+    if profiler:
+        response["profile_url"] = f"/admin/profiles/{job_id}"
+    return jsonify(response), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs_endpoint():
+    limit = request.args.get('limit', default=50, type=int)
+    return jsonify({"jobs": get_job_queue().list(limit)}), 200
 
-        # Clean up temporary file
-        if os.path.exists(upload_path):
-            os.remove(upload_path)
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_endpoint(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
 
-        return jsonify(result), 200
+@app.route('/process-invoices', methods=['POST'])
+def process_invoices_bulk_endpoint():
+    files = request.files.getlist('invoices')
+    if not files or all(f.filename == '' for f in files):
+        return jsonify({"error": "No files provided"}), 400
+
+    # Each bulk request gets its own directory so concurrent uploads never collide; once
+    # queued, the batch job owns it and removes it when done
+    batch_dir = tempfile.mkdtemp(prefix="bulk_", dir=UPLOAD_FOLDER)
+    try:
+        file_paths = []
+        for index, file in enumerate(files):
+            filename = secure_filename(file.filename)
+            if not filename:
+                continue
+            upload_path = os.path.join(batch_dir, f"{index}_{filename}")
+            if filename.lower().endswith('.zip'):
+                file.save(upload_path)
+                file_paths.extend(extract_invoice_archive(upload_path, os.path.join(batch_dir, f"{index}_archive")))
+            elif is_supported_invoice(filename):
+                file.save(upload_path)
+                file_paths.append(upload_path)
+        if not file_paths:
+            shutil.rmtree(batch_dir, ignore_errors=True)
+            return jsonify({"error": "Only PDF, JPG, PNG or ZIP files are accepted"}), 400
+
+        workers = request.form.get('workers', type=int)
+        upload = request.form.get('upload', '').lower() in ('1', 'true', 'yes')
+        job_id = get_job_queue().submit_batch(batch_dir, file_paths, workers=workers,
+                                              profile=request.form.get('profile'), upload=upload)
     except Exception as e:
-        return jsonify({"error": f"Processing error: {str(e)}"}), 500
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        return jsonify({"error": f"Could not queue invoices: {str(e)}"}), 500
+
+    # The batch summary becomes the job's result
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}",
+                    "files": len(file_paths)}), 202
 
 @app.route('/download-report/<format>/<filename>', methods=['GET'])
 def download_report_endpoint(format, filename):
@@ -49,5 +148,129 @@ def download_report_endpoint(format, filename):
     except Exception as e:
         return jsonify({"error": f"Download error: {str(e)}"}), 500
 
+def _send_export(export, download_name):
+    # Exports are built per download from the ledger/journal into a unique temporary file
+    export_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{download_name}")
+    try:
+        export(export_path)
+        with open(export_path, "rb") as f:
+            content = io.BytesIO(f.read())
+    except Exception as e:
+        return jsonify({"error": f"Export error: {str(e)}"}), 500
+    finally:
+        if os.path.exists(export_path):
+            os.remove(export_path)
+    return send_file(content, as_attachment=True, download_name=download_name)
+
+@app.route('/export/excel', methods=['GET'])
+def export_excel_endpoint():
+    return _send_export(export_excel, "gst_data.xlsx")
+
+@app.route('/export/gstr1', methods=['GET'])
+def export_gstr1_endpoint():
+    gstin = request.args.get('gstin')
+    fp = request.args.get('fp')
+    return _send_export(lambda path: export_json(path, gstin=gstin, fp=fp), "gst_data.json")
+
+# Period-level (GSTR-3B) liability over the ledger; ?period=MMYYYY&itc_rate=0.18
+@app.route('/tax/liability', methods=['GET'])
+def tax_liability_endpoint():
+    try:
+        itc_rate = float(request.args.get('itc_rate', DEFAULT_ITC_RATE))
+    except ValueError:
+        return jsonify({"error": "itc_rate must be a number"}), 400
+    try:
+        summary, by_rate = ledger_period_liability(period=request.args.get('period'), itc_rate=itc_rate)
+    except Exception as e:
+        return jsonify({"error": f"Calculation error: {str(e)}"}), 500
+    # to_json converts NumPy scalars, which jsonify cannot serialise
+    return jsonify({"periods": json.loads(summary.to_json(orient="records")),
+                    "by_rate": json.loads(by_rate.to_json(orient="records"))}), 200
+
+# Match a purchase register (xlsx/csv/json) against a GSTR-2B JSON dump.
+# Returns the status counts and the rows that are not a clean match (at most ?limit=1000).
+@app.route('/reconcile-itc', methods=['POST'])
+def reconcile_itc_endpoint():
+    register_file = request.files.get('purchase_register')
+    gstr2b_file = request.files.get('gstr2b')
+    if not register_file or not gstr2b_file or not register_file.filename or not gstr2b_file.filename:
+        return jsonify({"error": "Both purchase_register and gstr2b files are required"}), 400
+    register_name = secure_filename(register_file.filename)
+    if not register_name.lower().endswith(('.xlsx', '.xls', '.csv', '.json')):
+        return jsonify({"error": "purchase_register must be an XLSX, CSV or JSON file"}), 400
+    limit = request.args.get('limit', default=1000, type=int)
+
+    register_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{register_name}")
+    try:
+        register_file.save(register_path)
+        gstr2b = json.load(gstr2b_file.stream)
+        results, summary = reconcile_itc(register_path, gstr2b)
+    except (ValueError, KeyError, AttributeError) as e:
+        return jsonify({"error": f"Invalid reconciliation input: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Reconciliation error: {str(e)}"}), 500
+    finally:
+        if os.path.exists(register_path):
+            os.remove(register_path)
+
+    mismatches = results[results["status"] != "matched"]
+    return jsonify(dict(summary, mismatches=json.loads(mismatches.head(limit).to_json(orient="records")),
+                        mismatches_truncated=len(mismatches) > limit)), 200
+
+@app.route('/reminders', methods=['GET'])
+def reminders_endpoint():
+    return jsonify({"deadlines": reminder_service.deadlines()}), 200
+
+@app.route('/parsers/stats', methods=['GET'])
+def parser_stats_endpoint():
+    return jsonify(parser_registry.stats()), 200
+
+@app.route('/ocr-cache/stats', methods=['GET'])
+def ocr_cache_stats_endpoint():
+    return jsonify(ocr_cache.stats()), 200
+
+# Pipeline stage latencies and counters of this process in the Prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+# Profiles of recent profiled jobs, newest first; storage is bounded (PROFILE_MAX_ENTRIES/BYTES)
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles_endpoint():
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(dict(profile_store.summary(), items=profile_store.list())), 200
+
+# One job's profile. ?format=json (top functions with their callees, ?sort=cumulative|tottime,
+# ?limit=30), text (pstats report), folded (stacks for flamegraph.pl/speedscope) or pstats
+# (.prof file for snakeviz, flameprof or python -m pstats)
+@app.route('/admin/profiles/<job_id>', methods=['GET'])
+def profile_endpoint(job_id):
+    if not _is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    info = profile_store.info(job_id)
+    if info is None:
+        job = get_job_queue().get(job_id)
+        if job and job["options"].get("profiler") and job["status"] in ("queued", "running"):
+            return jsonify({"error": "Profile not ready", "status": job["status"]}), 404
+        return jsonify({"error": "Profile not found"}), 404
+
+    output_format = request.args.get('format', 'json')
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime'):
+        return jsonify({"error": "sort must be cumulative or tottime"}), 400
+    limit = request.args.get('limit', default=30, type=int)
+    if output_format == 'pstats':
+        return send_file(io.BytesIO(profile_store.raw(job_id)), as_attachment=True,
+                         download_name=f"{job_id}.prof", mimetype="application/octet-stream")
+    stats = profile_store.stats(job_id)
+    if output_format == 'folded':
+        return Response(folded_stacks(stats), mimetype="text/plain; charset=utf-8")
+    if output_format == 'text':
+        return Response(format_stats(stats, limit=limit, sort=sort), mimetype="text/plain; charset=utf-8")
+    if output_format != 'json':
+        return jsonify({"error": "format must be json, text, folded or pstats"}), 400
+    return jsonify(dict(info, functions=top_functions(stats, limit=limit, sort=sort))), 200
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
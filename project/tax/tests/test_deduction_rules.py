@@ -0,0 +1,40 @@
+import pytest
+from backend.deduction_rules import DeductionRuleEngine
+from backend.hsn_master import HSNMaster, build_index
+
+MASTER_RULES = [{"name": "itc_from_hsn_master", "category": "input_tax_credit", "note": "ITC for {code}: {amount}"}]
+
+@pytest.fixture
+def master(tmp_path):
+    csv_path = tmp_path / "hsn_master.csv"
+    csv_path.write_text(
+        "HSN Code,GST Rate,Description,ITC Eligible\n"
+        "9401,18,Seats,yes\n"
+        "8443,18,Printers,yes\n"
+        "2203,28,Beer,no\n"
+    )
+    build_index(str(csv_path), str(tmp_path / "hsn_master.idx"))
+    master = HSNMaster(str(tmp_path / "hsn_master.idx"))
+    yield master
+    master.close()
+
+RAW_TEXT = (
+    "1. Office chair HSN 9401 Qty 2 Amount 9000.00\n"
+    "2. Office chair HSN 9401 Qty 1 Amount 4500.00\n"
+    "3. Printer cartridge HSN 8443 Qty 3 Amount 1860.00\n"
+    "4. Beer HSN 2203 Qty 1 Amount 640.00\n"
+)
+
+def test_multi_line_invoice_is_credited_its_tax_once(master):
+    engine = DeductionRuleEngine(master_rules=MASTER_RULES, master=master)
+    invoice = {"taxable_value": 16000.0, "cgst_amount": 1440.0, "sgst_amount": 1440.0, "raw_text": RAW_TEXT}
+    deductions = engine.evaluate(invoice)
+    # Three distinct codes, two of them eligible: two thirds of the invoice's tax
+    assert deductions["input_tax_credit"] == pytest.approx(2880.0 * 2 / 3)
+    assert len(deductions["deduction_notes"]) == 2
+
+def test_without_extracted_tax_the_taxable_value_is_split(master):
+    engine = DeductionRuleEngine(master_rules=MASTER_RULES, master=master)
+    deductions = engine.evaluate({"taxable_value": 16000.0, "raw_text": RAW_TEXT})
+    assert deductions["input_tax_credit"] == pytest.approx(16000.0 / 3 * 0.18 * 2)
+    assert deductions["input_tax_credit"] < 16000.0 * 0.18
@@ -0,0 +1,115 @@
+import requests
+
+from backend.gst_portal_simulator import GSTPortalClient
+
+
+class StubResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.headers = {}
+        self._body = body if body is not None else {"ok": True}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return self._body
+
+
+class StubSession:
+    """
+    Stands in for requests.Session: each post() takes the next outcome, raising it when it
+    is an exception.
+    """
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.calls.append({"json": json, "headers": headers})
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
+
+
+def make_client(outcomes, **kwargs):
+    client = GSTPortalClient("http://portal.test/api/gstr1", backoff_base=0, **kwargs)
+    client.session = StubSession(outcomes)
+    return client
+
+
+def gst_json(gstin, fp, *invoice_numbers):
+    return {"gstin": gstin, "fp": fp, "b2b": [{"inv": [{"inum": number} for number in invoice_numbers]}]}
+
+
+def test_connection_errors_are_retried():
+    client = make_client([requests.ConnectionError("refused"), requests.ConnectTimeout("slow"), StubResponse()])
+    response = client.upload(gst_json("GSTIN1", "022025", "A1"))
+    assert response["status"] == "success"
+    assert len(client.session.calls) == 3
+
+
+def test_connection_errors_give_up_after_max_retries():
+    client = make_client([requests.ConnectionError("refused")] * 3, max_retries=2)
+    response = client.upload(gst_json("GSTIN1", "022025", "A1"))
+    assert response["status"] == "error"
+    assert len(client.session.calls) == 3
+
+
+def test_read_timeout_without_idempotency_key_is_not_retried():
+    client = make_client([requests.ReadTimeout("no response"), StubResponse()])
+    response = client.upload(gst_json("GSTIN1", "022025", "A1"))
+    assert response["status"] == "unknown"
+    assert len(client.session.calls) == 1
+
+
+def test_read_timeout_with_idempotency_key_is_retried():
+    client = make_client([requests.ReadTimeout("no response"), StubResponse()])
+    payload = dict(gst_json("GSTIN1", "022025", "A1"), idempotency_key="upload-1")
+    response = client.upload(payload)
+    assert response["status"] == "success"
+    assert [call["headers"] for call in client.session.calls] == [{"Idempotency-Key": "upload-1"}] * 2
+
+
+def test_retry_statuses_are_retried():
+    client = make_client([StubResponse(503), StubResponse(429), StubResponse()])
+    assert client.upload(gst_json("GSTIN1", "022025", "A1"))["status"] == "success"
+    assert len(client.session.calls) == 3
+
+
+def test_coalesce_merges_per_gstin_and_period_in_order():
+    documents = GSTPortalClient.coalesce([
+        gst_json("GSTIN1", "022025", "A1"),
+        gst_json("GSTIN2", "022025", "B1"),
+        gst_json("GSTIN1", "022025", "A2"),
+        gst_json("GSTIN1", "032025", "C1"),
+    ])
+    assert [(d["gstin"], d["fp"], [i["inum"] for i in d["b2b"][0]["inv"]]) for d in documents] == [
+        ("GSTIN1", "022025", ["A1", "A2"]),
+        ("GSTIN2", "022025", ["B1"]),
+        ("GSTIN1", "032025", ["C1"]),
+    ]
+
+
+def test_submit_batch_splits_payloads_by_batch_size():
+    client = make_client([StubResponse() for _ in range(3)], max_concurrency=1)
+    results = client.submit_batch([gst_json("GSTIN1", "022025", "A1", "A2", "A3"), gst_json("GSTIN2", "022025", "B1")],
+                                  batch_size=2)
+    assert [(r["gstin"], r["invoices"], r["status"]) for r in results] == [
+        ("GSTIN1", 2, "success"), ("GSTIN1", 1, "success"), ("GSTIN2", 1, "success")
+    ]
+    assert [[i["inum"] for i in call["json"]["b2b"][0]["inv"]] for call in client.session.calls] == [
+        ["A1", "A2"], ["A3"], ["B1"]
+    ]
+
+
+def test_submit_batch_without_invoices_sends_nothing():
+    client = make_client([])
+    assert client.submit_batch([]) == []
+    assert client.session.calls == []
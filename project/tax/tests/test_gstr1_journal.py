@@ -0,0 +1,36 @@
+import json
+
+from backend.gstr1_journal import GSTR1Journal
+
+
+def gst_json(*invoices, gstin="27AAACA1234A1Z5", fp="022025"):
+    return {"gstin": gstin, "fp": fp, "b2b": [{"inv": [{"inum": inum, "idt": idt, "val": val} for inum, idt, val in invoices]}]}
+
+
+def test_append_skips_invoices_already_journalled(tmp_path):
+    journal = GSTR1Journal(str(tmp_path / "gst_data.jsonl"))
+    assert journal.append(gst_json(("1234-01", "01-02-2025", 100.0), ("1234-02", "01-02-2025", 200.0))) == 2
+    assert journal.append_many([
+        gst_json(("1234-01", "01-02-2025", 999.0)),
+        gst_json(("1234-01", "02-02-2025", 300.0), ("1234-03", "01-02-2025", 400.0), ("1234-03", "01-02-2025", 400.0)),
+    ]) == 2
+    # A fresh instance (e.g. after a restart) reads the existing keys from the file
+    assert GSTR1Journal(journal.path).append(gst_json(("1234-02", "01-02-2025", 200.0))) == 0
+    assert journal.count() == 4
+
+
+def test_export_keeps_the_first_of_duplicates_written_elsewhere(tmp_path):
+    path = tmp_path / "gst_data.jsonl"
+    entry = {"gstin": "27AAACA1234A1Z5", "fp": "022025"}
+    with open(path, "w", encoding="utf-8") as f:
+        for inv in ({"inum": "1234-01", "idt": "01-02-2025", "val": 100.0},
+                    {"inum": "1234-01", "idt": "01-02-2025", "val": 999.0},
+                    {"inum": "", "idt": "01-02-2025", "val": 1.0},
+                    {"inum": "", "idt": "01-02-2025", "val": 2.0}):
+            f.write(json.dumps(dict(entry, inv=inv)) + "\n")
+    journal = GSTR1Journal(str(path))
+    output = tmp_path / "gst_data.json"
+    assert journal.export(str(output)) == 3
+    with open(output, encoding="utf-8") as f:
+        exported = json.load(f)
+    assert [inv["val"] for inv in exported["b2b"][0]["inv"]] == [100.0, 1.0, 2.0]
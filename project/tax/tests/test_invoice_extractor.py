@@ -0,0 +1,18 @@
+from backend.invoice_extractor import extract_invoice_fields
+
+
+def test_cgst_and_sgst_lines_are_kept_apart():
+    text = "Invoice 2024-01\nTaxable Value 1000.00\nCGST@9% 90.00\nSGST@9% 90.00\nTotal 1180.00"
+    data = extract_invoice_fields(text)
+    assert data["cgst_amount"] == 90.0
+    assert data["sgst_amount"] == 90.0
+    assert data["tax_details"]["cgst"] == [{"rate": 9.0, "amount": 90.0}]
+    assert data["tax_details"]["sgst"] == [{"rate": 9.0, "amount": 90.0}]
+
+
+def test_multiple_rates_are_summed_per_head():
+    text = "CGST@6% 60.00\nSGST@6% 60.00\nCGST@9% 45.00\nSGST@9% 45.00"
+    data = extract_invoice_fields(text)
+    assert data["cgst_amount"] == 105.0
+    assert data["sgst_amount"] == 105.0
+    assert data["cgst_rate"] == 6.0
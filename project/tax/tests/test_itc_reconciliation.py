@@ -0,0 +1,32 @@
+from backend.itc_reconciliation import reconcile_itc
+
+GSTIN = "27AAAAA0000A1Z5"
+
+def _gstr2b(*invoices):
+    return {"data": {"docdata": {"b2b": [{"ctin": GSTIN, "trdnm": "Supplier", "inv": list(invoices)}]}}}
+
+def test_integer_amount_csv_register(tmp_path):
+    register = tmp_path / "register.csv"
+    register.write_text(
+        "supplier_gstin,invoice_no,date,taxable_value,igst,cgst,sgst\n"
+        f"{GSTIN},INV-1,01-04-2025,1000,0,90,90\n"
+        f"{GSTIN},INV-X,02-04-2025,700,0,63,63\n"
+    )
+    gstr2b = _gstr2b(
+        {"inum": "INV-1", "dt": "01-04-2025", "val": 1180.0, "txval": 1000.0, "cgst": 90.0, "sgst": 90.0},
+        {"inum": "OTHER-9", "dt": "02-04-2025", "val": 826.0, "txval": 700.0, "cgst": 63.0, "sgst": 63.0}
+    )
+    results, summary = reconcile_itc(str(register), gstr2b)
+    assert summary["counts"]["matched"] == 1
+    assert summary["counts"]["probable_match"] == 1
+    assert len(results) == 2
+
+def test_blank_invoice_numbers_are_not_matched_by_number():
+    register = [{"supplier_gstin": GSTIN, "invoice_no": "", "date": "01-04-2025",
+                 "taxable_value": 1000.0, "cgst": 90.0, "sgst": 90.0}]
+    gstr2b = _gstr2b({"inum": "", "dt": "01-04-2025", "val": 5900.0, "txval": 5000.0, "cgst": 450.0, "sgst": 450.0})
+    _, summary = reconcile_itc(register, gstr2b)
+    assert summary["counts"]["matched"] == 0
+    assert summary["counts"]["amount_mismatch"] == 0
+    assert summary["counts"]["missing_in_2b"] == 1
+    assert summary["counts"]["missing_in_register"] == 1
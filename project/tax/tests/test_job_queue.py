@@ -0,0 +1,97 @@
+import io
+import os
+import threading
+
+from backend import job_queue
+from backend.job_queue import JobQueue, SQLiteJobStore
+
+PDF_BYTES = b"%PDF-1.4\nfake invoice\n"
+
+
+def wait_for(queue, job_id, status):
+    for _ in range(200):
+        job = queue.store.get(job_id)
+        if job["status"] == status:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {job}")
+
+
+def test_sqlite_store_persists_in_memory_uploads(tmp_path, monkeypatch):
+    seen = {}
+
+    def fake_process_invoice(file_path, **kwargs):
+        with open(file_path, "rb") as handle:
+            seen["data"] = handle.read()
+        seen["path"] = file_path
+        return {"invoice_no": "1234-01"}, {}
+
+    monkeypatch.setattr(job_queue, "process_invoice", fake_process_invoice)
+    queue = JobQueue(store=SQLiteJobStore(str(tmp_path / "jobs.db")), workers=1)
+    upload = io.BytesIO(PDF_BYTES)
+    job_id = queue.submit(upload, file_name="invoice.pdf")
+    wait_for(queue, job_id, "completed")
+    queue.shutdown()
+
+    assert upload.closed
+    assert seen["data"] == PDF_BYTES
+    assert os.path.dirname(seen["path"]) == str(tmp_path / "job_uploads")
+    assert seen["path"].endswith(".pdf")
+    assert not os.path.exists(seen["path"])
+
+
+def test_queued_upload_is_resumed_after_restart(tmp_path, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked_process_invoice(file_path, **kwargs):
+        started.set()
+        release.wait(5)
+        return {}, {}
+
+    db_path = str(tmp_path / "jobs.db")
+    monkeypatch.setattr(job_queue, "process_invoice", blocked_process_invoice)
+    first = JobQueue(store=SQLiteJobStore(db_path), workers=1)
+    job_id = first.submit(io.BytesIO(PDF_BYTES), file_name="invoice.pdf")
+    assert started.wait(5)
+
+    # A second queue on the same database stands in for the restarted server
+    seen = {}
+
+    def fake_process_invoice(file_path, **kwargs):
+        with open(file_path, "rb") as handle:
+            seen["data"] = handle.read()
+        return {"invoice_no": "1234-01"}, {}
+
+    monkeypatch.setattr(job_queue, "process_invoice", fake_process_invoice)
+    second = JobQueue(store=SQLiteJobStore(db_path), workers=1)
+    wait_for(second, job_id, "completed")
+    second.shutdown()
+    release.set()
+    first.shutdown()
+
+    assert seen["data"] == PDF_BYTES
+
+
+def test_batch_job_reports_summary_and_removes_its_directory(tmp_path, monkeypatch):
+    batch_dir = tmp_path / "bulk"
+    (batch_dir / "0_archive").mkdir(parents=True)
+    paths = [str(batch_dir / "0_archive" / "a.pdf"), str(batch_dir / "1_b.png")]
+    for path in paths:
+        open(path, "wb").close()
+    calls = {}
+
+    def fake_process_batch(file_paths, workers=None, profile=None, upload=False):
+        calls.update(file_paths=file_paths, workers=workers, upload=upload)
+        return {"total": len(file_paths), "processed": len(file_paths), "failed": 0,
+                "results": [{"file": path, "invoice_data": {}} for path in file_paths]}
+
+    monkeypatch.setattr(job_queue, "process_batch", fake_process_batch)
+    queue = JobQueue(store=SQLiteJobStore(str(tmp_path / "jobs.db")), workers=1)
+    job_id = queue.submit_batch(str(batch_dir), paths, workers=2, upload=True)
+    job = wait_for(queue, job_id, "completed")
+    queue.shutdown()
+
+    assert calls == {"file_paths": paths, "workers": 2, "upload": True}
+    assert [result["file"] for result in job["result"]["results"]] == [os.path.join("0_archive", "a.pdf"), "1_b.png"]
+    assert not batch_dir.exists()
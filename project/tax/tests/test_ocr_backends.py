@@ -0,0 +1,76 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from backend.ocr_backends import TesserocrBackend
+
+
+class FakeAPI:
+    live = 0
+    fail_next = False
+    lock = threading.Lock()
+
+    def __init__(self, lang="eng", path=None):
+        # Slow enough that racing callers overlap in the constructor
+        time.sleep(0.01)
+        with FakeAPI.lock:
+            if FakeAPI.fail_next:
+                FakeAPI.fail_next = False
+                raise RuntimeError("could not load model")
+            FakeAPI.live += 1
+
+    def SetPageSegMode(self, psm):
+        pass
+
+    def SetImage(self, image):
+        pass
+
+    def GetUTF8Text(self):
+        time.sleep(0.005)
+        return "text"
+
+    def Clear(self):
+        pass
+
+    def End(self):
+        pass
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    FakeAPI.live = 0
+    FakeAPI.fail_next = False
+    module = types.SimpleNamespace(PyTessBaseAPI=FakeAPI, tesseract_version=lambda: "tesseract 5.3.0", __version__="2.7.0")
+    monkeypatch.setitem(sys.modules, "tesserocr", module)
+    return module
+
+
+def test_concurrent_calls_never_exceed_pool_size(fake_tesserocr):
+    backend = TesserocrBackend(pool_size=2)
+    threads = [threading.Thread(target=backend.image_to_string, args=(None,)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeAPI.live <= 2
+    assert backend._created == FakeAPI.live
+
+
+def test_failed_handle_releases_its_slot(fake_tesserocr):
+    backend = TesserocrBackend(pool_size=2)
+    first = backend._acquire()
+    FakeAPI.fail_next = True
+    with pytest.raises(RuntimeError):
+        backend._acquire()
+    assert backend._created == 1
+    # The slot is free again, so a new handle is created instead of waiting forever
+    second = backend._acquire()
+    assert second is not first
+    assert backend._created == 2
+
+
+def test_version_names_binding_and_library(fake_tesserocr):
+    assert TesserocrBackend(pool_size=1).version() == "2.7.0/tesseract 5.3.0"
@@ -0,0 +1,32 @@
+from backend.ocr_cache import OCRCache
+
+
+class StubBackend:
+    def __init__(self, name, version, lang="eng"):
+        self.name = name
+        self._version = version
+        self.lang = lang
+
+    def version(self):
+        return self._version
+
+
+def test_key_depends_on_ocr_backend_and_version(tmp_path):
+    cache = OCRCache(cache_dir=str(tmp_path))
+    keys = {
+        cache.make_key("abc", dpi=200, backend=StubBackend("pytesseract", "5.3.0")),
+        cache.make_key("abc", dpi=200, backend=StubBackend("pytesseract", "5.4.1")),
+        cache.make_key("abc", dpi=200, backend=StubBackend("tesserocr", "2.6.0/tesseract 5.3.0")),
+        cache.make_key("abc", dpi=200, backend=StubBackend("tesserocr", "2.7.0/tesseract 5.3.0")),
+        cache.make_key("abc", dpi=200, backend=StubBackend("tesserocr", "2.7.0/tesseract 5.3.0", lang="hin")),
+    }
+    assert len(keys) == 5
+
+
+def test_key_is_stable_for_the_same_backend(tmp_path):
+    cache = OCRCache(cache_dir=str(tmp_path))
+    backend = StubBackend("tesserocr", "2.7.0/tesseract 5.3.0")
+    assert cache.make_key("abc", psm=6, variant="page-1", backend=backend) == \
+        cache.make_key("abc", psm=6, variant="page-1", backend=backend)
+    assert cache.make_key("abc", psm=6, variant="page-1", backend=backend) != \
+        cache.make_key("abc", psm=6, variant="page-2", backend=backend)
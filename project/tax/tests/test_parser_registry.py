@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from backend.parser_registry import ParserRegistry, VendorTemplate
+
+TEXT = "ACME TRADERS\nInvoice No INV-42\nInvoice Total N/A\n"
+
+def _generic(text):
+    return {"invoice_no": "generic", "total_amount": 0.0}
+
+def test_unparseable_capture_falls_back_to_generic_parser():
+    registry = ParserRegistry(generic_parser=_generic)
+    registry.register(VendorTemplate("acme", header_tokens=["ACME", "TRADERS"], fields={
+        "invoice_no": r"Invoice\s*No\s*([A-Z0-9\-]+)",
+        "total_amount": r"Invoice\s*Total\s*(\S+)"
+    }))
+    data, parser = registry.parse(TEXT)
+    assert parser == ParserRegistry.GENERIC
+    assert data["invoice_no"] == "generic"
+    assert registry.stats()["parsers"]["acme"]["fallbacks"] == 1
+
+def test_template_extracts_parseable_captures():
+    template = VendorTemplate("acme", header_tokens=["ACME"], fields={
+        "invoice_no": r"Invoice\s*No\s*([A-Z0-9\-]+)",
+        "total_amount": r"Invoice\s*Total\s*([\d,]+\.\d{2})"
+    })
+    data = template.extract(TEXT.replace("N/A", "1,180.00"))
+    assert data["invoice_no"] == "INV-42"
+    assert data["total_amount"] == 1180.0
+
+def test_untokenizable_header_token_is_rejected():
+    with pytest.raises(ValueError, match="header tokens"):
+        VendorTemplate("acme", header_tokens=["ACME-TRADERS"])
+    with pytest.raises(ValueError, match="header tokens"):
+        VendorTemplate("acme", header_tokens=["CO"])
+
+def test_tax_line_needs_head_rate_and_amount_groups():
+    with pytest.raises(ValueError, match="tax_line"):
+        VendorTemplate("acme", tax_line=r"(CGST|SGST|IGST)\s*@\s*(\d+)%")
+    with pytest.raises(ValueError, match="tax_line"):
+        VendorTemplate("acme", tax_line=r"((C|S|I)GST)\s*@\s*(\d+)%\s*([\d,.]+)")
+
+def test_load_file_skips_invalid_templates(tmp_path):
+    path = tmp_path / "templates.json"
+    path.write_text(json.dumps([
+        {"name": "good", "header_tokens": ["ACME", "TRADERS"]},
+        {"name": "bad_token", "header_tokens": ["M/S"]},
+        {"name": "bad_tax_line", "tax_line": "(CGST)\\s*([\\d.]+)"}
+    ]))
+    registry = ParserRegistry(generic_parser=_generic)
+    assert registry.load_file(str(path)) == 1
+    assert registry.match(TEXT).name == "good"